@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+File: asset_cache.py
+Persistent, content-addressed cache for downloaded source assets
+(chapter PDFs, Drive lecture videos).
+A source key (URL or Drive file ID) resolves to the SHA-256 of the content;
+rows that point at the same file share one copy and one set of derived
+artifacts (transcripts etc. live next to it in the entry directory).
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import threading
+
+from disk_cache import DiskCache
+
+ASSET_META_FILE = "asset.json"
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    """Streams a file through SHA-256."""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def derived_dir_for(path):
+    """
+    Directory for artifacts derived from a cached asset (None if the file
+    is not a cache entry, e.g. a plain temp download).
+    """
+    d = os.path.dirname(os.path.abspath(path))
+    return d if os.path.exists(os.path.join(d, ASSET_META_FILE)) else None
+
+
+def asset_sha256_for(path):
+    """Content hash of a cached asset, read from its entry (no re-hashing)."""
+    d = derived_dir_for(path)
+    if not d: return None
+    try:
+        with open(os.path.join(d, ASSET_META_FILE), 'r') as f:
+            return json.load(f).get('sha256')
+    except (ValueError, OSError):
+        return None
+
+
+class AssetCache:
+    """
+    Usage:
+        cache = AssetCache('cache/assets', max_bytes=20 * 1024**3)
+        path = cache.fetch(f"drive:{file_id}", lambda dest: download(url, dest), ext='.mp4')
+    """
+
+    def __init__(self, root='cache/assets', max_bytes=None):
+        self.store = DiskCache(root, max_bytes=max_bytes)
+        self._key_locks = {}
+        self._key_locks_guard = threading.Lock()
+
+    def _key_lock(self, source_key):
+        with self._key_locks_guard:
+            return self._key_locks.setdefault(source_key, threading.Lock())
+
+    def lookup(self, source_key, ext, pin=False):
+        """Path of the cached file for source_key, or None."""
+        sha = self.store.resolve(source_key)
+        if not sha: return None
+        entry = self.store.get(sha, pin=pin)
+        if not entry: return None
+        path = os.path.join(entry, f"source{ext}")
+        if os.path.exists(path): return path
+        if pin: self.store.unpin(sha)
+        return None
+
+    def release(self, path):
+        """Unpins the entry of a path returned by fetch(..., pin=True)."""
+        self.store.unpin(os.path.basename(os.path.dirname(os.path.abspath(path))))
+
+    def fetch(self, source_key, download_fn, ext, pin=False):
+        """
+        Returns a local path for source_key, downloading only on a miss.
+
+        Args:
+            source_key: Stable identity of the source, e.g. 'url:https://...'
+                        or 'drive:<file_id>'
+            download_fn: Callable(dest_path) -> bool (or a sha256 hex string
+                         if the downloader already hashed while writing)
+            ext: File extension for the payload ('.pdf', '.mp4')
+            pin: Keep the entry from being evicted until release(path)
+
+        Returns:
+            str or None: Path to the cached file (read-only!), None if download failed
+        """
+        # One download per key inside this process; other processes race
+        # harmlessly (put() keeps the first committed copy)
+        with self._key_lock(source_key):
+            cached = self.lookup(source_key, ext, pin=pin)
+            if cached:
+                print(f"   ⚡ Cache hit: {source_key[:60]}")
+                return cached
+
+            staging = self.store.new_staging_dir()
+            payload = os.path.join(staging, f"source{ext}")
+            result = download_fn(payload)
+            if not result or not os.path.exists(payload):
+                shutil.rmtree(staging, ignore_errors=True)
+                return None
+
+            sha = result if isinstance(result, str) else file_sha256(payload)
+            with open(os.path.join(staging, ASSET_META_FILE), 'w') as f:
+                json.dump({'sha256': sha, 'source_key': source_key, 'ext': ext}, f)
+
+            entry = self.store.put(sha, staging, meta={'source_key': source_key, 'ext': ext}, pin=pin)
+            self.store.set_alias(source_key, sha)
+            return os.path.join(entry, f"source{ext}")
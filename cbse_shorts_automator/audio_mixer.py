@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""
+File: audio_mixer.py
+Master audio mix in NumPy, replacing CompositeAudioClip + write_audiofile.
+Each source (voice track, SFX, music) is decoded ONCE by ffmpeg into a
+float32 array, placed on the timeline at a sample offset, gained/faded with
+array operations, summed, and the master is encoded by ONE ffmpeg process
+reading raw samples from a pipe.
+
+MoviePy instead pulls every clip in small chunks through Python callbacks,
+with one ffmpeg reader process per clip, for the whole length of the short.
+
+Tracks can be put on named buses ('voice', 'music', ...) so one bus can be
+ducked under another: duck_gain() turns the voice bus into a smoothed gain
+curve (threshold, depth, attack, hold, release) that multiplies the music
+bus - sidechain ducking without an ffmpeg sidechaincompress pass.
+"""
+
+import os
+import subprocess
+import concurrent.futures
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+SAMPLE_RATE = 44100
+CHANNELS = 2
+DUCK_HOP = 0.01  # Seconds per step of the ducking gain curve (interpolated per sample)
+
+# Ducking defaults (AudioMixer.duck / AUDIO.DUCKING in the config)
+DUCK_DEFAULTS = {
+    'threshold_db': -40.0,  # Voice RMS above this ducks the music
+    'depth_db': 8.0,        # Music reduction while the voice is on
+    'knee_db': 6.0,         # Reduction ramps in over this much voice level
+    'attack': 0.08,         # Seconds to reach full depth (starts ahead of the voice)
+    'hold': 0.25,           # Seconds held after the voice stops (bridges word gaps)
+    'release': 0.6,         # Seconds back to full music level
+}
+
+# Encoder args per output extension (raw float32 samples come in on stdin)
+CODEC_ARGS = {
+    '.mp3': ['-c:a', 'libmp3lame', '-b:a', '192k'],
+    '.wav': ['-c:a', 'pcm_s16le'],
+    '.flac': ['-c:a', 'flac'],
+    '.m4a': ['-c:a', 'aac', '-b:a', '192k'],
+    '.aac': ['-c:a', 'aac', '-b:a', '192k'],
+}
+MUX_AUDIO_ARGS = ['-c:a', 'aac', '-b:a', '192k']
+
+# AUDIO.MASTER_FORMAT -> master file extension. Lossless masters are encoded
+# once, by whatever renders the final video; 'aac' is already final-codec.
+MASTER_FORMATS = {'wav': '.wav', 'flac': '.flac', 'aac': '.m4a', 'mp3': '.mp3'}
+
+
+def decode_audio(path, sample_rate=SAMPLE_RATE, channels=CHANNELS):
+    """
+    Decodes a whole audio file in one ffmpeg call.
+
+    Returns:
+        np.ndarray: float32 samples, shape (frames, channels), range [-1, 1]
+
+    Raises:
+        RuntimeError: ffmpeg could not decode the file
+    """
+    cmd = [
+        'ffmpeg', '-nostdin', '-v', 'error', '-i', path,
+        '-vn', '-f', 'f32le', '-acodec', 'pcm_f32le',
+        '-ac', str(channels), '-ar', str(sample_rate), 'pipe:1'
+    ]
+    proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if proc.returncode != 0:
+        raise RuntimeError(f"Decode failed ({os.path.basename(path)}): "
+                           f"{proc.stderr.decode(errors='ignore')[-300:]}")
+    return np.frombuffer(proc.stdout, dtype=np.float32).reshape(-1, channels)
+
+
+def normalize_gain(samples):
+    """Gain that brings the loudest sample to 0 dBFS (like MoviePy's audio_normalize)."""
+    peak = float(np.abs(samples).max()) if samples.size else 0.0
+    return 1.0 / peak if peak > 0 else 1.0
+
+
+def fade_envelope(frames, fade_in=0, fade_out=0):
+    """
+    Linear fade gain curve.
+
+    Args:
+        frames: Length of the curve
+        fade_in, fade_out: Ramp lengths in frames
+
+    Returns:
+        np.ndarray or None: float32 (frames,) curve, None if there is no fade
+    """
+    fade_in, fade_out = min(fade_in, frames), min(fade_out, frames)
+    if not fade_in and not fade_out: return None
+    env = np.ones(frames, dtype=np.float32)
+    if fade_in: env[:fade_in] = np.linspace(0.0, 1.0, fade_in, dtype=np.float32)
+    if fade_out: env[frames - fade_out:] *= np.linspace(1.0, 0.0, fade_out, dtype=np.float32)
+    return env
+
+
+def duck_gain(trigger, sample_rate=SAMPLE_RATE, threshold_db=-40.0, depth_db=8.0, knee_db=6.0,
+              attack=0.08, hold=0.25, release=0.6):
+    """
+    Sidechain gain curve: how much to turn another bus down while `trigger` plays.
+
+    The trigger's RMS (every DUCK_HOP seconds) maps to a reduction of 0..depth_db
+    over the knee above threshold_db. Hold keeps the deepest reduction for
+    `hold` seconds; the curve then may only fall at depth/attack dB per second
+    (ahead of the voice - the mix is offline, so the attack is look-ahead) and
+    rise at depth/release dB per second. All of it is array operations: the
+    slope limits are running minima (min-plus with a linear ramp).
+
+    Args:
+        trigger: float32 (frames, channels) samples of the controlling bus
+
+    Returns:
+        np.ndarray: float32 (frames,) linear gain
+    """
+    frames = len(trigger)
+    hop = max(1, int(DUCK_HOP * sample_rate))
+    steps = -(-frames // hop)
+    if not frames or depth_db <= 0: return np.ones(frames, dtype=np.float32)
+
+    # Envelope: RMS per hop, in dB
+    power = np.zeros(steps * hop, dtype=np.float32)
+    power[:frames] = np.einsum('ij,ij->i', trigger, trigger) / trigger.shape[1]
+    level_db = 10 * np.log10(power.reshape(steps, hop).mean(axis=1) + 1e-12)
+
+    # Wanted reduction (negative dB), then held over word gaps
+    target = -depth_db * np.clip((level_db - threshold_db) / max(knee_db, 1e-6), 0.0, 1.0)
+    hold_steps = int(hold / DUCK_HOP)
+    if hold_steps > 0:
+        padded = np.concatenate([np.zeros(hold_steps), target])
+        target = sliding_window_view(padded, hold_steps + 1).min(axis=1)
+
+    # Slope limits: g[t] = min over s of target[s] + rate * |t - s| (asymmetric)
+    idx = np.arange(steps)
+    fall = depth_db / max(attack / DUCK_HOP, 1.0)     # dB per step, going down (look-ahead)
+    rise = depth_db / max(release / DUCK_HOP, 1.0)    # dB per step, coming back up
+    after = np.minimum.accumulate(target - rise * idx) + rise * idx
+    before = (np.minimum.accumulate((target + fall * idx)[::-1]))[::-1] - fall * idx
+    gain_db = np.minimum(after, before)
+
+    # Control rate -> per sample (linear ramp across each hop)
+    gain = (10 ** (gain_db / 20)).astype(np.float32)
+    step = np.append(gain[1:], gain[-1]) - gain
+    ramp = np.arange(hop, dtype=np.float32) / hop
+    return (gain[:, None] + step[:, None] * ramp).ravel()[:frames]
+
+
+class AudioMixer:
+    """
+    Usage:
+        mixer = AudioMixer()
+        mixer.add(aud_hook, start=0.0)                  # VoiceClip, path or array
+        mixer.add("config/sfx/whoosh.wav", start=1.8, gain=0.15, normalize=True)
+        mixer.add(music_path, gain=0.12, normalize=True, loop=True, fade_out=1.0, bus='music')
+        mixer.duck('music', under='voice', depth_db=8)  # voice tracks added with bus='voice'
+        mixer.write("public/assets/audio_track.wav", duration=total_dur)   # or .m4a (AAC)
+        mixer.mux("video_only.mp4", "short.mp4", duration=total_dur)      # outside Remotion
+    """
+
+    def __init__(self, sample_rate=SAMPLE_RATE, channels=CHANNELS, decode_workers=4):
+        """
+        Args:
+            sample_rate: Mix/output rate (Hz)
+            channels: Mix/output channel count
+            decode_workers: ffmpeg decoders run in parallel when rendering
+        """
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.decode_workers = decode_workers
+        self.tracks = []
+        self.ducks = []  # (target bus, trigger bus, duck_gain kwargs)
+        self._decoded = {}  # path -> samples (a file used N times is decoded once)
+        self._peak_gains = {}  # path -> normalize_gain()
+
+    def add(self, source, start=0.0, gain=1.0, normalize=False, loop=False,
+            fade_in=0.0, fade_out=0.0, duration=None, optional=False, bus='main'):
+        """
+        Places a source on the timeline.
+
+        Args:
+            source: File path, object with a .path (VoiceClip) or float32 array (frames, channels)
+            start: Seconds on the master timeline (negative = head trimmed)
+            gain: Linear gain
+            normalize: Peak-normalize the source first
+            loop: Repeat the source until the end of the mix (or `duration`)
+            fade_in, fade_out: Seconds of linear fade at the track's ends
+            duration: Optional length limit in seconds
+            optional: If the file fails to decode, drop the track (warning) instead of raising
+            bus: Mix bus ('voice', 'music', ...) for ducking; buses are summed into the master
+        """
+        if not isinstance(source, np.ndarray):
+            source = getattr(source, 'path', source)
+        self.tracks.append({
+            'source': source, 'start': start, 'gain': gain, 'normalize': normalize,
+            'loop': loop, 'fade_in': fade_in, 'fade_out': fade_out, 'duration': duration,
+            'optional': optional, 'bus': bus
+        })
+
+    def duck(self, bus, under='voice', **params):
+        """
+        Ducks every track on `bus` while the `under` bus is sounding.
+
+        Args:
+            bus: Bus turned down (e.g., 'music')
+            under: Bus that triggers it (e.g., 'voice')
+            **params: duck_gain() settings (threshold_db, depth_db, knee_db, attack, hold, release)
+        """
+        self.ducks.append((bus, under, {**DUCK_DEFAULTS, **params}))
+
+    def _samples(self, source):
+        if isinstance(source, np.ndarray): return source
+        return self._decoded[source]
+
+    def _gain(self, track):
+        """Track gain, times the normalizing gain (memoized per file) when asked."""
+        if not track['normalize']: return track['gain']
+        source = track['source']
+        if isinstance(source, np.ndarray): return track['gain'] * normalize_gain(source)
+        if source not in self._peak_gains:
+            self._peak_gains[source] = normalize_gain(self._decoded[source])
+        return track['gain'] * self._peak_gains[source]
+
+    def _decode_sources(self):
+        paths = {t['source'] for t in self.tracks if not isinstance(t['source'], np.ndarray)}
+        paths = [p for p in paths if p not in self._decoded]
+        if not paths: return
+
+        def decode(path):
+            try:
+                return decode_audio(path, self.sample_rate, self.channels)
+            except Exception as e:
+                return e
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.decode_workers) as pool:
+            for path, samples in zip(paths, pool.map(decode, paths)):
+                if not isinstance(samples, Exception):
+                    self._decoded[path] = samples
+                    continue
+                if not all(t['optional'] for t in self.tracks if t['source'] == path):
+                    raise samples
+                print(f"⚠️ Mix: skipping {os.path.basename(path)} ({samples})")
+                self.tracks = [t for t in self.tracks if t['source'] != path]
+
+    def end_time(self):
+        """Seconds until the last non-looping track ends."""
+        self._decode_sources()
+        end = 0.0
+        for t in self.tracks:
+            if t['loop'] and t['duration'] is None: continue
+            length = t['duration'] if t['duration'] is not None else \
+                len(self._samples(t['source'])) / self.sample_rate
+            end = max(end, t['start'] + length)
+        return end
+
+    def render(self, duration=None):
+        """
+        Mixes every track.
+
+        Args:
+            duration: Master length in seconds (default: end of the last track)
+
+        Returns:
+            np.ndarray: float32 (frames, channels) master, clipped to [-1, 1]
+        """
+        self._decode_sources()
+        if duration is None: duration = self.end_time()
+        total = int(round(duration * self.sample_rate))
+        buses = {}  # bus name -> float32 (total, channels)
+
+        for t in self.tracks:
+            samples = self._samples(t['source'])
+            if not len(samples): continue
+            gain = np.float32(self._gain(t))
+
+            offset = int(round(t['start'] * self.sample_rate))
+            skip = max(0, -offset)  # Head before 0 is trimmed
+            offset = max(0, offset)
+            frames = total - offset
+            if t['duration'] is not None:
+                frames = min(frames, int(round(t['duration'] * self.sample_rate)) - skip)
+            if not t['loop']:
+                frames = min(frames, len(samples) - skip)
+            if frames <= 0: continue
+
+            if t['loop'] and skip + frames > len(samples):
+                reps = -(-(skip + frames) // len(samples))
+                samples = np.tile(samples, (reps, 1))
+            segment = samples[skip:skip + frames]
+
+            if t['bus'] not in buses:
+                buses[t['bus']] = np.zeros((total, self.channels), dtype=np.float32)
+            out = buses[t['bus']]
+            env = fade_envelope(frames, int(t['fade_in'] * self.sample_rate),
+                                int(t['fade_out'] * self.sample_rate))
+            if env is None:
+                out[offset:offset + frames] += segment * gain
+            else:
+                out[offset:offset + frames] += segment * (env * gain)[:, None]
+
+        for bus, under, params in self.ducks:
+            if bus in buses and under in buses:
+                buses[bus] *= duck_gain(buses[under], self.sample_rate, **params)[:, None]
+
+        master = np.zeros((total, self.channels), dtype=np.float32)
+        for samples in buses.values():
+            master += samples
+        np.clip(master, -1.0, 1.0, out=master)
+        return master
+
+    def write(self, output_path, duration=None, codec_args=None):
+        """
+        Renders the mix and encodes it with one ffmpeg process (samples piped in).
+
+        Args:
+            output_path: .mp3 / .wav / .m4a / .aac
+            duration: Master length in seconds (default: end of the last track)
+            codec_args: ffmpeg encoder args (default: by extension, see CODEC_ARGS)
+
+        Returns:
+            float: Seconds of audio written
+
+        Raises:
+            RuntimeError: ffmpeg failed
+        """
+        master = self.render(duration)
+        ext = os.path.splitext(output_path)[1].lower()
+        cmd = [
+            'ffmpeg', '-y', '-nostdin', '-v', 'error',
+            '-f', 'f32le', '-ar', str(self.sample_rate), '-ac', str(self.channels), '-i', 'pipe:0',
+            *(codec_args or CODEC_ARGS.get(ext, [])),
+            output_path
+        ]
+        proc = subprocess.run(cmd, input=master.tobytes(), stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        if proc.returncode != 0:
+            raise RuntimeError(f"Audio encode failed: {proc.stderr.decode(errors='ignore')[-300:]}")
+        return len(master) / self.sample_rate
+
+    def mux(self, video_path, output_path, duration=None, video_args=None, audio_args=None):
+        """
+        Renders the mix and muxes it with a video in ONE ffmpeg process: the
+        video stream is copied, the master is piped in raw and encoded once
+        (AAC by default) - no intermediate audio file, no lossy re-encode.
+
+        Args:
+            video_path: Video-only (or its audio is ignored) .mp4
+            output_path: Final .mp4
+            duration: Master length in seconds (default: end of the last track)
+            video_args: ffmpeg video codec args (default: stream copy)
+            audio_args: ffmpeg audio codec args (default: MUX_AUDIO_ARGS)
+
+        Returns:
+            float: Seconds of audio muxed
+
+        Raises:
+            RuntimeError: ffmpeg failed
+        """
+        master = self.render(duration)
+        cmd = [
+            'ffmpeg', '-y', '-nostdin', '-v', 'error',
+            '-i', video_path,
+            '-f', 'f32le', '-ar', str(self.sample_rate), '-ac', str(self.channels), '-i', 'pipe:0',
+            '-map', '0:v:0', '-map', '1:a:0',
+            *(video_args or ['-c:v', 'copy']),
+            *(audio_args or MUX_AUDIO_ARGS),
+            '-movflags', '+faststart',
+            output_path
+        ]
+        proc = subprocess.run(cmd, input=master.tobytes(), stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        if proc.returncode != 0:
+            raise RuntimeError(f"Mux failed: {proc.stderr.decode(errors='ignore')[-300:]}")
+        return len(master) / self.sample_rate
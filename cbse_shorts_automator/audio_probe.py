@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+File: audio_probe.py
+Duration of MP3/WAV files straight from their headers - no ffmpeg process,
+no decoding. Voice timing (where each segment starts on the timeline) only
+needs durations, so this replaces opening an AudioFileClip per segment.
+
+- WAV: RIFF 'fmt ' byte rate + 'data' chunk size
+- MP3: Xing/Info/VBRI frame count when present (LAME VBR, Google),
+       otherwise a walk over the frame headers (CBR, Edge)
+"""
+
+import os
+import struct
+
+# MPEG audio Layer III tables (index = header field)
+MP3_BITRATES = {
+    'mpeg1': [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    'mpeg2': [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+MP3_SAMPLE_RATES = {
+    3: [44100, 48000, 32000],  # MPEG-1
+    2: [22050, 24000, 16000],  # MPEG-2
+    0: [11025, 12000, 8000],   # MPEG-2.5
+}
+
+
+def _parse_mp3_header(data, pos):
+    """
+    Decodes the 4-byte Layer III frame header at pos.
+
+    Returns:
+        dict or None: {'version', 'sample_rate', 'frame_len', 'samples', 'mono'}
+    """
+    if pos + 4 > len(data) or data[pos] != 0xFF or (data[pos + 1] & 0xE0) != 0xE0:
+        return None
+    b1, b2, b3 = data[pos + 1], data[pos + 2], data[pos + 3]
+    version = (b1 >> 3) & 0x3
+    layer = (b1 >> 1) & 0x3
+    bitrate_idx = b2 >> 4
+    sr_idx = (b2 >> 2) & 0x3
+    if version == 1 or layer != 1 or bitrate_idx in (0, 15) or sr_idx == 3:
+        return None  # Reserved values, free format or not Layer III
+
+    mpeg1 = version == 3
+    bitrate = MP3_BITRATES['mpeg1' if mpeg1 else 'mpeg2'][bitrate_idx] * 1000
+    sample_rate = MP3_SAMPLE_RATES[version][sr_idx]
+    padding = (b2 >> 1) & 0x1
+    return {
+        'version': version,
+        'sample_rate': sample_rate,
+        'frame_len': (144 if mpeg1 else 72) * bitrate // sample_rate + padding,
+        'samples': 1152 if mpeg1 else 576,
+        'mono': (b3 >> 6) == 3,
+    }
+
+
+def _skip_id3v2(data):
+    """Offset of the first byte after an ID3v2 tag (0 if there is none)."""
+    if len(data) < 10 or data[:3] != b'ID3': return 0
+    size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def _vbr_frame_count(data, pos, header):
+    """Frame count from a Xing/Info or VBRI header in the first frame, else None."""
+    if header['version'] == 3:
+        side_info = 17 if header['mono'] else 32
+    else:
+        side_info = 9 if header['mono'] else 17
+
+    xing = pos + 4 + side_info
+    if data[xing:xing + 4] in (b'Xing', b'Info'):
+        flags = struct.unpack('>I', data[xing + 4:xing + 8])[0]
+        if flags & 0x1:
+            return struct.unpack('>I', data[xing + 8:xing + 12])[0]
+
+    vbri = pos + 4 + 32
+    if data[vbri:vbri + 4] == b'VBRI':
+        return struct.unpack('>I', data[vbri + 14:vbri + 18])[0]
+    return None
+
+
+def mp3_duration(path):
+    """
+    Returns:
+        float or None: Seconds, or None if no Layer III frames were found
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    pos = _skip_id3v2(data)
+    first = None
+    while pos + 4 <= len(data):
+        first = _parse_mp3_header(data, pos)
+        if first: break
+        pos += 1
+    if not first: return None
+
+    frames = _vbr_frame_count(data, pos, first)
+    if frames is not None:
+        return frames * first['samples'] / first['sample_rate']
+
+    # CBR (no VBR header): count frames; stray bytes between frames are skipped
+    frames = 0
+    while pos + 4 <= len(data):
+        header = _parse_mp3_header(data, pos)
+        if header and header['version'] == first['version'] and header['sample_rate'] == first['sample_rate']:
+            frames += 1
+            pos += header['frame_len']
+        else:
+            pos += 1
+    return frames * first['samples'] / first['sample_rate']
+
+
+def wav_duration(path):
+    """
+    Returns:
+        float or None: Seconds, or None if the RIFF structure is not understood
+    """
+    with open(path, 'rb') as f:
+        riff = f.read(12)
+        if len(riff) < 12 or riff[:4] != b'RIFF' or riff[8:12] != b'WAVE': return None
+
+        byte_rate = None
+        while True:
+            chunk = f.read(8)
+            if len(chunk) < 8: return None
+            chunk_id, size = chunk[:4], struct.unpack('<I', chunk[4:])[0]
+            if chunk_id == b'fmt ':
+                fmt = f.read(size)
+                byte_rate = struct.unpack('<I', fmt[8:12])[0]
+                if size % 2: f.seek(1, os.SEEK_CUR)
+            elif chunk_id == b'data':
+                if not byte_rate: return None
+                # Streamed WAVs may carry a placeholder size: trust the file length instead
+                available = os.path.getsize(path) - f.tell()
+                if size == 0 or size > available: size = available
+                return size / byte_rate
+            else:
+                f.seek(size + (size % 2), os.SEEK_CUR)
+
+
+def probe_duration(path):
+    """
+    Header-only duration of an MP3 or WAV file.
+
+    Returns:
+        float or None: Seconds, or None if the format isn't supported
+                       (callers then fall back to decoding)
+    """
+    try:
+        if path.lower().endswith('.wav'):
+            return wav_duration(path)
+        return mp3_duration(path)
+    except (OSError, struct.error):
+        return None
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+File: batch_pipeline.py
+Stage-pipelined batch executor.
+Every stage owns a pool of worker threads fed by a bounded queue, so several
+rows are in flight at once (one downloading, one waiting on Gemini, one
+rendering...). Throughput is bounded by the slowest stage instead of the sum
+of all stage latencies.
+"""
+
+import queue
+import threading
+import time
+
+# Sentinel pushed through the queues to shut workers down
+_STOP = object()
+
+
+class PipelineStage:
+    """
+    One step of the pipeline.
+
+    Args:
+        name: Label used in logs and timing stats (e.g., 'download')
+        func: Callable(job) -> None. Mutates the job dict in place.
+              Raising marks the job as failed and skips the remaining stages.
+        workers: Number of worker threads for this stage
+        queue_size: Max jobs waiting in front of this stage (backpressure)
+    """
+
+    def __init__(self, name, func, workers=1, queue_size=2):
+        self.name = name
+        self.func = func
+        self.workers = max(1, int(workers))
+        self.queue_size = max(1, int(queue_size))
+
+        self.inbox = None
+        self.busy_time = 0.0
+        self.processed = 0
+        self._alive = 0
+        self._lock = threading.Lock()
+
+
+class BatchPipeline:
+    """
+    Runs jobs (dicts) through a chain of PipelineStage objects.
+
+    Usage:
+        pipeline = BatchPipeline([
+            PipelineStage('download', download_fn, workers=2),
+            PipelineStage('render', render_fn, workers=1),
+        ])
+        for job in pipeline.run(jobs):
+            ...  # job['error'] is set if any stage raised
+    """
+
+    def __init__(self, stages):
+        if not stages:
+            raise ValueError("BatchPipeline needs at least one stage")
+        self.stages = stages
+        self.results = queue.Queue()
+
+    def _worker(self, index):
+        stage = self.stages[index]
+        is_last = index == len(self.stages) - 1
+
+        while True:
+            job = stage.inbox.get()
+            if job is _STOP:
+                break
+
+            t0 = time.time()
+            try:
+                stage.func(job)
+                failed = False
+            except Exception as e:
+                print(f"❌ [{stage.name}] Row {job.get('row_idx', '?')}: {e}")
+                job['error'] = str(e)
+                job['failed_stage'] = stage.name
+                failed = True
+            elapsed = time.time() - t0
+
+            job.setdefault('timings', {})[stage.name] = elapsed
+            with stage._lock:
+                stage.busy_time += elapsed
+                stage.processed += 1
+
+            # Failed jobs skip the rest of the chain
+            if failed or is_last:
+                self.results.put(job)
+            else:
+                self.stages[index + 1].inbox.put(job)
+
+        # Last worker out closes the next stage (or the result stream)
+        with stage._lock:
+            stage._alive -= 1
+            last_out = stage._alive == 0
+        if last_out:
+            if is_last:
+                self.results.put(_STOP)
+            else:
+                nxt = self.stages[index + 1]
+                for _ in range(nxt.workers):
+                    nxt.inbox.put(_STOP)
+
+    def _feed(self, jobs):
+        first = self.stages[0]
+        for job in jobs:
+            first.inbox.put(job)  # Blocks while the first stage is saturated
+        for _ in range(first.workers):
+            first.inbox.put(_STOP)
+
+    def run(self, jobs):
+        """
+        Pushes jobs through all stages.
+
+        Args:
+            jobs: Iterable of job dicts
+
+        Yields:
+            dict: Each job once it has finished (or failed), in completion order
+        """
+        threads = []
+        for i, stage in enumerate(self.stages):
+            stage.inbox = queue.Queue(maxsize=stage.queue_size)
+            stage._alive = stage.workers
+            for w in range(stage.workers):
+                t = threading.Thread(
+                    target=self._worker, args=(i,),
+                    name=f"{stage.name}-{w}", daemon=True
+                )
+                t.start()
+                threads.append(t)
+
+        feeder = threading.Thread(target=self._feed, args=(jobs,), name="feeder", daemon=True)
+        feeder.start()
+
+        while True:
+            job = self.results.get()
+            if job is _STOP:
+                break
+            yield job
+
+        feeder.join()
+        for t in threads:
+            t.join()
+
+    def print_stats(self):
+        """Print per-stage busy time (the largest one is the bottleneck)."""
+        print("\n📊 PIPELINE STAGE STATS")
+        for stage in self.stages:
+            per_job = stage.busy_time / stage.processed if stage.processed else 0.0
+            print(f"   {stage.name:<10} workers={stage.workers} jobs={stage.processed} "
+                  f"busy={stage.busy_time:.1f}s avg={per_job:.1f}s/job")
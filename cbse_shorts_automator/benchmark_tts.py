@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+File: benchmark_tts.py
+Purpose: Throughput / fallback benchmark of the voice stack, fully offline.
+Drives the real VoiceManager (cache, quota reservations, router, Edge batch)
+against voice_simulator providers and reports per-scenario numbers.
+
+Usage:
+    python benchmark_tts.py                         # all scenarios
+    python benchmark_tts.py --scenario throttled --videos 40 --jobs 8
+    python benchmark_tts.py --time-scale 0.1 --check --json bench.json   # CI
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import concurrent.futures
+
+from voice_config import GOOGLE_VOICES
+from voice_manager import VoiceManager
+from voice_simulator import SimulatedTTSService, SimulatedGoogleVoiceEngine, SimulatedEdgeVoiceEngine
+from tts_router import ProviderRouter
+from synthesis_result import VoiceJobUsage
+
+SAMPLE_SENTENCES = [
+    "Photosynthesis converts light energy into chemical energy stored in glucose.",
+    "Which of these is the powerhouse of the cell?",
+    "Option A, the nucleus.",
+    "Option B, the mitochondria.",
+    "Option C, the ribosome.",
+    "Option D, the Golgi body.",
+    "Think fast!",
+    "The correct answer is B, because mitochondria release energy through respiration.",
+    "Follow for more quick revision shorts every day.",
+]
+
+# Simulated provider settings per scenario: (google kwargs, edge kwargs, runs)
+SCENARIOS = {
+    'baseline': ({'latency': 0.3, 'jitter': 0.1}, {'latency': 0.5, 'jitter': 0.2}, 1),
+    'warm_cache': ({'latency': 0.3, 'jitter': 0.1}, {'latency': 0.5, 'jitter': 0.2}, 2),
+    'throttled': ({'latency': 0.3, 'jitter': 0.1, 'burst_every': 10, 'burst_length': 3},
+                  {'latency': 0.5, 'jitter': 0.2, 'burst_every': 8, 'burst_length': 2}, 1),
+    'quota': ({'latency': 0.3, 'jitter': 0.1, 'quota_chars': 1200}, {'latency': 0.5, 'jitter': 0.2}, 1),
+    'slow_tail': ({'latency': 0.3, 'jitter': 3.0}, {'latency': 0.5, 'jitter': 0.2}, 1),
+}
+
+
+def video_tasks(video_index, segments, out_dir):
+    """{key: (text, path)} for one simulated video (same texts on every run)."""
+    tasks = {}
+    for j in range(segments):
+        text = f"Video {video_index} part {j}. {SAMPLE_SENTENCES[j % len(SAMPLE_SENTENCES)]}"
+        tasks[f"seg{j}"] = (text, os.path.join(out_dir, f"v{video_index}_seg{j}.mp3"))
+    return tasks
+
+
+def percentile(values, p):
+    if not values: return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100.0 * (len(ordered) - 1))))]
+
+
+def run_scenario(name, args, work_dir):
+    google_kw, edge_kw, runs = SCENARIOS[name]
+    google = SimulatedTTSService('google', time_scale=args.time_scale, seed=args.seed, **google_kw)
+    edge = SimulatedTTSService('edge', time_scale=args.time_scale, seed=args.seed + 1, **edge_kw)
+
+    scenario_dir = os.path.join(work_dir, name)
+    vm = VoiceManager(
+        data_dir=os.path.join(scenario_dir, 'data'),
+        cache_dir=os.path.join(scenario_dir, 'cache') if not args.no_cache else None,
+        google_single_request=args.single_request,
+        router=ProviderRouter(min_samples=args.hedge_samples),
+        google_engine=SimulatedGoogleVoiceEngine(google, accounts=args.accounts),
+        edge_engine=SimulatedEdgeVoiceEngine(edge, retry_base=0.25 * args.time_scale,
+                                             retry_max=2.0 * args.time_scale,
+                                             rate_limit_base=2.0 * args.time_scale,
+                                             rate_limit_max=30.0 * args.time_scale)
+    )
+    voice_key = next(iter(GOOGLE_VOICES))
+
+    for run in range(runs):
+        out_dir = os.path.join(scenario_dir, f"run{run}")
+        os.makedirs(out_dir, exist_ok=True)
+        video_times, failures, mixed = [], 0, 0
+        usage = VoiceJobUsage()  # All videos of the run (thread-safe)
+
+        def one_video(i):
+            start = time.monotonic()
+            results = vm.generate_batch_with_specific_voice(
+                video_tasks(i, args.segments, out_dir), voice_key,
+                max_concurrency=args.concurrency, usage=usage
+            )
+            voices = {(r.result.provider, r.result.voice) for r in results.values() if not isinstance(r, Exception)}
+            return time.monotonic() - start, sum(isinstance(r, Exception) for r in results.values()), len(voices) > 1
+
+        wall_start = time.monotonic()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=args.jobs) as pool:
+            for elapsed, failed, mixed_voices in pool.map(one_video, range(args.videos)):
+                video_times.append(elapsed)
+                failures += failed
+                mixed += mixed_voices
+        wall = time.monotonic() - wall_start
+
+    # Only the last run is reported (warm_cache: the second, cached pass)
+    segments = args.videos * args.segments
+    return {
+        'scenario': name,
+        'videos': args.videos,
+        'segments': segments,
+        'failures': failures,
+        'mixed_voice_videos': mixed,
+        'wall_s': round(wall, 2),
+        'segments_per_s': round(segments / wall, 2) if wall else 0.0,
+        'video_p50_s': round(percentile(video_times, 50), 2),
+        'video_p95_s': round(percentile(video_times, 95), 2),
+        'google': google.stats(),
+        'edge': edge.stats(),
+        'voice': usage.summary(),
+        'router': vm.router.stats(),
+        'quota': vm.get_usage_summary(),
+    }
+
+
+def print_report(results):
+    print("\n" + "=" * 100)
+    print("📈 TTS BENCHMARK (simulated providers)")
+    print("=" * 100)
+    header = f"{'scenario':<12}{'segs':>6}{'fail':>6}{'wall s':>9}{'seg/s':>8}{'p50 s':>8}{'p95 s':>8}" \
+             f"{'cached':>8}{'G req':>7}{'G 429':>7}{'G quota':>9}{'E req':>7}{'E 429':>7}{'mixed':>7}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        g, e = r['google'], r['edge']
+        print(f"{r['scenario']:<12}{r['segments']:>6}{r['failures']:>6}{r['wall_s']:>9}{r['segments_per_s']:>8}"
+              f"{r['video_p50_s']:>8}{r['video_p95_s']:>8}{r['voice']['cache_hits']:>8}{g['requests']:>7}{g['throttled']:>7}"
+              f"{g['quota_rejections']:>9}{e['requests']:>7}{e['throttled']:>7}{r['mixed_voice_videos']:>7}")
+    print("=" * 100)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline TTS throughput benchmark")
+    parser.add_argument('--scenario', choices=sorted(SCENARIOS) + ['all'], default='all')
+    parser.add_argument('--videos', type=int, default=12, help="Videos per scenario")
+    parser.add_argument('--segments', type=int, default=9, help="Voice segments per video (quiz = 9)")
+    parser.add_argument('--jobs', type=int, default=4, help="Videos synthesized in parallel")
+    parser.add_argument('--concurrency', type=int, default=4, help="Per-video max_concurrency")
+    parser.add_argument('--accounts', type=int, default=2, help="Simulated Google accounts")
+    parser.add_argument('--single-request', action='store_true', help="Google single SSML request per video")
+    parser.add_argument('--no-cache', action='store_true', help="Disable the TTS clip cache")
+    parser.add_argument('--hedge-samples', type=int, default=10, help="Samples before hedging starts")
+    parser.add_argument('--time-scale', type=float, default=1.0, help="Multiplier on simulated delays")
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--json', help="Write results to this file")
+    parser.add_argument('--keep', action='store_true', help="Keep the work directory")
+    parser.add_argument('--check', action='store_true', help="Exit 1 if any segment failed or a video mixed voices")
+    args = parser.parse_args()
+
+    names = sorted(SCENARIOS) if args.scenario == 'all' else [args.scenario]
+    work_dir = tempfile.mkdtemp(prefix="tts_bench_")
+    try:
+        results = [run_scenario(name, args, work_dir) for name in names]
+    finally:
+        if args.keep:
+            print(f"📁 Work directory kept: {work_dir}")
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    print_report(results)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Results written to {args.json}")
+
+    if args.check and any(r['failures'] for r in results):
+        print("❌ Some segments failed")
+        sys.exit(1)
+    if args.check and any(r['mixed_voice_videos'] for r in results):
+        print("❌ Some videos mixed voices")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
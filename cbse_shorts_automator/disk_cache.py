@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+File: disk_cache.py
+Size-capped, LRU-evicted on-disk cache shared by threads and processes.
+Each entry is a directory (so derived files can live next to the payload).
+The index is a JSON file guarded by a file lock and replaced atomically.
+Entries in use can be pinned (refcounted per process); eviction skips them.
+"""
+
+import os
+import json
+import time
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl  # POSIX only; on other platforms we fall back to the thread lock
+except ImportError:
+    fcntl = None
+
+
+class DiskCache:
+    """
+    Layout:
+        <root>/index.json        {"entries": {key: {...}}, "aliases": {alias: key},
+                                  "pins": {key: {pid: count}}}
+        <root>/.lock             inter-process lock file
+        <root>/.staging/         half-written entries (never visible in the index)
+        <root>/objects/<key>/    committed entries
+    """
+
+    def __init__(self, root, max_bytes=None):
+        """
+        Args:
+            root: Cache directory
+            max_bytes: Size cap; least recently used entries are evicted beyond it
+                       (None = unbounded)
+        """
+        self.root = root
+        self.max_bytes = max_bytes
+        self.objects_dir = os.path.join(root, "objects")
+        self.staging_dir = os.path.join(root, ".staging")
+        self.index_path = os.path.join(root, "index.json")
+        self.lock_path = os.path.join(root, ".lock")
+        self._thread_lock = threading.RLock()
+
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.staging_dir, exist_ok=True)
+
+    # ------------------------------------------------------------------
+    # Locking & index persistence
+    # ------------------------------------------------------------------
+
+    @contextmanager
+    def _locked(self):
+        """Exclusive access to the index (threads + other processes)."""
+        with self._thread_lock:
+            with open(self.lock_path, 'a') as lock_file:
+                if fcntl: fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    if fcntl: fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _load_index(self):
+        if os.path.exists(self.index_path):
+            try:
+                with open(self.index_path, 'r') as f:
+                    index = json.load(f)
+                index.setdefault('entries', {})
+                index.setdefault('aliases', {})
+                index.setdefault('pins', {})
+                return index
+            except (ValueError, OSError):
+                print(f"⚠️ Cache index unreadable, rebuilding: {self.index_path}")
+        return {'entries': {}, 'aliases': {}, 'pins': {}}
+
+    def _save_index(self, index):
+        fd, tmp = tempfile.mkstemp(dir=self.root, prefix=".index-", suffix=".tmp")
+        with os.fdopen(fd, 'w') as f:
+            json.dump(index, f)
+        os.replace(tmp, self.index_path)
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def entry_dir(self, key):
+        """Directory of an entry (whether or not it exists)."""
+        return os.path.join(self.objects_dir, key)
+
+    def get(self, key, pin=False):
+        """
+        Look up an entry and mark it as recently used.
+        pin=True also pins it (see pin()) in the same locked step.
+
+        Returns:
+            str or None: Entry directory, or None on a miss
+        """
+        with self._locked():
+            index = self._load_index()
+            entry = index['entries'].get(key)
+            path = self.entry_dir(key)
+            if entry is None or not os.path.isdir(path):
+                if entry is not None:
+                    # Someone removed the files behind our back
+                    self._drop(index, key)
+                    self._save_index(index)
+                return None
+            entry['last_access'] = time.time()
+            if pin: self._add_pin(index, key, 1)
+            self._save_index(index)
+            return path
+
+    def pin(self, key):
+        """
+        Protects an entry from eviction until unpin() (refcounted, per process;
+        pins of processes that died are ignored).
+        """
+        with self._locked():
+            index = self._load_index()
+            if key in index['entries']:
+                self._add_pin(index, key, 1)
+                self._save_index(index)
+
+    def unpin(self, key):
+        """Releases one pin() / get(pin=True) / put(pin=True) of this process."""
+        with self._locked():
+            index = self._load_index()
+            self._add_pin(index, key, -1)
+            self._save_index(index)
+
+    def resolve(self, alias):
+        """Returns the key an alias points to (or None)."""
+        with self._locked():
+            return self._load_index()['aliases'].get(alias)
+
+    def set_alias(self, alias, key):
+        """Points an alias (e.g., a URL) at an existing key."""
+        with self._locked():
+            index = self._load_index()
+            if key in index['entries']:
+                index['aliases'][alias] = key
+                self._save_index(index)
+
+    def new_staging_dir(self):
+        """Private scratch directory to build an entry in before put()."""
+        return tempfile.mkdtemp(dir=self.staging_dir)
+
+    def put(self, key, staging_dir, meta=None, pin=False):
+        """
+        Commits a staged directory as entry `key` and evicts LRU entries.
+        If the key already exists (another worker won the race) the staged
+        copy is discarded. pin=True pins the entry before eviction runs.
+
+        Returns:
+            str: Entry directory
+        """
+        target = self.entry_dir(key)
+        size = self._dir_size(staging_dir)
+
+        with self._locked():
+            index = self._load_index()
+            if key in index['entries'] and os.path.isdir(target):
+                shutil.rmtree(staging_dir, ignore_errors=True)
+                index['entries'][key]['last_access'] = time.time()
+            else:
+                if os.path.isdir(target): shutil.rmtree(target, ignore_errors=True)
+                os.replace(staging_dir, target)
+                now = time.time()
+                index['entries'][key] = {
+                    'size': size, 'created': now, 'last_access': now, 'meta': meta or {}
+                }
+            if pin: self._add_pin(index, key, 1)
+            self._evict(index, keep=key)
+            self._save_index(index)
+        return target
+
+    def refresh_size(self, key):
+        """Re-measures an entry after derived files were added to it."""
+        path = self.entry_dir(key)
+        if not os.path.isdir(path): return
+        size = self._dir_size(path)
+        with self._locked():
+            index = self._load_index()
+            if key in index['entries']:
+                index['entries'][key]['size'] = size
+                self._evict(index, keep=key)
+                self._save_index(index)
+
+    def total_size(self):
+        with self._locked():
+            return sum(e['size'] for e in self._load_index()['entries'].values())
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _add_pin(self, index, key, delta):
+        pins = index['pins'].setdefault(key, {})
+        pid = str(os.getpid())
+        count = pins.get(pid, 0) + delta
+        if count > 0: pins[pid] = count
+        else: pins.pop(pid, None)
+        if not pins: del index['pins'][key]
+
+    @staticmethod
+    def _pid_alive(pid):
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            return False
+        except (PermissionError, ValueError, OSError):
+            return True  # Exists under another user / can't tell: keep the pin
+        return True
+
+    def _pinned(self, index, key):
+        """True if a live process holds a pin on key (dead holders are forgotten)."""
+        pins = index['pins'].get(key)
+        if not pins: return False
+        for pid in [p for p in pins if not self._pid_alive(p)]:
+            del pins[pid]
+        if not pins: del index['pins'][key]
+        return bool(pins)
+
+    def _drop(self, index, key):
+        index['entries'].pop(key, None)
+        index['pins'].pop(key, None)
+        for alias in [a for a, k in index['aliases'].items() if k == key]:
+            del index['aliases'][alias]
+
+    def _evict(self, index, keep=None):
+        if self.max_bytes is None: return
+        total = sum(e['size'] for e in index['entries'].values())
+        if total <= self.max_bytes: return
+
+        by_age = sorted(index['entries'].items(), key=lambda kv: kv[1]['last_access'])
+        for key, entry in by_age:
+            if total <= self.max_bytes: break
+            if key == keep or self._pinned(index, key): continue
+            shutil.rmtree(self.entry_dir(key), ignore_errors=True)
+            self._drop(index, key)
+            total -= entry['size']
+            print(f"🧹 Cache evicted {key[:12]}... ({entry['size'] / 1e6:.1f} MB)")
+
+    @staticmethod
+    def _dir_size(path):
+        total = 0
+        for dirpath, _, filenames in os.walk(path):
+            for name in filenames:
+                try: total += os.path.getsize(os.path.join(dirpath, name))
+                except OSError: pass
+        return total
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+File: download_manager.py
+Streaming download subsystem for chapter PDFs and Drive lecture videos.
+- Streams straight to disk (never holds the body in memory)
+- Hashes (SHA-256) while writing
+- Resumes interrupted transfers with HTTP Range requests
+- Fetches large files as parallel byte ranges (per-range progress kept in a
+  .ranges sidecar, so a retry refetches only what is missing)
+- Reuses pooled keep-alive sessions (one per thread)
+"""
+
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+import concurrent.futures
+import requests
+from requests.adapters import HTTPAdapter
+
+DRIVE_DOWNLOAD_URL = "https://drive.google.com/uc?export=download"
+DEFAULT_HEADERS = {'User-Agent': 'Mozilla/5.0'}
+PART_SUFFIX = ".part"
+RANGES_SUFFIX = ".ranges"  # Next to a preallocated .part: [[start, end, pos], ...]
+
+
+class DownloadManager:
+    """
+    Usage:
+        dl = DownloadManager()
+        sha = dl.fetch("https://ncert.nic.in/textbook/pdf/lech102.pdf", "ch2.pdf")
+        sha = dl.fetch_drive(file_id, "lecture.mp4")
+    """
+
+    def __init__(self, chunk_size=1024 * 1024, parallel_threshold=64 * 1024 * 1024,
+                 parallel_parts=4, retries=3, retry_delay=2, timeout=30,
+                 pool_size=16, drive_url=DRIVE_DOWNLOAD_URL):
+        """
+        Args:
+            chunk_size: Bytes per read/write while streaming
+            parallel_threshold: Files at least this big are fetched as byte ranges
+            parallel_parts: Number of concurrent ranges for large files
+            retries: Attempts per download (resuming from the partial file)
+            retry_delay: Base delay between attempts (seconds, grows linearly)
+            timeout: Connect/read timeout per request (seconds)
+            pool_size: Keep-alive connections per host in each session
+            drive_url: Drive download endpoint (override to test against a local stand-in)
+        """
+        self.chunk_size = chunk_size
+        self.parallel_threshold = parallel_threshold
+        self.parallel_parts = max(1, parallel_parts)
+        self.retries = max(1, retries)
+        self.retry_delay = retry_delay
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.drive_url = drive_url
+        self._local = threading.local()
+
+    # ------------------------------------------------------------------
+    # Sessions
+    # ------------------------------------------------------------------
+
+    def _session(self):
+        """Pooled keep-alive session, one per thread (requests.Session isn't thread-safe)."""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            session.headers.update(DEFAULT_HEADERS)
+            self._local.session = session
+        return session
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def fetch(self, url, dest, params=None, headers=None, cookies=None):
+        """
+        Downloads url to dest.
+
+        Returns:
+            str or None: SHA-256 hex digest of the file, None on failure
+        """
+        for attempt in range(self.retries):
+            if attempt > 0:
+                wait = self.retry_delay * attempt
+                print(f"   ⏳ Retry {attempt+1}/{self.retries} in {wait}s: {os.path.basename(dest)}")
+                time.sleep(wait)
+            try:
+                sha = self._fetch_once(url, dest, params, headers, cookies)
+                if sha: return sha
+            except (requests.RequestException, OSError) as e:
+                print(f"   ❌ Download error ({os.path.basename(dest)}): {e}")
+        return None
+
+    def fetch_drive(self, file_id, dest):
+        """
+        Downloads a Google Drive file, handling the large-file virus-scan
+        confirmation page.
+
+        Returns:
+            str or None: SHA-256 hex digest, None on failure
+        """
+        try:
+            url, params, cookies = self._resolve_drive(file_id)
+        except requests.RequestException as e:
+            print(f"   ❌ Drive resolve error: {e}")
+            return None
+        return self.fetch(url, dest, params=params, cookies=cookies)
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _resolve_drive(self, file_id):
+        """Returns (url, params, cookies) that serve the raw bytes."""
+        session = self._session()
+        params = {'id': file_id}
+        with session.get(self.drive_url, params=params, stream=True, timeout=self.timeout) as r:
+            token = None
+            for key, value in r.cookies.items():
+                if key.startswith('download_warning'):
+                    token = value
+                    break
+            if token:
+                params = {'id': file_id, 'confirm': token}
+            elif 'text/html' in r.headers.get('Content-Type', ''):
+                # Newer Drive serves an HTML form pointing at drive.usercontent.google.com
+                page = r.text
+                action = re.search(r'action="([^"]+)"', page)
+                fields = dict(re.findall(r'name="([^"]+)" value="([^"]*)"', page))
+                if action and fields:
+                    return action.group(1).replace('&amp;', '&'), fields, session.cookies.get_dict()
+        return self.drive_url, params, session.cookies.get_dict()
+
+    def _fetch_once(self, url, dest, params, headers, cookies):
+        session = self._session()
+        part_path = dest + PART_SUFFIX
+
+        # A parallel download left a sparse .part: only its range map says what is there
+        progress = self._load_ranges(part_path)
+        if progress:
+            return self._fetch_parallel(url, dest, progress['total'], params, headers, cookies,
+                                        ranges=progress['ranges'])
+
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+
+        req_headers = dict(headers or {})
+        if offset: req_headers['Range'] = f"bytes={offset}-"
+
+        r = session.get(url, params=params, headers=req_headers, cookies=cookies,
+                        stream=True, timeout=self.timeout)
+        with r:
+            if r.status_code == 416 and offset:
+                # Partial file is already complete (or junk): start over
+                os.remove(part_path)
+                return None
+            if r.status_code not in (200, 206):
+                print(f"   ❌ HTTP {r.status_code} for {os.path.basename(dest)}")
+                return None
+
+            resumed = r.status_code == 206 and offset > 0
+            total = self._total_size(r, offset if resumed else 0)
+            ranges_ok = r.headers.get('Accept-Ranges', '').lower() == 'bytes' or r.status_code == 206
+
+            # Large fresh download on a range-capable server -> parallel byte ranges
+            if (not offset and ranges_ok and total and total >= self.parallel_threshold
+                    and self.parallel_parts > 1):
+                r.close()
+                return self._fetch_parallel(url, dest, total, params, headers, cookies)
+
+            h = hashlib.sha256()
+            if resumed:
+                print(f"   ↩️  Resuming {os.path.basename(dest)} at {offset / 1e6:.1f} MB")
+                self._hash_file(part_path, h)
+                mode = 'ab'
+            else:
+                mode = 'wb'  # Server ignored Range (200): restart from zero
+
+            with open(part_path, mode) as f:
+                for chunk in r.iter_content(self.chunk_size):
+                    if chunk:
+                        f.write(chunk)
+                        h.update(chunk)
+
+        if total and os.path.getsize(part_path) != total:
+            raise OSError(f"Incomplete download: {os.path.getsize(part_path)}/{total} bytes")
+
+        os.replace(part_path, dest)
+        return h.hexdigest()
+
+    def _load_ranges(self, part_path):
+        """Range map of a preallocated .part ({'total', 'ranges'}), None if absent or unusable."""
+        map_path = part_path + RANGES_SUFFIX
+        if not os.path.exists(map_path): return None
+        try:
+            with open(map_path, 'r') as f:
+                progress = json.load(f)
+            if os.path.getsize(part_path) == progress['total']:
+                return progress
+        except (ValueError, OSError, KeyError, TypeError):
+            pass
+        # Unusable map: the .part can't be trusted either
+        for p in (part_path, map_path):
+            if os.path.exists(p): os.remove(p)
+        return None
+
+    def _save_ranges(self, part_path, total, ranges):
+        map_path = part_path + RANGES_SUFFIX
+        tmp_path = f"{map_path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'total': total, 'ranges': ranges}, f)
+        os.replace(tmp_path, map_path)
+
+    def _fetch_parallel(self, url, dest, total, params, headers, cookies, ranges=None):
+        """
+        Splits [0, total) into ranges fetched concurrently into one preallocated
+        file. `ranges` ([[start, end, pos], ...]) resumes an earlier attempt.
+        """
+        part_path = dest + PART_SUFFIX
+        if ranges is None:
+            with open(part_path, 'wb') as f:
+                f.truncate(total)
+            step = -(-total // self.parallel_parts)  # Ceil division
+            ranges = [[start, min(start + step, total) - 1, start] for start in range(0, total, step)]
+            self._save_ranges(part_path, total, ranges)
+            print(f"   ⚡ Parallel download: {len(ranges)} ranges, {total / 1e6:.1f} MB")
+        else:
+            missing = sum(end + 1 - pos for _, end, pos in ranges)
+            print(f"   ↩️  Resuming parallel download of {os.path.basename(dest)}: {missing / 1e6:.1f} MB left")
+        map_lock = threading.Lock()
+
+        def fetch_range(index):
+            start, end, pos = ranges[index]
+            if pos > end: return
+            req_headers = dict(headers or {})
+            for attempt in range(self.retries):
+                req_headers['Range'] = f"bytes={pos}-{end}"
+                try:
+                    r = self._session().get(url, params=params, headers=req_headers, cookies=cookies,
+                                            stream=True, timeout=self.timeout)
+                    with r:
+                        if r.status_code != 206:
+                            raise OSError(f"Range request returned HTTP {r.status_code}")
+                        with open(part_path, 'r+b') as f:
+                            f.seek(pos)
+                            for chunk in r.iter_content(self.chunk_size):
+                                if chunk:
+                                    f.write(chunk[:end + 1 - pos])
+                                    pos += len(chunk)
+                                    if pos > end: break
+                    if pos > end: return
+                except (requests.RequestException, OSError) as e:
+                    print(f"   ⚠️ Range {start}-{end} attempt {attempt+1}: {e}")
+                    time.sleep(self.retry_delay * (attempt + 1))
+                finally:
+                    # Written bytes only (the file is closed): a later attempt resumes here
+                    with map_lock:
+                        ranges[index][2] = min(pos, end + 1)
+                        self._save_ranges(part_path, total, ranges)
+            raise OSError(f"Range {start}-{end} failed")
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(ranges)) as pool:
+            for fut in [pool.submit(fetch_range, i) for i in range(len(ranges))]:
+                fut.result()
+
+        # Ranges land out of order, so hash in one sequential pass (hot in page cache)
+        h = hashlib.sha256()
+        self._hash_file(part_path, h)
+        os.replace(part_path, dest)
+        os.remove(part_path + RANGES_SUFFIX)
+        return h.hexdigest()
+
+    def _hash_file(self, path, h):
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(self.chunk_size), b''):
+                h.update(chunk)
+
+    @staticmethod
+    def _total_size(response, offset):
+        """Full file size from Content-Range / Content-Length (None if unknown)."""
+        content_range = response.headers.get('Content-Range', '')
+        match = re.search(r'/(\d+)$', content_range)
+        if match: return int(match.group(1))
+        length = response.headers.get('Content-Length')
+        return int(length) + offset if length and length.isdigit() else None
+
+
+_DEFAULT_MANAGER = None
+_DEFAULT_LOCK = threading.Lock()
+
+def get_download_manager(**kwargs):
+    """Process-wide DownloadManager (sessions are pooled across calls)."""
+    global _DEFAULT_MANAGER
+    with _DEFAULT_LOCK:
+        if _DEFAULT_MANAGER is None:
+            _DEFAULT_MANAGER = DownloadManager(**kwargs)
+    return _DEFAULT_MANAGER
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+File: job_workspace.py
+Per-job isolated directory for one generate_short() call.
+Holds the job's temp files, its own Remotion public/ folder (scenario JSON +
+generated assets, static assets linked from the engine) and the output
+manifest that render4.sh reads. Two jobs never touch the same file.
+prune_workspaces() deletes rendered and expired workspaces.
+"""
+
+import os
+import json
+import uuid
+import shutil
+import time
+import datetime
+
+from synthesis_result import VoiceJobUsage
+
+# Files the Remotion engines read from public/ that are generated per job
+SCENARIO_FILENAME = "scenario_data.json"
+MANIFEST_FILENAME = "manifest.json"
+RENDERED_MARKER = ".rendered"  # Dropped by render4.sh once the short is copied out
+
+
+class JobWorkspace:
+    """
+    Layout:
+        <jobs_root>/<job_id>/
+            temp/                   voice tracks, chunks, concat lists...
+            public/                 pass to Remotion via --public-dir
+                scenario_data.json
+                assets/             generated files + links to static assets
+            manifest.json           output filename, template, public dir...
+    """
+
+    def __init__(self, job_name, engine_dir=None, jobs_root='jobs'):
+        """
+        Args:
+            job_name: Human readable prefix (usually the output file's basename)
+            engine_dir: Remotion project (e.g., 'visual_engine_fact') whose static
+                        public/ assets get linked in; None for no linking
+            jobs_root: Parent directory of all job workspaces
+        """
+        self.job_id = f"{job_name}_{uuid.uuid4().hex[:6]}"
+        self.engine_dir = engine_dir
+        self.root = os.path.join(jobs_root, self.job_id)
+        self.temp_dir = os.path.join(self.root, "temp")
+        self.public_dir = os.path.join(self.root, "public")
+        self.assets_dir = os.path.join(self.public_dir, "assets")
+        self.scenario_path = os.path.join(self.public_dir, SCENARIO_FILENAME)
+        self.manifest_path = os.path.join(self.root, MANIFEST_FILENAME)
+
+        os.makedirs(self.temp_dir, exist_ok=True)
+        os.makedirs(self.assets_dir, exist_ok=True)
+
+        # This job's TTS results (pass as usage= to VoiceManager calls)
+        self.voice_usage = VoiceJobUsage()
+
+        if engine_dir:
+            self._link_static_assets(os.path.join(engine_dir, "public"))
+
+    def _link(self, src, dst):
+        """Symlink src -> dst (copy if the filesystem refuses symlinks)."""
+        if os.path.lexists(dst): return
+        try:
+            os.symlink(os.path.abspath(src), dst)
+        except OSError:
+            if os.path.isdir(src): shutil.copytree(src, dst)
+            else: shutil.copy2(src, dst)
+
+    def _link_static_assets(self, engine_public):
+        """Mirrors the engine's public/ (fonts, logo, env maps...) into this job."""
+        if not os.path.isdir(engine_public): return
+
+        for name in os.listdir(engine_public):
+            if name in (SCENARIO_FILENAME, "assets"): continue
+            self._link(os.path.join(engine_public, name), os.path.join(self.public_dir, name))
+
+        engine_assets = os.path.join(engine_public, "assets")
+        if os.path.isdir(engine_assets):
+            for name in os.listdir(engine_assets):
+                self._link(os.path.join(engine_assets, name), os.path.join(self.assets_dir, name))
+
+    def temp_path(self, filename):
+        """Path for an intermediate file private to this job."""
+        return os.path.join(self.temp_dir, filename)
+
+    def asset_path(self, filename):
+        """
+        Path for a generated asset under public/assets.
+        Drops any static link with the same name first, so writing never
+        goes through the link into the shared engine folder.
+        """
+        path = os.path.join(self.assets_dir, filename)
+        if os.path.islink(path): os.remove(path)
+        return path
+
+    def write_scenario(self, data, indent=2, ensure_ascii=True):
+        """Writes the scenario JSON the Remotion composition fetches."""
+        with open(self.scenario_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=indent, ensure_ascii=ensure_ascii)
+        return self.scenario_path
+
+    def write_manifest(self, **fields):
+        """
+        Writes manifest.json (replaces the old global vid_out_filename.txt).
+        Typical fields: output_filename, template, duration.
+        """
+        manifest = {
+            "job_id": self.job_id,
+            "engine_dir": self.engine_dir,
+            "public_dir": os.path.abspath(self.public_dir),
+            "scenario_path": os.path.abspath(self.scenario_path),
+            "created_at": datetime.datetime.now().isoformat(),
+        }
+        manifest.update(fields)
+        with open(self.manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        return self.manifest_path
+
+    def cleanup_temp(self):
+        """Deletes intermediate files; public/ and the manifest stay for rendering."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+
+def prune_workspaces(jobs_root='jobs', max_age_hours=48):
+    """
+    Deletes job workspaces that were rendered (RENDERED_MARKER present) or
+    were last touched more than max_age_hours ago (failed / never rendered).
+
+    Args:
+        jobs_root: Parent directory of all job workspaces
+        max_age_hours: Retention for unrendered workspaces (None keeps them)
+
+    Returns:
+        int: Workspaces removed
+    """
+    if not os.path.isdir(jobs_root): return 0
+    cutoff = time.time() - max_age_hours * 3600 if max_age_hours is not None else None
+    removed = 0
+    for name in os.listdir(jobs_root):
+        root = os.path.join(jobs_root, name)
+        if not os.path.isdir(root) or os.path.islink(root): continue
+        try:
+            rendered = os.path.exists(os.path.join(root, RENDERED_MARKER))
+            touched = max(os.path.getmtime(os.path.join(root, entry)) for entry in ['.'] + os.listdir(root))
+        except OSError:
+            continue  # Vanished mid-scan
+        if rendered or (cutoff is not None and touched < cutoff):
+            shutil.rmtree(root, ignore_errors=True)
+            removed += 1
+    return removed
@@ -2,11 +2,13 @@
 """
 File: karaoke_manager.py
 V2: SMOOTH FLOW EDITION
-Generates ONE continuous audio file first, then calculates text timing.
+Generates ONE continuous audio file first, then takes text timing from the
+voice provider's word timing table (clip.words).
 """
 
 import os
 from moviepy.editor import AudioFileClip
+from word_timings import group_words
 
 class KaraokeManager:
     def __init__(self, voice_manager, temp_dir="temp"):
@@ -37,7 +39,7 @@ class KaraokeManager:
     def generate_timed_audio(self, full_text, unique_id, voice_key=None):
         """
         1. Generates ONE continuous audio file (Natural Prosody).
-        2. Estimates subtitle timings based on character count.
+        2. Groups the provider's word timings into subtitle chunks.
         
         Args:
             full_text: Complete text to synthesize
@@ -53,12 +55,15 @@ class KaraokeManager:
         else:
             full_audio_clip = self.vm.generate_audio_sync(full_text, path)
         
-        total_duration = full_audio_clip.duration
+        # 2. Subtitle chunks straight from the word timing table
+        words = getattr(full_audio_clip, 'words', None)
+        if words:
+            return full_audio_clip, group_words(words)
         
-        # 2. Split text for subtitles
+        # 3. No table (clip from another source): fall back to "Character Density"
+        total_duration = full_audio_clip.duration
         chunks = self._smart_split(full_text)
         
-        # 3. Calculate Timings based on "Character Density"
         # (Longer words take longer to say)
         total_chars = len(full_text.replace(" ", "")) # Count chars ignoring spaces
         if total_chars == 0: total_chars = 1 # Avoid div/0
@@ -70,7 +75,6 @@ class KaraokeManager:
             chunk_chars = len(chunk.replace(" ", ""))
             
             # Math: (Chunk Chars / Total Chars) * Total Duration
-            # We add a tiny buffer (0.1s) to make it feel snappier
             estimated_duration = (chunk_chars / total_chars) * total_duration
             
             segments.append({
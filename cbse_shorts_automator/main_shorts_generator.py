@@ -5,18 +5,18 @@ Main orchestrator for generating YouTube Shorts from Google Sheets
 Updated: 
 - Writes Metadata (Filename, Template, Duration) to Columns AR, AS, AT.
 - Batch processing ready.
+- Rows run through a stage pipeline (download -> script -> voice -> video -> export) so several are in flight at once.
 """
 
 import imagemagick_setup
 import os
 import sys
 import json
-import time
 import re
-import requests
 import fitz
 import random
 import gc 
+import threading
 
 #from google.auth.transport.requests import Request
 import google.auth.transport.requests
@@ -28,6 +28,11 @@ import google.generativeai as genai
 from shorts_engine import ShortsEngine, generate_random_config
 from voice_manager import VoiceManager
 from prompt_manager import PromptManager  # <--- NEW IMPORT
+from batch_pipeline import BatchPipeline, PipelineStage
+from asset_cache import AssetCache
+from download_manager import get_download_manager
+from job_workspace import prune_workspaces
+from speech_transcriber import get_speech_transcriber
 
 CONFIG_FILE = "config/generator_config.json"
 
@@ -153,14 +158,24 @@ class GeminiManager:
         self.keys = [line.strip() for line in open(CONFIG['GEMINI_KEYS_FILE']) if line.strip()]
         self.idx = 0
         self.prompter = PromptManager() # Initialize Prompter
-        self._configure()
+        self._key_lock = threading.Lock() # Script stage runs several workers
+        with self._key_lock:
+            self._configure()
 
     def _configure(self):
+        """Activates keys[idx] (genai is process-global: call with _key_lock held)."""
         if self.idx < len(self.keys):
             genai.configure(api_key=self.keys[self.idx])
         else:
             raise Exception("All Gemini keys exhausted")
 
+    def _rotate(self, failed_key):
+        """Moves past failed_key unless another worker already rotated away from it."""
+        with self._key_lock:
+            if self.idx < len(self.keys) and self.keys[self.idx] == failed_key:
+                self.idx += 1
+            self._configure()
+
     def get_script(self, pdf_text, class_level=None, template='quiz'):
         prompt = self.prompter.create_prompt(pdf_text, class_level, template)
 
@@ -179,6 +194,8 @@ class GeminiManager:
         models = ['gemini-3-flash-preview', 'gemini-2.5-flash', 'gemini-2.5-flash-lite']
         
         for m in models:
+            with self._key_lock:
+                active_key = self.keys[self.idx] if self.idx < len(self.keys) else None
             try:
                 model = genai.GenerativeModel(m)
                 res = model.generate_content(prompt, generation_config=gen_config, safety_settings=safety_settings)
@@ -198,8 +215,7 @@ class GeminiManager:
             except Exception as e:
                 print(f"⚠️ Gemini error with {m}: {e}")
                 if "429" in str(e) or "quota" in str(e).lower():
-                    self.idx += 1
-                    self._configure()
+                    self._rotate(active_key)
         
         raise Exception("Gemini generation failed")
 
@@ -232,10 +248,18 @@ def format_column_n(value):
     except:
         return '0000'
 
+# Names handed out in this run (renders land later, so disk alone can't dedupe)
+_RESERVED_OUTPUTS = set()
+_RESERVED_LOCK = threading.Lock()
+
 def find_next_version(output_dir, base_filename):
-    version = 1
-    while os.path.exists(os.path.join(output_dir, f"{base_filename}_V{version}.mp4")):
-        version += 1
+    with _RESERVED_LOCK:
+        version = 1
+        while True:
+            path = os.path.join(output_dir, f"{base_filename}_V{version}.mp4")
+            if not os.path.exists(path) and path not in _RESERVED_OUTPUTS: break
+            version += 1
+        _RESERVED_OUTPUTS.add(path)
     return version
 
 def generate_output_filename(chapter_title, template_type, script, col_n_value, output_dir):
@@ -256,143 +280,241 @@ def generate_output_filename(chapter_title, template_type, script, col_n_value,
     version = find_next_version(output_dir, base)
     return f"{base}_V{version}.mp4"
 
+def get_downloader():
+    """Shared streaming downloader (pooled sessions, resume, parallel ranges)."""
+    dl_cfg = CONFIG.get('DOWNLOADS', {})
+    return get_download_manager(
+        retries=CONFIG.get('API_RETRY_ATTEMPTS', 3),
+        parallel_parts=dl_cfg.get('PARALLEL_PARTS', 4),
+        parallel_threshold=dl_cfg.get('PARALLEL_THRESHOLD_MB', 64) * 1024 * 1024
+    )
+
 def download_file(url, save_path):
-    headers = {'User-Agent': 'Mozilla/5.0'}
-    retries = CONFIG.get('API_RETRY_ATTEMPTS', 3)
-    for attempt in range(retries):
-        try:
-            if attempt > 0:
-                print(f"   ⏳ Retry {attempt+1}/{retries} for PDF...")
-                time.sleep(2)
-            r = requests.get(url, headers=headers, timeout=20)
-            if r.status_code == 200:
-                with open(save_path, 'wb') as f: f.write(r.content)
-                return True
-        except Exception as e:
-            print(f"   ❌ PDF Error: {e}")
-    return False
+    """Returns the file's SHA-256 (truthy) on success, False on failure."""
+    return get_downloader().fetch(url, save_path) or False
 
-def download_drive_video(url, output_path):
-    try:
-        print(f"⬇️ Downloading Video...")
-        patterns = [r'/d/([a-zA-Z0-9_-]+)', r'id=([a-zA-Z0-9_-]+)']
-        file_id = None
-        for p in patterns:
-            match = re.search(p, url)
-            if match:
-                file_id = match.group(1)
-                break
-        if not file_id: return False
-
-        DL_URL = "https://drive.google.com/uc?export=download"
-        session = requests.Session()
-        response = session.get(DL_URL, params={'id': file_id}, stream=True)
-        token = None
-        for key, value in response.cookies.items():
-            if key.startswith('download_warning'):
-                token = value
-                break
-        if token:
-            response = session.get(DL_URL, params={'id': file_id, 'confirm': token}, stream=True)
-        if response.status_code == 200:
-            with open(output_path, "wb") as f:
-                for chunk in response.iter_content(32768):
-                    if chunk: f.write(chunk)
-            return True
-        return False
-    except Exception: return False
+def extract_drive_file_id(url):
+    patterns = [r'/d/([a-zA-Z0-9_-]+)', r'id=([a-zA-Z0-9_-]+)']
+    for p in patterns:
+        match = re.search(p, url or "")
+        if match: return match.group(1)
+    return None
 
-def process_row(engine, gemini, row, row_idx):
+def download_drive_video(url, output_path):
+    """Returns the file's SHA-256 (truthy) on success, False on failure."""
+    print(f"⬇️ Downloading Video...")
+    file_id = extract_drive_file_id(url)
+    if not file_id: return False
+    return get_downloader().fetch_drive(file_id, output_path) or False
+
+_ASSET_CACHE = None
+_ASSET_CACHE_LOCK = threading.Lock()
+
+def get_asset_cache():
+    """Shared download cache (None when disabled in config)."""
+    global _ASSET_CACHE
+    cache_cfg = CONFIG.get('ASSET_CACHE', {})
+    if not cache_cfg.get('ENABLED', True): return None
+    with _ASSET_CACHE_LOCK:
+        if _ASSET_CACHE is None:
+            max_gb = cache_cfg.get('MAX_GB')
+            _ASSET_CACHE = AssetCache(
+                cache_cfg.get('DIR', 'cache/assets'),
+                max_bytes=int(max_gb * 1024**3) if max_gb else None
+            )
+    return _ASSET_CACHE
+
+def build_row_job(row, row_idx):
+    """Extracts the columns one row needs into a job dict for the pipeline."""
     def get_c(i): return row[i].strip() if len(row) > i else ""
-    
+
     vid_id = get_c(COL_IDX_ID)
-    chapter_title = get_c(COL_IDX_CHAPTER)
-    video_title = get_c(COL_IDX_TOPIC)
-    pdf_url = get_c(COL_IDX_PDF)
-    vid_url = get_c(COL_IDX_VIDEO)
-    
-    if not vid_id: return False, {"status": "Skipped: Column N empty"}
-    
-    class_str = get_c(COL_IDX_CLASS)
-    class_level = parse_class_level(class_str)
-    
-    print(f"\n🎬 Processing Row {row_idx} [ID: {vid_id}]...")
-    
-    temp_pdf = os.path.join(DIRS['DOWNLOADS_PDF'], f"t_{vid_id}.pdf")
-    temp_vid = os.path.join(DIRS['DOWNLOADS_VID'], f"t_{vid_id}.mp4")
+    return {
+        'row_idx': row_idx,
+        'vid_id': vid_id,
+        'chapter_title': get_c(COL_IDX_CHAPTER),
+        'video_title': get_c(COL_IDX_TOPIC),
+        'pdf_url': get_c(COL_IDX_PDF),
+        'vid_url': get_c(COL_IDX_VIDEO),
+        'class_level': parse_class_level(get_c(COL_IDX_CLASS)),
+        'temp_pdf': os.path.join(DIRS['DOWNLOADS_PDF'], f"t_{vid_id}.pdf"),
+        'temp_vid': os.path.join(DIRS['DOWNLOADS_VID'], f"t_{vid_id}.mp4"),
+    }
+
+# --- PIPELINE STAGES (each mutates the job dict, raises on failure) ---
+
+def stage_download(job):
+    """Stage 1 (network): chapter PDF + text extraction + lecture video."""
+    if not job['vid_id']: raise Exception("Skipped: Column N empty")
+    print(f"\n🎬 Processing Row {job['row_idx']} [ID: {job['vid_id']}]...")
+
+    cache = get_asset_cache()
+    if cache:
+        # Shared, content-addressed copies: each chapter PDF / lecture video is fetched once per batch
+        # Pinned until finish_row_job: other rows' downloads can't evict them mid-job
+        pdf_path = cache.fetch(f"url:{job['pdf_url']}", lambda dest: download_file(job['pdf_url'], dest), '.pdf',
+                               pin=True)
+        if not pdf_path: raise Exception("PDF download failed")
+        job['temp_pdf'], job['cached'] = pdf_path, True
+        job.setdefault('pinned', []).append(pdf_path)
+    elif not download_file(job['pdf_url'], job['temp_pdf']): raise Exception("PDF download failed")
+
+    doc = fitz.open(job['temp_pdf'])
+    pdf_text = "".join([page.get_text() for page in doc])
+    doc.close()
+    pdf_text = re.sub(r'\n+', '\n', pdf_text)
+
+    if len(pdf_text) < 50: raise Exception("PDF empty")
+    job['pdf_text'] = pdf_text
+
+    if cache:
+        file_id = extract_drive_file_id(job['vid_url'])
+        if not file_id: raise Exception("Video download failed")
+        vid_path = cache.fetch(f"drive:{file_id}", lambda dest: download_drive_video(job['vid_url'], dest), '.mp4',
+                               pin=True)
+        if not vid_path: raise Exception("Video download failed")
+        job['temp_vid'] = vid_path
+        job['pinned'].append(vid_path)
+    elif not download_drive_video(job['vid_url'], job['temp_vid']): raise Exception("Video download failed")
+
+def stage_script(job, gemini):
+    """Stage 2 (network): template selection + Gemini script + output filename."""
+    gen_config = generate_random_config(class_level=job['class_level'])
+    print(f"   🎨 Row {job['row_idx']} Template: {gen_config['template'].upper()}")
+
+    print(f"🤖 Generating AI script (Row {job['row_idx']})...")
+    script = gemini.get_script(
+        job['pdf_text'],
+        class_level=job['class_level'],
+        template=gen_config['template']
+    )
 
-    try:
-        if not download_file(pdf_url, temp_pdf): raise Exception("PDF download failed")
-        
-        doc = fitz.open(temp_pdf)
-        pdf_text = "".join([page.get_text() for page in doc])
-        pdf_text = re.sub(r'\n+', '\n', pdf_text)
-        
-        if len(pdf_text) < 50: raise Exception("PDF empty")
-        
-        if not download_drive_video(vid_url, temp_vid): raise Exception("Video download failed")
-        
-        gen_config = generate_random_config(class_level=class_level)
-        print(f"   🎨 Template: {gen_config['template'].upper()}")
-
-        print("🤖 Generating AI script...")
-        script = gemini.get_script(
-            pdf_text, 
-            class_level=class_level,
-            template=gen_config['template']
-        )
-        
-        # Preview
-        if gen_config['template'] == 'quiz': preview = script.get('question_text', '')
-        elif gen_config['template'] == 'fact': preview = script.get('fact_title', '')
-        else: preview = script.get('tip_title', '')
-        print(f"   ✅ Script: {preview[:50]}...")
-        
-        output_filename = generate_output_filename(
-            chapter_title, gen_config['template'], script, vid_id, DIRS['SHORTS_OUT']
-        )
-        output_path = os.path.join(DIRS['SHORTS_OUT'], output_filename)
-        
-        result = engine.generate_short(
-            video_path=temp_vid,
-            pdf_path=temp_pdf,
-            script=script,
-            config=gen_config,
-            output_path=output_path,
-            class_level=class_level
-        )
+    # Preview
+    if gen_config['template'] == 'quiz': preview = script.get('question_text', '')
+    elif gen_config['template'] == 'fact': preview = script.get('fact_title', '')
+    else: preview = script.get('tip_title', '')
+    print(f"   ✅ Script: {preview[:50]}...")
 
-        if result['success']:
-            print(f"✅ Created: {output_filename}")
-            # Get voice system used
-            voice_system_used = engine.voice_manager.last_used_system or "Unknown"
-            
-            # Return full metadata for Sheet update
-            meta_data = {
-                "status": CONFIG['STATUS_SUCCESS'],
-                "filename": output_filename,
-                "template": gen_config['template'],
-                "duration": int(result.get('duration', 0)),
-                "voice_system": voice_system_used  # ADD THIS LINE
-            }
-            return True, meta_data
-        else:
-            raise Exception(result.get('error', 'Unknown error'))
+    output_filename = generate_output_filename(
+        job['chapter_title'], gen_config['template'], script, job['vid_id'], DIRS['SHORTS_OUT']
+    )
+    job['gen_config'] = gen_config
+    job['script'] = script
+    job['output_filename'] = output_filename
+    job['output_path'] = os.path.join(DIRS['SHORTS_OUT'], output_filename)
+
+def stage_voice(job, engine):
+    """Stage 3 (TTS): job workspace, voice tracks and timeline."""
+    job['short'] = engine.start_short(
+        video_path=job['temp_vid'],
+        script=job['script'],
+        config=job['gen_config'],
+        output_path=job['output_path']
+    )
+    engine.synthesize_short(job['short'])
+
+def stage_video(job, engine):
+    """Stage 4 (CPU / ffmpeg): transcription, clip scheduling and the source video asset."""
+    engine.prepare_short_video(job['short'])
+
+def stage_export(job, engine):
+    """Stage 5: master audio, scenario JSON and manifest."""
+    engine.export_short(job['short'])
+    result = engine.finish_short(job['short'])
+
+    print(f"✅ Created: {job['output_filename']}")
+    print(f"   📂 Job dir: {os.path.abspath(result['job_dir'])}")
+    # Voice system(s) of THIS job (the shared VoiceManager serves parallel jobs)
+    voice_system_used = result.get('voice_system') or "Unknown"
+
+    # Full metadata for Sheet update
+    job['meta'] = {
+        "status": CONFIG['STATUS_SUCCESS'],
+        "filename": job['output_filename'],
+        "template": job['gen_config']['template'],
+        "duration": int(result.get('duration', 0)),
+        "voice_system": voice_system_used,
+        "job_dir": os.path.abspath(result['job_dir']),
+        "render_cmd": f"cd {engine.ENGINE_DIRS[job['gen_config']['template']]} && "
+                      f"bash render4.sh {os.path.abspath(result['job_dir'])}"
+    }
+
+def finish_row_job(job):
+    """Deletes the row's downloads and returns (success, meta_data) for the Sheet."""
+    # Cached downloads are shared with other rows; the cache evicts them itself once unpinned
+    if CONFIG.get('DELETE_TEMP_FILES', True) and not job.get('cached'):
+        for p in [job['temp_pdf'], job['temp_vid']]:
+            if os.path.exists(p): os.remove(p)
+    cache = get_asset_cache()
+    for p in job.pop('pinned', []):
+        if cache: cache.release(p)
+    # A row that failed mid-way never reached finish_short(): drop its temp files here
+    short = job.pop('short', None)
+    if short and job.get('error') and CONFIG.get('DELETE_TEMP_FILES', True):
+        short['workspace'].cleanup_temp()
+    gc.collect()
+
+    if job.get('error'):
+        if job['error'].startswith("Skipped"): return False, {"status": job['error']}
+        return False, {"status": f"{CONFIG['STATUS_FAILURE_PREFIX']} {job['error']}"}
+    return True, job['meta']
 
+def process_row(engine, gemini, row, row_idx):
+    """Runs one row through all stages sequentially (no pipelining)."""
+    job = build_row_job(row, row_idx)
+    try:
+        stage_download(job)
+        stage_script(job, gemini)
+        stage_voice(job, engine)
+        stage_video(job, engine)
+        stage_export(job, engine)
     except Exception as e:
         print(f"❌ Error: {e}")
-        return False, {"status": f"{CONFIG['STATUS_FAILURE_PREFIX']} {str(e)}"}
-    
-    finally:
-        if CONFIG.get('DELETE_TEMP_FILES', True):
-            for p in [temp_pdf, temp_vid]:
-                if os.path.exists(p): os.remove(p)
-        gc.collect()
+        job['error'] = str(e)
+    return finish_row_job(job)
+
+def update_sheet_row(sheets, row_number, success, meta_data):
+    """Writes status (and metadata on success) back to the Sheet."""
+    # 1. Update Status (Column AN / 39)
+    status_cell = f"{CONFIG['SHEET_NAME']}!{get_col_letter(COL_IDX_STATUS)}{row_number}"
+    sheets.spreadsheets().values().update(
+        spreadsheetId=CONFIG['SPREADSHEET_ID'], range=status_cell,
+        valueInputOption='USER_ENTERED', body={'values': [[meta_data['status']]]}
+    ).execute()
+
+    # 2. If Successful, Update Metadata Columns (AR, AS, AT, AX)
+    if success:
+        # Range AR:AT (43 to 45) - Filename, Template, Duration
+        start_col = get_col_letter(COL_IDX_FILENAME)
+        end_col = get_col_letter(COL_IDX_DURATION)
+        meta_range = f"{CONFIG['SHEET_NAME']}!{start_col}{row_number}:{end_col}{row_number}"
+
+        meta_values = [[
+            meta_data['filename'],
+            meta_data['template'],
+            meta_data['duration']
+        ]]
+
+        sheets.spreadsheets().values().update(
+            spreadsheetId=CONFIG['SPREADSHEET_ID'], range=meta_range,
+            valueInputOption='USER_ENTERED', body={'values': meta_values}
+        ).execute()
+
+        # 3. Update Voice System Used (Column AX / 49)
+        voice_cell = f"{CONFIG['SHEET_NAME']}!{get_col_letter(COL_IDX_VOICE)}{row_number}"
+        sheets.spreadsheets().values().update(
+            spreadsheetId=CONFIG['SPREADSHEET_ID'], range=voice_cell,
+            valueInputOption='USER_ENTERED', body={'values': [[meta_data['voice_system']]]}
+        ).execute()
 
 def main():
     for d in DIRS.values(): os.makedirs(d, exist_ok=True)
     os.makedirs("temp", exist_ok=True)
     
+    # Rendered / expired job workspaces from earlier batches
+    pruned = prune_workspaces(DIRS.get('JOBS', 'jobs'), CONFIG.get('JOB_RETENTION_HOURS', 48))
+    if pruned: print(f"🧹 Removed {pruned} old job workspace(s)")
+    
     print("🚀 Starting NCERT QuickPrep Shorts Generator")
     # --- CHANGED SECTION START ---
     # Use the new authenticate function
@@ -414,53 +536,54 @@ def main():
         spreadsheetId=CONFIG['SPREADSHEET_ID'], range=range_n
     ).execute().get('values', [])
     
-    processed = 0
+    # Select rows first so MAX_ROWS_TO_PROCESS is respected up front
+    jobs = []
     for i, row in enumerate(rows):
         if i == 0: continue
-        if processed >= CONFIG['MAX_ROWS_TO_PROCESS']: break
+        if len(jobs) >= CONFIG['MAX_ROWS_TO_PROCESS']: break
         
         def val(idx): return row[idx].strip() if len(row) > idx else ""
         
         if val(COL_IDX_STATUS).lower() != CONFIG['STATUS_TO_PROCESS'].lower(): continue
         if not val(COL_IDX_FILTER) or not val(COL_IDX_ID) or not val(COL_IDX_VIDEO): continue
         
-        success, meta_data = process_row(engine, gemini, row, i+1)
-        
-        # 1. Update Status (Column AN / 39)
-        status_cell = f"{CONFIG['SHEET_NAME']}!{get_col_letter(COL_IDX_STATUS)}{i+1}"
-        sheets.spreadsheets().values().update(
-            spreadsheetId=CONFIG['SPREADSHEET_ID'], range=status_cell,
-            valueInputOption='USER_ENTERED', body={'values': [[meta_data['status']]]}
-        ).execute()
-        
-       # 2. If Successful, Update Metadata Columns (AR, AS, AT, AX)
-        if success:
-            # Range AR:AT (43 to 45) - Filename, Template, Duration
-            start_col = get_col_letter(COL_IDX_FILENAME)
-            end_col = get_col_letter(COL_IDX_DURATION)
-            meta_range = f"{CONFIG['SHEET_NAME']}!{start_col}{i+1}:{end_col}{i+1}"
-            
-            meta_values = [[
-                meta_data['filename'],
-                meta_data['template'],
-                meta_data['duration']
-            ]]
-            
-            sheets.spreadsheets().values().update(
-                spreadsheetId=CONFIG['SPREADSHEET_ID'], range=meta_range,
-                valueInputOption='USER_ENTERED', body={'values': meta_values}
-            ).execute()
-            
-            # 3. Update Voice System Used (Column AX / 49)
-            voice_cell = f"{CONFIG['SHEET_NAME']}!{get_col_letter(COL_IDX_VOICE)}{i+1}"
-            sheets.spreadsheets().values().update(
-                spreadsheetId=CONFIG['SPREADSHEET_ID'], range=voice_cell,
-                valueInputOption='USER_ENTERED', body={'values': [[meta_data['voice_system']]]}
-            ).execute()
-        
-        processed += 1
+        jobs.append(build_row_job(row, i+1))
+    
+    # Stage-pipelined execution: several rows in flight at once
+    pipe_cfg = CONFIG.get('PIPELINE', {})
+    queue_size = pipe_cfg.get('QUEUE_SIZE', 2)
+    pipeline = BatchPipeline([
+        PipelineStage('download', stage_download,
+                      workers=pipe_cfg.get('DOWNLOAD_WORKERS', 2), queue_size=queue_size),
+        PipelineStage('script', lambda job: stage_script(job, gemini),
+                      workers=pipe_cfg.get('SCRIPT_WORKERS', 2), queue_size=queue_size),
+        PipelineStage('voice', lambda job: stage_voice(job, engine),
+                      workers=pipe_cfg.get('VOICE_WORKERS', 2), queue_size=queue_size),
+        PipelineStage('video', lambda job: stage_video(job, engine),
+                      workers=pipe_cfg.get('VIDEO_WORKERS', 2), queue_size=queue_size),
+        PipelineStage('export', lambda job: stage_export(job, engine),
+                      workers=pipe_cfg.get('EXPORT_WORKERS', 1), queue_size=queue_size),
+    ])
+    
+    processed = 0
+    ready = []  # (row, render command) for every exported short
+    try:
+        for job in pipeline.run(jobs):
+            success, meta_data = finish_row_job(job)
+            # Sheets client is not thread-safe: all writes happen here on the main thread
+            update_sheet_row(sheets, job['row_idx'], success, meta_data)
+            if success: ready.append((job['row_idx'], meta_data['render_cmd']))
+            processed += 1
+    finally:
+        # Whisper worker processes (one model each) are not needed past the batch
+        get_speech_transcriber().shutdown()
     
+    pipeline.print_stats()
     print(f"\n✨ Processed {processed} videos!")
+    if ready:
+        print("🎬 Ready to render (JOB_DIR = the job's workspace with manifest.json):")
+        for row_idx, render_cmd in ready:
+            print(f"   Row {row_idx}: {render_cmd}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+File: music_library.py
+Index of the background music folder (config/music/<mood>/*.mp3).
+Each track is analysed once - one ffmpeg pass decodes it to a raw 16-bit
+PCM stem and measures its integrated loudness (EBU R128) - and the results
+are kept in <cache_dir>/index.json, refreshed when files are added, removed
+or modified.
+
+Preparing a video's music bed is then slice-and-gain: the stem is
+memory-mapped, the needed stretch is read from its loop region (leading /
+trailing silence excluded), looped with a short crossfade if the video is
+longer than the track, and the gain brings every track to the same
+loudness.
+"""
+
+import os
+import re
+import glob
+import json
+import random
+import hashlib
+import threading
+import subprocess
+import concurrent.futures
+
+import numpy as np
+
+from audio_mixer import SAMPLE_RATE, CHANNELS
+
+INDEX_VERSION = 1
+TARGET_LUFS = -28.0        # Music bed loudness (≈ the old peak-normalize x 0.12 on typical tracks)
+MAX_PEAK_DB = -6.0         # Gain never pushes a track's peak above this
+SILENCE_DB = -40.0         # Loop region: windows quieter than peak + this are silence
+LOOP_WINDOW = 0.05         # Seconds per loudness window when finding the loop region
+LOOP_CROSSFADE = 0.05      # Seconds of crossfade where a loop wraps around
+
+LOUDNESS_RE = re.compile(r"I:\s+(-?[\d.]+|-inf) LUFS")
+
+
+def analyse_track(path, stem_path, sample_rate=SAMPLE_RATE, channels=CHANNELS):
+    """
+    Decodes a track to a raw s16le stem and measures it, in one ffmpeg call.
+
+    Returns:
+        dict: {'duration', 'lufs', 'peak_db', 'loop_start', 'loop_end'} (seconds / dB)
+
+    Raises:
+        RuntimeError: ffmpeg failed
+    """
+    tmp_path = f"{stem_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    cmd = [
+        'ffmpeg', '-y', '-nostdin', '-hide_banner', '-nostats', '-i', path,
+        '-filter_complex',
+        f"[0:a]aresample={sample_rate},aformat=sample_fmts=s16:channel_layouts="
+        f"{'stereo' if channels == 2 else 'mono'},asplit[pcm][meter];[meter]ebur128[out]",
+        '-map', '[pcm]', '-f', 's16le', tmp_path,
+        '-map', '[out]', '-f', 'null', '-'
+    ]
+    proc = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    log = proc.stderr.decode(errors='ignore')
+    if proc.returncode != 0:
+        if os.path.exists(tmp_path): os.remove(tmp_path)
+        raise RuntimeError(f"Music analysis failed ({os.path.basename(path)}): {log[-300:]}")
+    os.replace(tmp_path, stem_path)
+
+    pcm = np.memmap(stem_path, dtype='<i2', mode='r').reshape(-1, channels)
+    match = LOUDNESS_RE.findall(log)
+    lufs = float(match[-1]) if match and match[-1] != '-inf' else None
+    peak = int(np.abs(pcm).max()) if len(pcm) else 0
+    peak_db = 20 * np.log10(peak / 32768.0) if peak else None
+
+    # Loop region: first to last window louder than the silence threshold
+    window = max(1, int(LOOP_WINDOW * sample_rate))
+    usable = len(pcm) // window * window
+    loop_start, loop_end = 0, len(pcm)
+    if usable and peak:
+        frames = pcm[:usable].astype(np.float32).reshape(-1, window * channels)
+        rms = np.sqrt(np.mean(frames ** 2, axis=1))
+        loud = np.nonzero(rms > peak * 10 ** (SILENCE_DB / 20))[0]
+        if len(loud):
+            loop_start = int(loud[0]) * window
+            loop_end = min(len(pcm), (int(loud[-1]) + 1) * window)
+
+    return {
+        'duration': round(len(pcm) / sample_rate, 3),
+        'lufs': lufs,
+        'peak_db': round(peak_db, 2) if peak_db is not None else None,
+        'loop_start': round(loop_start / sample_rate, 3),
+        'loop_end': round(loop_end / sample_rate, 3),
+    }
+
+
+class MusicLibrary:
+    """
+    Usage:
+        library = MusicLibrary('config/music', cache_dir='cache/music')
+        track = library.pick('energetic')           # index entry (random track of the mood)
+        bed = library.stem(track, duration=42.0)    # float32 (frames, channels)
+        mixer.add(bed, gain=library.gain(track))
+    """
+
+    def __init__(self, music_dir='config/music', cache_dir='cache/music', target_lufs=TARGET_LUFS,
+                 sample_rate=SAMPLE_RATE, channels=CHANNELS, workers=4):
+        """
+        Args:
+            music_dir: Root folder (mood subfolders + loose tracks)
+            cache_dir: Index + decoded stems
+            target_lufs: Loudness every track is brought to by gain()
+            sample_rate, channels: Stem format (match the AudioMixer)
+            workers: Tracks analysed in parallel
+        """
+        self.music_dir = music_dir
+        self.cache_dir = cache_dir
+        self.target_lufs = target_lufs
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.workers = workers
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self.tracks = {}        # relative path -> entry
+        self._dir_mtimes = None  # Folder mtimes at the last refresh
+        self._lock = threading.Lock()
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load_index()
+
+    # ------------------------------------------------------------------
+    # Index
+    # ------------------------------------------------------------------
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if (data.get('version'), data.get('sample_rate'), data.get('channels')) == \
+                (INDEX_VERSION, self.sample_rate, self.channels):
+            self.tracks = data.get('tracks', {})
+
+    def _save_index(self):
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'version': INDEX_VERSION, 'sample_rate': self.sample_rate,
+                       'channels': self.channels, 'tracks': self.tracks}, f, indent=2)
+        os.replace(tmp_path, self.index_path)
+
+    def _scan(self):
+        """{relative path: (size, mtime)} of every .mp3 under music_dir (one level of moods)."""
+        found = {}
+        for path in glob.glob(os.path.join(self.music_dir, "*.mp3")) + \
+                glob.glob(os.path.join(self.music_dir, "*", "*.mp3")):
+            st = os.stat(path)
+            found[os.path.relpath(path, self.music_dir)] = (st.st_size, st.st_mtime)
+        return found
+
+    def _folder_mtimes(self):
+        dirs = [self.music_dir] + glob.glob(os.path.join(self.music_dir, "*", ""))
+        return {d: os.stat(d).st_mtime for d in dirs if os.path.isdir(d)}
+
+    def _stem_path(self, rel):
+        digest = hashlib.sha1(rel.encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"{digest}.s16")
+
+    def refresh(self):
+        """
+        Re-analyses new or modified tracks and forgets deleted ones.
+
+        Returns:
+            int: Tracks analysed
+        """
+        with self._lock:
+            found = self._scan()
+            todo = [rel for rel, (size, mtime) in found.items()
+                    if rel not in self.tracks or (self.tracks[rel].get('size'), self.tracks[rel].get('mtime'))
+                    != (size, mtime) or not os.path.exists(self._stem_path(rel))]
+            removed = [rel for rel in self.tracks if rel not in found]
+
+            def analyse(rel):
+                try:
+                    return analyse_track(os.path.join(self.music_dir, rel), self._stem_path(rel),
+                                         self.sample_rate, self.channels)
+                except Exception as e:
+                    print(f"⚠️ Music index: skipping {rel} ({e})")
+                    return None
+
+            if todo: print(f"🎵 Indexing {len(todo)} music track(s)...")
+            with concurrent.futures.ThreadPoolExecutor(max_workers=self.workers) as pool:
+                for rel, info in zip(todo, pool.map(analyse, todo)):
+                    if info is None:
+                        self.tracks.pop(rel, None)
+                        continue
+                    size, mtime = found[rel]
+                    mood = os.path.dirname(rel) or None
+                    self.tracks[rel] = {'path': rel, 'mood': mood, 'size': size, 'mtime': mtime,
+                                        'stem': os.path.basename(self._stem_path(rel)), **info}
+
+            for rel in removed:
+                stem = self._stem_path(rel)
+                if os.path.exists(stem): os.remove(stem)
+                del self.tracks[rel]
+
+            if todo or removed: self._save_index()
+            self._dir_mtimes = self._folder_mtimes()
+            return len(todo)
+
+    def _ensure_fresh(self):
+        """Full refresh on first use, then only when a music folder changed."""
+        if self._dir_mtimes is None or self._folder_mtimes() != self._dir_mtimes:
+            self.refresh()
+
+    # ------------------------------------------------------------------
+    # Selection / preparation
+    # ------------------------------------------------------------------
+
+    def pick(self, mood=None):
+        """
+        Random indexed track of the mood (any track if the mood has none).
+
+        Returns:
+            dict or None: Index entry
+        """
+        self._ensure_fresh()
+        with self._lock:
+            entries = list(self.tracks.values())
+        candidates = [e for e in entries if e['mood'] == mood] or entries
+        return random.choice(candidates) if candidates else None
+
+    def gain(self, track):
+        """Linear gain bringing the track to target_lufs (peak capped at MAX_PEAK_DB)."""
+        gain_db = self.target_lufs - track['lufs'] if track.get('lufs') is not None else 0.0
+        if track.get('peak_db') is not None:
+            gain_db = min(gain_db, MAX_PEAK_DB - track['peak_db'])
+        return 10 ** (gain_db / 20)
+
+    def stem(self, track, duration):
+        """
+        `duration` seconds of the track's loop region (looped with a crossfade
+        if needed), read from its memory-mapped stem.
+
+        Returns:
+            np.ndarray: float32 (frames, channels)
+        """
+        pcm = np.memmap(os.path.join(self.cache_dir, track['stem']), dtype='<i2', mode='r')
+        pcm = pcm.reshape(-1, self.channels)
+        start = int(track['loop_start'] * self.sample_rate)
+        end = min(len(pcm), int(track['loop_end'] * self.sample_rate))
+        region = pcm[start:end]
+        total = int(round(duration * self.sample_rate))
+        scale = np.float32(1 / 32768.0)
+
+        if not len(region):
+            return np.zeros((total, self.channels), dtype=np.float32)
+        if total <= len(region):
+            return region[:total].astype(np.float32) * scale
+
+        region = region.astype(np.float32) * scale
+        length = len(region)
+        xfade = min(int(LOOP_CROSSFADE * self.sample_rate), length // 2)
+        ramp = np.linspace(0.0, 1.0, xfade, dtype=np.float32)[:, None]
+        out = np.zeros((total, self.channels), dtype=np.float32)
+        pos = 0
+        while pos < total:
+            piece = region[:total - pos].copy()
+            if pos and xfade:
+                piece[:xfade] *= ramp[:len(piece)]
+            if pos + length < total and xfade:  # Another loop follows: fade this one out
+                piece[length - xfade:] *= ramp[::-1]
+            out[pos:pos + len(piece)] += piece
+            pos += length - xfade
+        return out
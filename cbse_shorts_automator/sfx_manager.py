@@ -1,13 +1,95 @@
 """
 File: sfx_manager.py
 Handles the mixing and timing of sound effects.
+With an AudioMixer, hits come from the process-wide SFXBank: every asset
+(all variants of the randomized pools) decoded and normalized once, with
+its mixing gain baked in, so laying out a job's SFX reads no files.
 """
 import os
 import random  # <--- NEW
+import threading
+import concurrent.futures
 from moviepy.editor import AudioFileClip
 from moviepy.audio.fx.all import audio_normalize # <--- NEW
 
+from audio_mixer import SAMPLE_RATE, CHANNELS, decode_audio, normalize_gain
+
+
+class SFXBank:
+    """
+    Decoded SFX shared by every SFXManager (and job) of the process.
+    Samples are read-only float32 arrays (frames, channels), normalized to a
+    0 dB peak and multiplied by the name's SFXManager.GAINS entry.
+
+    Usage:
+        bank = get_sfx_bank('config/sfx')
+        samples = random.choice(bank.pool('tick', paths_fn, gain=1.0))
+    """
+
+    def __init__(self, sample_rate=SAMPLE_RATE, channels=CHANNELS, workers=4):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.workers = workers
+        self.pools = {}  # name -> [samples, ...] (one per variant that decoded)
+        self._lock = threading.Lock()
+
+    def _load(self, path, gain):
+        try:
+            samples = decode_audio(path, self.sample_rate, self.channels)
+        except Exception as e:
+            print(f"⚠️ SFX Load Error ({os.path.basename(path)}): {e}")
+            return None
+        samples = samples * (normalize_gain(samples) * gain)
+        samples.setflags(write=False)
+        return samples
+
+    def pool(self, name, paths_fn, gain=1.0):
+        """
+        Variants of one SFX name, decoded on first use.
+
+        Args:
+            name: Logical SFX name
+            paths_fn: Callable returning the variant files (only called on first use)
+            gain: Mixing gain baked into the samples
+
+        Returns:
+            list: Read-only sample arrays (empty if no variant could be loaded)
+        """
+        with self._lock:
+            if name not in self.pools:
+                paths = paths_fn()
+                with concurrent.futures.ThreadPoolExecutor(max_workers=self.workers) as ex:
+                    loaded = list(ex.map(lambda p: self._load(p, gain), paths))
+                self.pools[name] = [samples for samples in loaded if samples is not None]
+            return self.pools[name]
+
+
+_BANKS = {}
+_BANKS_LOCK = threading.Lock()
+
+def get_sfx_bank(config_dir='config/sfx', sample_rate=SAMPLE_RATE, channels=CHANNELS):
+    """The process-wide SFXBank for this asset folder and sample format."""
+    key = (os.path.abspath(config_dir), sample_rate, channels)
+    with _BANKS_LOCK:
+        if key not in _BANKS:
+            _BANKS[key] = SFXBank(sample_rate, channels)
+    return _BANKS[key]
+
+
 class SFXManager:
+    # Mixing rules relative to the normalized (0 dB peak) asset
+    GAINS = {
+        'whoosh': 0.15,        # Reduced for normalized audio
+        'swish_low': 0.25,
+        'flip': 0.15,
+        'glitch': 0.12,        # High energy, keep low
+        'shutter': 0.15,       # Sharp transient
+        'notification': 0.15,
+        'zip': 0.2,
+        'keyboard': 0.25,
+        'marker': 0.2,
+    }
+
     def __init__(self, config_dir='config/sfx'):
         self.config_dir = config_dir
         # Map logical names to filenames
@@ -31,10 +113,20 @@ class SFXManager:
             'keyboard': ['keyboard1.wav', 'keyboard2.wav']
         }
 
-    def get_clip(self, name, start_time, volume=1.0):
+    def _path(self, name, filename):
+        """Existing file for one asset filename (None if missing)."""
+        path = os.path.join(self.config_dir, filename)
+        if not os.path.exists(path):
+            if name == 'pop': path = path.replace('.mp3', '.wav')
+            if not os.path.exists(path): return None
+        return path
+
+    def resolve(self, name, volume=1.0):
         """
-        Loads an audio clip, sets its start time and volume.
-        Handles list randomization and audio normalization.
+        Picks the file for a logical SFX name (random pick for pools).
+
+        Returns:
+            tuple or None: (path, gain) with the mixing rule applied to volume
         """
         asset = self.assets.get(name)
         if not asset: return None
@@ -42,10 +134,35 @@ class SFXManager:
         # Handle Randomization
         filename = random.choice(asset) if isinstance(asset, list) else asset
         
-        path = os.path.join(self.config_dir, filename)
-        if not os.path.exists(path):
-            if name == 'pop': path = path.replace('.mp3', '.wav')
-            if not os.path.exists(path): return None
+        path = self._path(name, filename)
+        if not path: return None
+        return path, volume * self.GAINS.get(name, 1.0)
+
+    def variants(self, name):
+        """Existing files of every variant of a logical SFX name."""
+        asset = self.assets.get(name) or []
+        filenames = asset if isinstance(asset, list) else [asset]
+        return [p for p in (self._path(name, f) for f in filenames) if p]
+
+    def bank(self, sample_rate=SAMPLE_RATE, channels=CHANNELS):
+        """The shared SFXBank for this manager's asset folder."""
+        return get_sfx_bank(self.config_dir, sample_rate, channels)
+
+    def preload(self, sample_rate=SAMPLE_RATE, channels=CHANNELS):
+        """Decodes every asset into the shared bank now instead of on first use."""
+        bank = self.bank(sample_rate, channels)
+        for name in self.assets:
+            bank.pool(name, lambda name=name: self.variants(name), self.GAINS.get(name, 1.0))
+        return bank
+
+    def get_clip(self, name, start_time, volume=1.0):
+        """
+        Loads an audio clip, sets its start time and volume.
+        Handles list randomization and audio normalization.
+        """
+        resolved = self.resolve(name, volume)
+        if not resolved: return None
+        path, volume = resolved
 
         try:
             clip = AudioFileClip(path)
@@ -55,25 +172,32 @@ class SFXManager:
                 clip = clip.fx(audio_normalize)
             except Exception: pass # Fallback if normalization fails
 
-            # 2. APPLY MIXING RULES (Adjust relative to normalized 0dB)
-            if name == 'whoosh': volume *= 0.15      # Reduced for normalized audio
-            if name == 'swish_low': volume *= 0.25
-            if name == 'flip': volume *= 0.15
-            
-            # New Categories
-            if name == 'glitch': volume *= 0.12      # High energy, keep low
-            if name == 'shutter': volume *= 0.15     # Sharp transient
-            if name == 'notification': volume *= 0.15
-            if name == 'zip': volume *= 0.2
-            if name == 'keyboard': volume *= 0.25
-            if name == 'marker': volume *= 0.2
-            
+            # 2. APPLY MIXING RULES (gain from GAINS, relative to normalized 0dB)
             return clip.set_start(start_time).volumex(volume)
         except Exception as e:
             print(f"⚠️ SFX Load Error ({name}): {e}")
             return None
 
-    def generate_quiz_sfx(self, timings):
+    def place(self, name, start_time, volume=1.0, mixer=None):
+        """
+        One SFX hit: added to `mixer` (AudioMixer) when given, otherwise
+        returned as a MoviePy clip (legacy templates).
+
+        Returns:
+            Truthy handle (clip or (samples, start, volume)) if placed, else None
+        """
+        if mixer is None: return self.get_clip(name, start_time, volume)
+        if name not in self.assets: return None
+        pool = self.bank(mixer.sample_rate, mixer.channels).pool(
+            name, lambda: self.variants(name), self.GAINS.get(name, 1.0))
+        if not pool: return None
+
+        # Shared samples already carry normalization + mixing gain
+        samples = random.choice(pool)
+        mixer.add(samples, start=start_time, gain=volume)
+        return samples, start_time, volume
+
+    def generate_quiz_sfx(self, timings, mixer=None):
         """
         Generates the standard SFX layer for a Quiz.
         timings: dict with keys 'q', 'a', 'b', 'c', 'd', 'think', 'ans'
@@ -83,14 +207,14 @@ class SFXManager:
         # 1. Transition to Question (Whoosh)
         if 'q' in timings:
             # Trigger 0.2s before the text appears
-            clp = self.get_clip('whoosh', start_time=timings['q'] - 0.2, volume=0.5)
+            clp = self.place('whoosh', timings['q'] - 0.2, volume=0.5, mixer=mixer)
             if clp: sfx_layer.append(clp)
 
         # 2. Options appearing (Pop)
         for key in ['a', 'b', 'c', 'd']:
             if key in timings:
                 # Volume reduced to 0.15 (15%) as requested (further reduction from 0.2)
-                clp = self.get_clip('pop', start_time=timings[key], volume=0.15)
+                clp = self.place('pop', timings[key], volume=0.15, mixer=mixer)
                 if clp: sfx_layer.append(clp)
 
         # 3. The Timer (Quad Speed Ticks)
@@ -100,27 +224,27 @@ class SFXManager:
             # Create ticks at 0.0, 0.25, 0.50, 0.75...
             for i in range(12): 
                 offset = i * 0.25
-                clp = self.get_clip('tick', start_time=start + offset, volume=0.6)
+                clp = self.place('tick', start + offset, volume=0.6, mixer=mixer)
                 if clp: sfx_layer.append(clp)
 
         # 4. The Answer Reveal (Chime)
         if 'ans' in timings:
-            clp = self.get_clip('success', start_time=timings['ans'], volume=0.7)
+            clp = self.place('success', timings['ans'], volume=0.7, mixer=mixer)
             if clp: sfx_layer.append(clp)
 
         # 5. The CTA (Paper Slide - Subtle Transition)
         if 'cta' in timings:
-            clp = self.get_clip('flip', start_time=timings['cta'], volume=1.0)
+            clp = self.place('flip', timings['cta'], volume=1.0, mixer=mixer)
             if clp: sfx_layer.append(clp)
 
         # 6. The Outro (Deep Swish - Finality)
         if 'outro' in timings:
-            clp = self.get_clip('swish_low', start_time=timings['outro'], volume=0.6)
+            clp = self.place('swish_low', timings['outro'], volume=0.6, mixer=mixer)
             if clp: sfx_layer.append(clp)
 
         return sfx_layer
     
-    def generate_fact_sfx(self, timings):
+    def generate_fact_sfx(self, timings, mixer=None):
         """
         SFX layer for FACT Template (Digital/Documentary).
         """
@@ -128,27 +252,27 @@ class SFXManager:
         
         # Hook -> Title (Glitch)
         if 'title' in timings:
-            clp = self.get_clip('glitch', start_time=timings['title'], volume=1.0)
+            clp = self.place('glitch', timings['title'], volume=1.0, mixer=mixer)
             if clp: sfx_layer.append(clp)
 
         # Reveal (Shutter)
         if 'details' in timings:
-            clp = self.get_clip('shutter', start_time=timings['details'], volume=1.0)
+            clp = self.place('shutter', timings['details'], volume=1.0, mixer=mixer)
             if clp: sfx_layer.append(clp)
 
         # CTA (Notification)
         if 'cta' in timings:
-            clp = self.get_clip('notification', start_time=timings['cta'], volume=1.0)
+            clp = self.place('notification', timings['cta'], volume=1.0, mixer=mixer)
             if clp: sfx_layer.append(clp)
 
         # Outro (Deep Swish)
         if 'outro' in timings:
-            clp = self.get_clip('swish_low', start_time=timings['outro'], volume=1.0)
+            clp = self.place('swish_low', timings['outro'], volume=1.0, mixer=mixer)
             if clp: sfx_layer.append(clp)
 
         return sfx_layer
 
-    def generate_tip_sfx(self, timings):
+    def generate_tip_sfx(self, timings, mixer=None):
         """
         SFX layer for TIP Template (Productivity/Hacker).
         """
@@ -156,27 +280,27 @@ class SFXManager:
 
         # Hook -> Title (Zip)
         if 'title' in timings:
-            clp = self.get_clip('zip', start_time=timings['title'], volume=1.0)
+            clp = self.place('zip', timings['title'], volume=1.0, mixer=mixer)
             if clp: sfx_layer.append(clp)
 
         # Reveal (Marker)
         if 'content' in timings:
-            clp = self.get_clip('marker', start_time=timings['content'], volume=1.0)
+            clp = self.place('marker', timings['content'], volume=1.0, mixer=mixer)
             if clp: sfx_layer.append(clp)
             
         # Bonus (Pop)
         if 'bonus' in timings:
-            clp = self.get_clip('pop', start_time=timings['bonus'], volume=0.2)
+            clp = self.place('pop', timings['bonus'], volume=0.2, mixer=mixer)
             if clp: sfx_layer.append(clp)
 
         # CTA (Keyboard)
         if 'cta' in timings:
-            clp = self.get_clip('keyboard', start_time=timings['cta'], volume=1.0)
+            clp = self.place('keyboard', timings['cta'], volume=1.0, mixer=mixer)
             if clp: sfx_layer.append(clp)
 
         # Outro (Deep Swish)
         if 'outro' in timings:
-            clp = self.get_clip('swish_low', start_time=timings['outro'], volume=1.0)
+            clp = self.place('swish_low', timings['outro'], volume=1.0, mixer=mixer)
             if clp: sfx_layer.append(clp)
 
         return sfx_layer
\ No newline at end of file
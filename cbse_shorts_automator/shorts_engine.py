@@ -11,6 +11,7 @@ import json
 import random
 import textwrap
 import glob
+import threading
 from moviepy.editor import (
     VideoFileClip, TextClip, CompositeVideoClip, 
     AudioFileClip, ColorClip, CompositeAudioClip,
@@ -19,8 +20,16 @@ from moviepy.editor import (
 
 from moviepy.audio.fx.all import audio_normalize
 from voice_manager import VoiceManager
+from voice_edge import EdgeVoiceEngine
+from tts_router import ProviderRouter
 from effects_manager import EffectsManager 
+from sfx_manager import SFXManager
+from music_library import MusicLibrary, TARGET_LUFS
+from audio_mixer import MASTER_FORMATS
 from visual_effects_quiz import FPS
+from job_workspace import JobWorkspace
+from whisper_pool import configure_whisper_pool
+from speech_transcriber import configure_speech_transcriber
 
 # Theme configurations
 THEMES = {
@@ -46,12 +55,27 @@ THEMES = {
     }
 }
 
+# Remotion project rendering each JSON template (static assets are linked from its public/)
+ENGINE_DIRS = {
+    'quiz': 'visual_engine_v3',
+    'fact': 'visual_engine_fact',
+    'tip': 'visual_engine_tip'
+}
+
 FONT_REGULAR = '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf'
 FONT_BOLD = '/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf'
 WIDTH = 1080
 HEIGHT = 1920
 
+# Background music bed: fade at the end; MUSIC_GAIN is relative to the
+# normalized track (legacy config/music.mp3 and the MoviePy path only -
+# indexed tracks are leveled by loudness, see music_library.py)
+MUSIC_GAIN = 0.12
+MUSIC_FADE_OUT = 1.0
+
 class ShortsEngine:
+    ENGINE_DIRS = ENGINE_DIRS  # Templates resolve their Remotion project through the engine
+
     def __init__(self, config_path='config/generator_config.json'):
         if not os.path.exists('config'): os.makedirs('config')
         if not os.path.exists(config_path):
@@ -77,13 +101,66 @@ class ShortsEngine:
         # Initialize Visual FX Manager (Loaded but not used in bypass mode)
         self.fx_manager = EffectsManager()
 
-        self.voice_manager = VoiceManager()
+        # Synthesized clips are cached on disk (see TTS_CACHE in the config)
+        tts_cfg = self.config.get('TTS_CACHE', {})
+        tts_max_mb = tts_cfg.get('MAX_MB')
+        voice_cfg = self.config.get('VOICE', {})
+        router_cfg = voice_cfg.get('ROUTER', {})
+        edge_retry_cfg = voice_cfg.get('EDGE_RETRY', {})
+        self.voice_manager = VoiceManager(
+            cache_dir=tts_cfg.get('DIR', 'cache/tts') if tts_cfg.get('ENABLED', True) else None,
+            cache_max_bytes=int(tts_max_mb * 1024**2) if tts_max_mb else None,
+            google_single_request=voice_cfg.get('GOOGLE_SINGLE_REQUEST', False),
+            account_strategy=voice_cfg.get('ACCOUNT_STRATEGY', 'round_robin'),
+            google_batch_timeout=voice_cfg.get('GOOGLE_BATCH_TIMEOUT_SECONDS', 60),
+            router=ProviderRouter(
+                hedge=router_cfg.get('HEDGE', True),
+                hedge_percentile=router_cfg.get('HEDGE_PERCENTILE', 95),
+                min_samples=router_cfg.get('MIN_SAMPLES', 10),
+                failure_threshold=router_cfg.get('BREAKER_FAILURES', 3),
+                reset_timeout=router_cfg.get('BREAKER_RESET_SECONDS', 60)
+            ),
+            edge_engine=EdgeVoiceEngine(
+                retry_base=edge_retry_cfg.get('BASE_SECONDS', 0.25),
+                retry_max=edge_retry_cfg.get('MAX_SECONDS', 2.0),
+                rate_limit_base=edge_retry_cfg.get('RATE_LIMIT_BASE_SECONDS', 2.0),
+                rate_limit_max=edge_retry_cfg.get('RATE_LIMIT_MAX_SECONDS', 30.0)
+            )
+        )
+
+        # One Whisper model per process, shared by every template
+        whisper_cfg = self.config.get('WHISPER', {})
+        configure_whisper_pool(whisper_cfg.get('MODEL'), whisper_cfg.get('IDLE_TIMEOUT'))
+        configure_speech_transcriber(whisper_cfg.get('WORKERS'), whisper_cfg.get('VAD'),
+                                     whisper_cfg.get('MAX_CHUNK_SECONDS'), whisper_cfg.get('IDLE_TIMEOUT'))
+
+        # Music index (loudness, loop points, decoded stems) refreshed when files change
+        audio_cfg = self.config.get('AUDIO', {})
+        self.music_library = MusicLibrary(
+            self.music_dir, cache_dir=audio_cfg.get('MUSIC_CACHE_DIR', 'cache/music'),
+            target_lufs=audio_cfg.get('MUSIC_TARGET_LUFS', TARGET_LUFS)
+        )
+
+        # Master mix container: lossless (wav/flac) or final-codec AAC (.m4a), so the
+        # only lossy encode is the one the renderer / mux does
+        self.master_audio_ext = MASTER_FORMATS.get(str(audio_cfg.get('MASTER_FORMAT', 'wav')).lower(), '.wav')
+
+        # SFX bank + music index warmed up off the main thread
+        threading.Thread(target=self._warm_audio, args=(audio_cfg.get('PRELOAD_SFX', True),),
+                         name="audio-warmup", daemon=True).start()
 
         import moviepy.config as mpconf
         temp_dir = self.config['DIRS']['TEMP']
         os.makedirs(temp_dir, exist_ok=True)
         mpconf.TEMP_DIR = temp_dir 
 
+    def _warm_audio(self, preload_sfx=True):
+        try:
+            if preload_sfx: SFXManager().preload()
+            self.music_library.refresh()
+        except Exception as e:
+            print(f"⚠️ Audio warm-up failed: {e}")
+
     def get_theme(self, theme_name='energetic_yellow'):
         return THEMES.get(theme_name, THEMES['energetic_yellow'])
 
@@ -99,10 +176,14 @@ class ShortsEngine:
         return 'black' if luminance > 0.5 else 'white'
 
     # === BYPASS MODE: SKIPS STICKERS ===
-    def render_with_effects(self, video_clip, script_data, output_path):
+    def render_with_effects(self, video_clip, script_data, output_path, mixer=None):
         """
         Renders the video to disk.
         NOTE: Visual FX (Stickers) are currently SUSPENDED for stability.
+
+        With an AudioMixer, MoviePy encodes the picture only and the master is
+        muxed in by one ffmpeg call (video copied, audio encoded once to AAC).
+        Without one, the clip's own audio is rendered by MoviePy (legacy).
         """
         print("✨ FX SUSPENDED: Rendering clean video (no stickers)...")
         
@@ -110,14 +191,31 @@ class ShortsEngine:
         # and just render the raw clip directly.
         
         print(f"🎬 Rendering final video to: {output_path}")
-        video_clip.write_videofile(
-            output_path,
-            fps=FPS,
-            codec='libx264',
-            audio_codec='aac',
-            threads=4,
-            preset='ultrafast' # Keeps the speed gain
-        )
+        if mixer is None:
+            video_clip.write_videofile(
+                output_path,
+                fps=FPS,
+                codec='libx264',
+                audio_codec='aac',
+                threads=4,
+                preset='ultrafast' # Keeps the speed gain
+            )
+            return
+
+        video_only = os.path.join(self.config['DIRS']['TEMP'],
+                                  f"{os.path.splitext(os.path.basename(output_path))[0]}_video_only.mp4")
+        try:
+            video_clip.write_videofile(
+                video_only,
+                fps=FPS,
+                codec='libx264',
+                audio=False,
+                threads=4,
+                preset='ultrafast'
+            )
+            mixer.mux(video_only, output_path, duration=video_clip.duration)
+        finally:
+            if os.path.exists(video_only): os.remove(video_only)
 
     def create_outro(self, duration, cta_text="SUBSCRIBE FOR MORE!"):
         bg_color = (255, 255, 255) 
@@ -441,7 +539,13 @@ class ShortsEngine:
         
         return outro_clip
     
-    def add_background_music(self, voice_track, total_duration, theme_name='energetic_yellow'):
+    def pick_music_track(self, theme_name='energetic_yellow'):
+        """
+        Random track for the theme's mood (any track, then config/music.mp3, as fallbacks).
+
+        Returns:
+            tuple: (path or None, mood)
+        """
         mood = self.get_theme(theme_name).get('music_mood', 'energetic')
         search_path = os.path.join(self.music_dir, mood, "*.mp3")
         tracks = glob.glob(search_path) or glob.glob(os.path.join(self.music_dir, "*.mp3"))
@@ -449,9 +553,61 @@ class ShortsEngine:
         if not tracks:
             legacy = 'config/music.mp3'
             if os.path.exists(legacy): tracks = [legacy]
-            else: return voice_track
-            
-        chosen = random.choice(tracks)
+            else: return None, mood
+        return random.choice(tracks), mood
+
+    def mix_background_music(self, mixer, total_duration, theme_name='energetic_yellow'):
+        """
+        Adds the music bed to an AudioMixer (JSON templates): a slice of an
+        indexed track's pre-decoded stem, leveled to the library's target loudness,
+        on the 'music' bus and ducked under the 'voice' bus per the theme's mood.
+
+        Returns:
+            str or None: Chosen track
+        """
+        library = self.music_library
+        mood = self.get_theme(theme_name).get('music_mood', 'energetic')
+        track = library.pick(mood)
+        chosen = None
+        if track and (mixer.sample_rate, mixer.channels) == (library.sample_rate, library.channels):
+            try:
+                mixer.add(library.stem(track, total_duration), gain=library.gain(track),
+                          fade_out=MUSIC_FADE_OUT, bus='music')
+                print(f"🎵 Adding Music: {os.path.basename(track['path'])} (Mood: {mood}, {track['lufs']} LUFS)")
+                chosen = track['path']
+            except Exception as e:
+                print(f"⚠️ Music stem unavailable ({e}), decoding the track instead")
+
+        if not chosen:
+            # Nothing indexed (or other mix format): track decoded for this video
+            chosen, mood = self.pick_music_track(theme_name)
+            if not chosen: return None
+            print(f"🎵 Adding Music: {os.path.basename(chosen)} (Mood: {mood})")
+            mixer.add(chosen, gain=MUSIC_GAIN, normalize=True, loop=True,
+                      duration=total_duration, fade_out=MUSIC_FADE_OUT, optional=True, bus='music')
+
+        # Music ducks under the voice bus (templates add voice tracks with bus='voice')
+        duck = self.ducking_params(mood)
+        if duck is not None: mixer.duck('music', under='voice', **duck)
+        return chosen
+
+    def ducking_params(self, mood):
+        """
+        Sidechain settings for a music mood from AUDIO.DUCKING (mood block over the
+        top-level values), as audio_mixer.duck_gain() kwargs.
+
+        Returns:
+            dict or None: None when ducking is disabled
+        """
+        cfg = self.config.get('AUDIO', {}).get('DUCKING', {})
+        if not cfg.get('ENABLED', True): return None
+        params = {k.lower(): v for k, v in cfg.items() if not isinstance(v, (dict, bool))}
+        params.update({k.lower(): v for k, v in cfg.get(mood, {}).items()})
+        return params
+
+    def add_background_music(self, voice_track, total_duration, theme_name='energetic_yellow'):
+        chosen, mood = self.pick_music_track(theme_name)
+        if not chosen: return voice_track
         print(f"🎵 Adding Music: {os.path.basename(chosen)} (Mood: {mood})")
         
         try:
@@ -504,17 +660,77 @@ class ShortsEngine:
         if not hasattr(clip, 'duration') or not clip.duration: return clip
         return clip.resize(lambda t: 1.0 + (zoom_factor - 1.0) * (t / clip.duration))
 
+    def start_short(self, video_path, script, config, output_path):
+        """
+        Picks the template and creates the job workspace (phase 0 of a short).
+
+        Returns:
+            dict: Short handle for synthesize_short / prepare_short_video /
+                  export_short / finish_short
+        """
+        t_type = config.get('template', 'quiz')
+        #if t_type == 'quiz': from template_quiz import QuizTemplate; template = QuizTemplate(self)
+        if t_type == 'quiz': from template_quiz_json_generator import QuizTemplate; template = QuizTemplate(self)
+        elif t_type == 'fact': from template_fact_json_ffmpeg import FactTemplate; template = FactTemplate(self)
+        elif t_type == 'tip': from template_tip_json_ffmpeg import TipTemplate; template = TipTemplate(self)
+        else: raise ValueError(f"Unknown template: {t_type}")
+        
+        # Every job gets its own temp/ + public/ so concurrent jobs never clobber each other
+        job_name = os.path.splitext(os.path.basename(output_path))[0]
+        workspace = JobWorkspace(
+            job_name, ENGINE_DIRS.get(t_type),
+            jobs_root=self.config['DIRS'].get('JOBS', 'jobs')
+        )
+        state = template.start(video_path, script, config, output_path, workspace=workspace)
+        return {'type': t_type, 'template': template, 'state': state,
+                'workspace': workspace, 'output_path': output_path}
+
+    def synthesize_short(self, short):
+        """Phase 1 (TTS): voice tracks and the timeline."""
+        short['template'].synthesize(short['state'])
+
+    def prepare_short_video(self, short):
+        """Phase 2 (CPU / ffmpeg): source video asset cut to the timeline."""
+        short['template'].prepare_video(short['state'])
+
+    def export_short(self, short):
+        """Phase 3: master audio + scenario JSON."""
+        short['result'] = short['template'].export(short['state'])
+
+    def finish_short(self, short):
+        """
+        Writes the manifest and drops the temp files of an exported short.
+
+        Returns:
+            dict: Same shape as generate_short()'s success result
+        """
+        workspace, output_path = short['workspace'], short['output_path']
+        duration = short['result'].get('duration', 0)
+        voice_usage = workspace.voice_usage.summary()
+        
+        workspace.write_manifest(
+            output_filename=os.path.basename(output_path),
+            output_path=os.path.abspath(output_path),
+            template=short['type'],
+            duration=duration,
+            voice_usage=voice_usage
+        )
+        if self.config.get('DELETE_TEMP_FILES', True): workspace.cleanup_temp()
+        
+        return {
+            'success': True, 'output_path': output_path, 'duration': duration,
+            'job_dir': workspace.root, 'manifest_path': workspace.manifest_path,
+            'voice_system': voice_usage['voice_system'], 'voice_usage': voice_usage
+        }
+
     def generate_short(self, video_path, pdf_path, script, config, output_path, class_level=None):
+        """All phases of one short in sequence (the batch pipeline runs them as stages)."""
         try:
-            t_type = config.get('template', 'quiz')
-            #if t_type == 'quiz': from template_quiz import QuizTemplate; template = QuizTemplate(self)
-            if t_type == 'quiz': from template_quiz_json_generator import QuizTemplate; template = QuizTemplate(self)
-            elif t_type == 'fact': from template_fact_json_ffmpeg import FactTemplate; template = FactTemplate(self)
-            elif t_type == 'tip': from template_tip_json_ffmpeg import TipTemplate; template = TipTemplate(self)
-            else: raise ValueError(f"Unknown template: {t_type}")
-            
-            result = template.generate(video_path, script, config, output_path)
-            return {'success': True, 'output_path': output_path, 'duration': result.get('duration', 0)}
+            short = self.start_short(video_path, script, config, output_path)
+            self.synthesize_short(short)
+            self.prepare_short_video(short)
+            self.export_short(short)
+            return self.finish_short(short)
         except Exception as e:
             import traceback; traceback.print_exc()
             return {'success': False, 'error': str(e)}
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+File: speech_transcriber.py
+Fast transcription path for lecture videos:
+1. ffmpeg extracts 16 kHz mono audio once (no video decode inside Whisper)
+2. Energy-based voice-activity detection skips silence (slide-only stretches)
+3. Speech is packed into <=30 s chunks (Whisper's window) and transcribed
+   in a process pool, each worker keeping its own warm model (the pool is
+   shut down after an idle timeout, like WhisperModelPool's weights)
+4. Segments are shifted back onto the original video timeline and merged
+"""
+
+import os
+import subprocess
+import multiprocessing
+import concurrent.futures
+import threading
+import time
+import numpy as np
+
+from whisper_pool import DEFAULT_IDLE_TIMEOUT
+
+SAMPLE_RATE = 16000  # What Whisper expects
+
+
+def extract_audio(video_path, sample_rate=SAMPLE_RATE):
+    """
+    Decodes only the audio stream to mono float32 PCM through a pipe.
+
+    Returns:
+        np.ndarray: float32 samples in [-1, 1]
+    """
+    cmd = [
+        'ffmpeg', '-nostdin', '-v', 'error',
+        '-i', video_path,
+        '-vn', '-ac', '1', '-ar', str(sample_rate),
+        '-f', 'f32le', '-'
+    ]
+    proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if proc.returncode != 0:
+        raise RuntimeError(f"ffmpeg audio extraction failed: {proc.stderr.decode(errors='ignore')[-300:]}")
+    return np.frombuffer(proc.stdout, dtype=np.float32)
+
+
+def detect_speech(audio, sample_rate=SAMPLE_RATE, frame_ms=30, min_silence=0.5,
+                  min_speech=0.25, pad=0.2, margin_db=12.0, floor_db=-55.0):
+    """
+    Energy VAD: frames louder than (noise floor + margin) count as speech.
+
+    Args:
+        audio: Mono float32 samples
+        min_silence: Gaps shorter than this (s) are bridged
+        min_speech: Speech bursts shorter than this (s) are dropped
+        pad: Seconds added on both sides of each region
+        margin_db: dB above the estimated noise floor that counts as speech
+        floor_db: Absolute minimum threshold (dBFS)
+
+    Returns:
+        list: [(start_s, end_s), ...] speech regions on the audio timeline
+    """
+    frame = int(sample_rate * frame_ms / 1000)
+    n_frames = len(audio) // frame
+    if n_frames == 0: return []
+
+    frames = audio[:n_frames * frame].reshape(n_frames, frame)
+    rms = np.sqrt(np.mean(frames.astype(np.float64) ** 2, axis=1))
+    db = 20 * np.log10(rms + 1e-10)
+
+    threshold = max(np.percentile(db, 10) + margin_db, floor_db)
+    voiced = db > threshold
+    if not voiced.any(): return []
+
+    # Rising/falling edges of the voiced mask -> [start, end) frame runs
+    edges = np.diff(np.concatenate(([0], voiced.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+
+    frame_s = frame / sample_rate
+    regions = []
+    for s, e in zip(starts * frame_s, ends * frame_s):
+        if regions and s - regions[-1][1] < min_silence:
+            regions[-1][1] = e
+        else:
+            regions.append([s, e])
+
+    duration = len(audio) / sample_rate
+    return [(max(0.0, s - pad), min(duration, e + pad))
+            for s, e in regions if e - s >= min_speech]
+
+
+def plan_chunks(regions, max_chunk=30.0, max_gap=1.5):
+    """
+    Packs consecutive speech regions into chunks of at most max_chunk seconds.
+    Regions are only merged across gaps shorter than max_gap (longer silence
+    never goes to Whisper). Long regions are split; chunk boundaries otherwise
+    fall inside silence.
+
+    Returns:
+        list: [(start_s, end_s), ...]
+    """
+    chunks = []
+    for s, e in regions:
+        while e - s > max_chunk:
+            chunks.append((s, s + max_chunk))
+            s += max_chunk
+        if chunks and s - chunks[-1][1] < max_gap and e - chunks[-1][0] <= max_chunk:
+            chunks[-1] = (chunks[-1][0], e)
+        else:
+            chunks.append((s, e))
+    return chunks
+
+
+def _init_worker(model_name, torch_threads):
+    """Process-pool initializer: one warm model per worker, no CPU oversubscription."""
+    try:
+        import torch
+        torch.set_num_threads(torch_threads)
+    except ImportError:
+        pass
+    from whisper_pool import configure_whisper_pool
+    configure_whisper_pool(model_name, idle_timeout=0)
+
+
+def _transcribe_chunk(audio, offset, kwargs):
+    """Runs in a worker (or inline). Returns segments on the video timeline."""
+    from whisper_pool import get_whisper_pool
+    result = get_whisper_pool().transcribe(audio, **kwargs)
+    segments = []
+    for seg in result.get('segments', []):
+        seg = dict(seg)
+        seg['start'] = float(seg['start']) + offset
+        seg['end'] = float(seg['end']) + offset
+        segments.append(seg)
+    return segments
+
+
+class SpeechTranscriber:
+    """
+    Usage:
+        result = get_speech_transcriber().transcribe("lecture.mp4")
+        result['segments']  # Same shape as whisper's, on the video timeline
+    """
+
+    def __init__(self, workers=None, use_vad=True, max_chunk=30.0, idle_timeout=DEFAULT_IDLE_TIMEOUT, debug=True):
+        """
+        Args:
+            workers: Worker processes (None = CPU count, 1 = in-process)
+            use_vad: Skip silence before transcribing
+            max_chunk: Max seconds per Whisper call
+            idle_timeout: Shut the worker pool (and its models) down after this
+                          many idle seconds (None/0 = keep until shutdown())
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.use_vad = use_vad
+        self.max_chunk = max_chunk
+        self.idle_timeout = idle_timeout
+        self.debug = debug
+        self._executor = None
+        self._executor_model = None
+        self._in_flight = 0
+        self._last_used = 0.0
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self, model_name):
+        """Long-lived pool so worker models stay warm across videos."""
+        with self._lock:
+            if self._executor is not None and self._executor_model != model_name:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+            if self._executor is None:
+                torch_threads = max(1, (os.cpu_count() or 1) // self.workers)
+                self._executor = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker,
+                    initargs=(model_name, torch_threads)
+                )
+                self._executor_model = model_name
+            self._in_flight += 1
+            return self._executor
+
+    def _release_executor(self):
+        with self._lock:
+            self._in_flight -= 1
+            self._last_used = time.time()
+            if not self.idle_timeout or self._in_flight: return
+            if self._timer: self._timer.cancel()
+            self._timer = threading.Timer(self.idle_timeout, self._shutdown_if_idle)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _shutdown_if_idle(self):
+        with self._lock:
+            if self._executor is None or self._in_flight: return
+            if time.time() - self._last_used < self.idle_timeout: return
+            if self.debug: print("🧹 Releasing Whisper transcription workers...")
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def transcribe(self, video_path, **kwargs):
+        """
+        Args:
+            video_path: Any container ffmpeg can read
+            **kwargs: Passed to Whisper (e.g., language='en')
+
+        Returns:
+            dict: {'text': str, 'segments': [...]} like whisper's transcribe()
+        """
+        from whisper_pool import get_whisper_pool
+        model_name = get_whisper_pool().model_name
+
+        audio = extract_audio(video_path)
+        duration = len(audio) / SAMPLE_RATE
+
+        regions = detect_speech(audio) if self.use_vad else [(0.0, duration)]
+        chunks = plan_chunks(regions, self.max_chunk)
+        speech_s = sum(e - s for s, e in regions)
+        if self.debug:
+            print(f"   🗣️ VAD: {speech_s:.0f}s of speech in {duration:.0f}s audio -> {len(chunks)} chunks")
+
+        jobs = [(audio[int(s * SAMPLE_RATE):int(e * SAMPLE_RATE)], s) for s, e in chunks]
+
+        if self.workers > 1 and len(jobs) > 1:
+            executor = self._get_executor(model_name)
+            try:
+                futures = [executor.submit(_transcribe_chunk, a, off, kwargs) for a, off in jobs]
+                parts = [f.result() for f in futures]
+            finally:
+                self._release_executor()
+        else:
+            parts = [_transcribe_chunk(a, off, kwargs) for a, off in jobs]
+
+        segments = sorted((seg for part in parts for seg in part), key=lambda seg: seg['start'])
+        for i, seg in enumerate(segments): seg['id'] = i
+        return {'text': " ".join(seg['text'].strip() for seg in segments), 'segments': segments}
+
+    def shutdown(self):
+        """Stops the worker processes now (e.g., at the end of a batch)."""
+        with self._lock:
+            if self._timer: self._timer.cancel()
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+
+_TRANSCRIBER = None
+_TRANSCRIBER_LOCK = threading.Lock()
+
+def configure_speech_transcriber(workers=None, use_vad=None, max_chunk=None, idle_timeout=None):
+    """Applies the WHISPER config block (workers / VAD / chunk size / idle timeout) for this process."""
+    t = get_speech_transcriber()
+    if workers: t.workers = workers
+    if use_vad is not None: t.use_vad = use_vad
+    if max_chunk: t.max_chunk = max_chunk
+    if idle_timeout is not None: t.idle_timeout = idle_timeout
+    return t
+
+def get_speech_transcriber():
+    """The one SpeechTranscriber of this process."""
+    global _TRANSCRIBER
+    with _TRANSCRIBER_LOCK:
+        if _TRANSCRIBER is None:
+            _TRANSCRIBER = SpeechTranscriber()
+    return _TRANSCRIBER
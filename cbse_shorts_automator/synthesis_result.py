@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+File: synthesis_result.py
+What produced each voice clip, reported per call instead of through shared
+VoiceManager fields (last_used_system / char_count), which jobs running in
+parallel overwrite. Each VoiceClip carries its SynthesisResult; a job
+collects its clips' results in a VoiceJobUsage (JobWorkspace.voice_usage)
+for the Sheet's voice column and the manifest.
+"""
+
+import threading
+
+
+class SynthesisResult:
+    """One synthesized (or cache-served) segment."""
+
+    def __init__(self, provider, voice, chars=0, account=None, cache_hit=False, latency=0.0):
+        """
+        Args:
+            provider: 'google' or 'edge'
+            voice: Voice key actually used (e.g., 'NeeraNeural2')
+            chars: Characters billed for this segment (0 on a cache hit)
+            account: Google account (None for Edge and cache hits)
+            cache_hit: Served from the TTS clip cache
+            latency: Seconds the caller waited for this segment
+        """
+        self.provider = provider
+        self.voice = voice
+        self.chars = chars
+        self.account = account
+        self.cache_hit = cache_hit
+        self.latency = latency
+
+    @property
+    def label(self):
+        """Voice system string for the Sheet, e.g. 'Google-account1-NeeraNeural2'."""
+        if self.cache_hit:
+            return f"{self.provider.capitalize()}-cache-{self.voice}"
+        if self.provider == 'google':
+            return f"Google-{self.account}-{self.voice}"
+        return f"Edge-{self.voice}"
+
+    def to_dict(self):
+        return {
+            'provider': self.provider, 'account': self.account, 'voice': self.voice,
+            'chars': self.chars, 'cache_hit': self.cache_hit, 'latency': round(self.latency, 3)
+        }
+
+    def __repr__(self):
+        return f"SynthesisResult({self.label}, chars={self.chars}, latency={self.latency:.2f}s)"
+
+
+class VoiceJobUsage:
+    """Thread-safe collection of one job's SynthesisResults."""
+
+    def __init__(self):
+        self.results = []
+        self._lock = threading.Lock()
+
+    def add(self, result):
+        with self._lock:
+            self.results.append(result)
+
+    @property
+    def voice_system(self):
+        """
+        Distinct systems the job's voice came from, in order of first use
+        (cache hits only count when nothing was synthesized), e.g.
+        'Google-account1-NeeraNeural2' or 'Google-account1-NeeraNeural2 + Edge-KavyaNeural'.
+        """
+        with self._lock:
+            results = list(self.results)
+        if not results: return "Unknown"
+        synthesized = [r for r in results if not r.cache_hit] or results
+        labels = []
+        for r in synthesized:
+            if r.label not in labels: labels.append(r.label)
+        return " + ".join(labels)
+
+    def summary(self):
+        """
+        Returns:
+            dict: {'voice_system', 'segments', 'chars', 'cache_hits', 'latency_s', 'max_latency_s', 'systems'}
+        """
+        with self._lock:
+            results = list(self.results)
+        systems = {}
+        for r in results:
+            systems[r.label] = systems.get(r.label, 0) + 1
+        return {
+            'voice_system': self.voice_system,
+            'segments': len(results),
+            'chars': sum(r.chars for r in results),
+            'cache_hits': sum(r.cache_hit for r in results),
+            'latency_s': round(sum(r.latency for r in results), 3),
+            'max_latency_s': round(max((r.latency for r in results), default=0.0), 3),
+            'systems': systems,
+        }
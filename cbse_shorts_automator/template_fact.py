@@ -8,7 +8,8 @@ UPDATED: Bigger Fonts + Multi-line Karaoke + Aggressive Layout
 import imagemagick_setup
 import os
 import concurrent.futures
-from moviepy.editor import CompositeVideoClip, CompositeAudioClip, TextClip, AudioFileClip, vfx
+from moviepy.editor import CompositeVideoClip, TextClip, AudioFileClip, vfx
+from audio_mixer import AudioMixer, SAMPLE_RATE
 from voice_manager import VoiceManager
 from karaoke_manager import KaraokeManager
 from video_processor import VideoProcessor
@@ -177,19 +178,18 @@ class FactTemplate:
             'cta': t_cta,
             'outro': t_outro
         }
-        sfx_clips = sfx_mgr.generate_fact_sfx(sfx_timings)
-
-
-        audio_list = [aud_hook.set_start(t_hook), aud_title.set_start(t_title), aud_details.set_start(t_details), aud_cta.set_start(t_cta)]
-        full_audio_stack = audio_list + sfx_clips # NEW: Combine Voice + SFX
-        
-        
-        final_audio = self.engine.add_background_music(CompositeAudioClip(full_audio_stack), total_dur)
+        # Voice + SFX + music mixed as arrays, muxed with the picture in one ffmpeg call
+        mixer = AudioMixer(sample_rate=SAMPLE_RATE)
+        for path, start in [(generated_audio_paths['hook'], t_hook), (generated_audio_paths['title'], t_title),
+                            (details_path, t_details), (generated_audio_paths['cta'], t_cta)]:
+            mixer.add(path, start=start, bus='voice')
+        sfx_mgr.generate_fact_sfx(sfx_timings, mixer=mixer)
+        self.engine.mix_background_music(mixer, total_dur, config.get('theme', 'vibrant_purple'))
         
-        final_raw = CompositeVideoClip(clips, size=(WIDTH, HEIGHT)).set_audio(final_audio)
+        final_raw = CompositeVideoClip(clips, size=(WIDTH, HEIGHT))
         
         try:
-            self.engine.render_with_effects(final_raw, script, output_path)
+            self.engine.render_with_effects(final_raw, script, output_path, mixer=mixer)
         finally:
             if self.engine.config.get('DELETE_TEMP_FILES', True):
                 import glob
@@ -6,14 +6,13 @@ UPDATED: Integrated USPContent for dynamic brand messaging.
 """
 
 import os
-import json
 import random
-import subprocess
-import concurrent.futures
-from moviepy.editor import CompositeAudioClip, AudioFileClip
+from audio_mixer import AudioMixer, SAMPLE_RATE
 from voice_manager import VoiceManager
 from sfx_manager import SFXManager
 from video_scheduler import VideoScheduler 
+from job_workspace import JobWorkspace
+from video_cutter import cut_video, copy_keyframes, snap_schedule
 import re  #
 
 # --- NEW INTEGRATION ---
@@ -22,83 +21,42 @@ from usp_content_variations import USPContent
 # --- CONFIG ---
 WIDTH = 1080
 HEIGHT = 1920
-PUBLIC_DIR = "./visual_engine_fact/public"
 
 class FactTemplate:
     def __init__(self, engine):
         self.engine = engine
     
-    def process_video_ffmpeg(self, video_path, schedule, output_path, temp_dir):
+    def generate(self, video_path, script, config, output_path, workspace=None):
+        """All phases back to back (the batch pipeline runs them as separate stages)."""
+        state = self.start(video_path, script, config, output_path, workspace)
+        self.synthesize(state)
+        self.prepare_video(state)
+        return self.export(state)
+
+    def start(self, video_path, script, config, output_path, workspace=None):
         """
-        1. Cuts segments using FFmpeg.
-        2. Crops to 9:16 (1080x1920).
-        3. Stitches them into one file.
-        """
-        chunk_files = []
-        concat_list_path = os.path.join(temp_dir, "concat_list.txt")
-
-        print(f"   🎞️  Processing {len(schedule)} video segments with FFmpeg...")
+        Sets up the job (workspace, voice, theme seed).
 
-        # 1. EXTRACT & CROP CHUNKS
-        for i, item in enumerate(schedule):
-            chunk_name = f"chunk_{i}.mp4"
-            chunk_path = os.path.join(temp_dir, chunk_name)
-            
-            # --- CHANGED: NO FILTERS ---
-            # We removed the '-vf' argument entirely.
-            # This preserves the source resolution, aspect ratio, and framing exactly.
-            cmd = [
-                'ffmpeg', '-y',
-                '-ss', str(item['start']),
-                '-t', str(item['duration']),
-                '-i', video_path,
-                # Removed '-vf' scale/crop/pad filters
-                '-c:v', 'libx264', '-preset', 'ultrafast', '-crf', '23', # Re-encode for clean cuts
-                '-an', # Remove audio
-                chunk_path
-            ]
-            
-            subprocess.call(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-            chunk_files.append(chunk_path)
-
-        # 2. CREATE CONCAT LIST
-        with open(concat_list_path, 'w') as f:
-            for chunk in chunk_files:
-                f.write(f"file '{os.path.abspath(chunk)}'\n")
-
-        # 3. CONCATENATE
-        print(f"   🎞️  Stitching final video -> {os.path.basename(output_path)}")
-        concat_cmd = [
-            'ffmpeg', '-y',
-            '-f', 'concat',
-            '-safe', '0',
-            '-i', concat_list_path,
-            '-c', 'copy', 
-            output_path
-        ]
-        subprocess.call(concat_cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-
-        # 4. CLEANUP CHUNKS
-        if os.path.exists(concat_list_path): os.remove(concat_list_path)
-        for chunk in chunk_files:
-            if os.path.exists(chunk): os.remove(chunk)
-
-    def generate(self, video_path, script, config, output_path):
-        # Define Paths
-        assets_dir = os.path.join(PUBLIC_DIR, "assets")
-        
-        # Ensure directories exist
-        os.makedirs(PUBLIC_DIR, exist_ok=True)
-        os.makedirs(assets_dir, exist_ok=True)
+        Returns:
+            dict: Job state handed to synthesize() / prepare_video() / export()
+        """
+        # Define Paths (private to this job)
+        if workspace is None:
+            workspace = JobWorkspace(os.path.splitext(os.path.basename(output_path))[0], self.engine.ENGINE_DIRS['fact'],
+                                     jobs_root=self.engine.config['DIRS'].get('JOBS', 'jobs'))
         
-        print(f"📝 Generating Fact Video & Data -> {PUBLIC_DIR}")
+        print(f"📝 Generating Fact Video & Data -> {workspace.public_dir}")
 
         # --- 1. SETUP ---
-        theme_seed = random.randint(10000, 99999); 
-        voice_mgr = self.engine.voice_manager
-        sfx_mgr = SFXManager()
-        selected_voice_key = config.get('voice') or voice_mgr.get_random_voice_name()
-        temp_dir = self.engine.config['DIRS']['TEMP']
+        return {
+            'video_path': video_path, 'script': script, 'config': config, 'output_path': output_path,
+            'workspace': workspace, 'theme_seed': random.randint(10000, 99999),
+            'voice_key': config.get('voice') or self.engine.voice_manager.get_random_voice_name()
+        }
+
+    def synthesize(self, state):
+        """Voice tracks + timeline (state['clips'], state['timings'], state['total_dur'])."""
+        script, workspace = state['script'], state['workspace']
 
         # --- 2. AUDIO GENERATION ---
         print("   🎙️  Synthesizing Audio...")
@@ -106,50 +64,70 @@ class FactTemplate:
         audio_tasks = {
             'hook': script['hook_spoken'],
             'title': script['fact_title'],
+            'details': script['fact_spoken'],
             'cta': script['cta_spoken']
         }
         
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            futures = {executor.submit(voice_mgr.generate_audio_with_specific_voice, text, f"{temp_dir}/{k}.mp3", selected_voice_key): k for k, text in audio_tasks.items()}
-            for f in concurrent.futures.as_completed(futures): pass
-
-        aud_hook = AudioFileClip(f"{temp_dir}/hook.mp3")
-        aud_title = AudioFileClip(f"{temp_dir}/title.mp3")
-        aud_cta = AudioFileClip(f"{temp_dir}/cta.mp3")
-        
-        voice_mgr.generate_audio_with_specific_voice(script['fact_spoken'], f"{temp_dir}/details.mp3", selected_voice_key)
-        aud_details = AudioFileClip(f"{temp_dir}/details.mp3")
+        # All segments in one batch (Edge segments share one event loop)
+        aud_clips = self.engine.voice_manager.generate_batch_with_specific_voice(
+            {k: (text, workspace.temp_path(f"{k}.mp3")) for k, text in audio_tasks.items()},
+            state['voice_key'], usage=workspace.voice_usage
+        )
+        for k, result in aud_clips.items():
+            if isinstance(result, Exception): raise result
 
         # --- 3. TIMINGS ---
         t_hook = 0
-        t_title = t_hook + aud_hook.duration
-        t_details = t_title + aud_title.duration
-        t_cta = t_details + aud_details.duration
-        t_outro = t_cta + aud_cta.duration
-        total_dur = t_outro + 4.0 # +4s Outro
-
+        t_title = t_hook + aud_clips['hook'].duration
+        t_details = t_title + aud_clips['title'].duration
+        t_cta = t_details + aud_clips['details'].duration
+        t_outro = t_cta + aud_clips['cta'].duration
+
+        state['clips'] = aud_clips
+        state['timings'] = {'hook': t_hook, 'title': t_title, 'details': t_details, 'cta': t_cta, 'outro': t_outro}
+        state['total_dur'] = t_outro + 4.0 # +4s Outro
+        return state
+
+    def prepare_video(self, state):
+        """Keyword-scheduled cuts of the lecture stitched into public/assets."""
         # --- 4. VIDEO PROCESSING (FFMPEG) ---
         print("   🧠 Scheduling Video Cuts...")
-        scheduler = VideoScheduler(temp_dir=temp_dir)
-        schedule = scheduler.schedule_clips(video_path, total_dur, script)
+        scheduler = VideoScheduler(temp_dir=state['workspace'].temp_dir)
+        schedule = scheduler.schedule_clips(state['video_path'], state['total_dur'], state['script'])
         
-        final_video_filename = "source_vid.mp4"
-        final_video_path = os.path.join(assets_dir, final_video_filename)
+        final_video_path = state['workspace'].asset_path("source_vid.mp4")
         
-        self.process_video_ffmpeg(video_path, schedule, final_video_path, temp_dir)
+        # Starts on keyframes: the cut can be stream-copied instead of re-encoded
+        cut_cfg = self.engine.config.get('VIDEO_CUT', {})
+        keyframes = copy_keyframes(state['video_path'], cut_cfg.get('MODE', 'auto'))
+        if keyframes:
+            schedule = snap_schedule(schedule, keyframes, cut_cfg.get('SNAP_SECONDS', 4.0))
+        if not cut_video(state['video_path'], schedule, final_video_path,
+                         mode=cut_cfg.get('MODE', 'auto'),
+                         tolerance=cut_cfg.get('KEYFRAME_TOLERANCE', 0.5),
+                         workers=cut_cfg.get('WORKERS', 4)):
+            raise RuntimeError(f"Video cut failed: {os.path.basename(state['video_path'])}")
+        return state
+
+    def export(self, state):
+        """Master audio + scenario_data.json."""
+        script, config, workspace = state['script'], state['config'], state['workspace']
+        aud_clips, total_dur, theme_seed = state['clips'], state['total_dur'], state['theme_seed']
+        timings = state['timings']
+        t_hook, t_title, t_details, t_cta, t_outro = (timings[k] for k in ('hook', 'title', 'details', 'cta', 'outro'))
 
         # --- 5. AUDIO MASTERING ---
         print("   🔊 Mastering Audio...")
-        sfx_clips = sfx_mgr.generate_fact_sfx({'title': t_title, 'details': t_details, 'cta': t_cta, 'outro': t_outro})
-        full_stack = [
-            aud_hook.set_start(t_hook), aud_title.set_start(t_title), 
-            aud_details.set_start(t_details), aud_cta.set_start(t_cta)
-        ] + sfx_clips
-        
-        final_audio = self.engine.add_background_music(CompositeAudioClip(full_stack), total_dur)
+        mixer = AudioMixer(sample_rate=SAMPLE_RATE)
+        for key, start in [('hook', t_hook), ('title', t_title), ('details', t_details), ('cta', t_cta)]:
+            mixer.add(aud_clips[key], start=start, bus='voice')
+        SFXManager().generate_fact_sfx({'title': t_title, 'details': t_details, 'cta': t_cta, 'outro': t_outro}, mixer=mixer)
+        self.engine.mix_background_music(mixer, total_dur, config.get('theme', 'energetic_yellow'))
         
-        final_audio_path = os.path.join(assets_dir, "audio_track.mp3")
-        final_audio.write_audiofile(final_audio_path, fps=44100, verbose=False, logger=None)
+        # Lossless / AAC master: Remotion encodes the only lossy generation
+        audio_track_name = f"audio_track{self.engine.master_audio_ext}"
+        final_audio_path = workspace.asset_path(audio_track_name)
+        mixer.write(final_audio_path, duration=total_dur)
 
        # --- 6. USP CONTENT & FORMATTING ---
         usp_hook = script['hook_visual']
@@ -201,13 +179,13 @@ class FactTemplate:
             },
             "assets": {
                 "video_src": "assets/source_vid.mp4",
-                "audio_track": "assets/audio_track.mp3",
+                "audio_track": f"assets/{audio_track_name}",
                 "thumb_src": "assets/thumbnail.jpg",
                 "logo_src": "assets/logo.png"
             },
             "timings": {
                 "t_title": t_title, "t_details": t_details,
-                "detailsAudioDuration": aud_details.duration,
+                "detailsAudioDuration": aud_clips['details'].duration,
                 "t_cta": t_cta, "t_outro": t_outro,
                 "total_duration": total_dur
             },
@@ -235,9 +213,7 @@ class FactTemplate:
         }
 
         # --- 8. WRITE JSON ---
-        json_path = os.path.join(PUBLIC_DIR, "scenario_data.json")
-        with open(json_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2)
+        json_path = workspace.write_scenario(data, indent=2)
             
         print(f"   ✅ JSON written to: {json_path}")
-        return {'json_path': json_path}
\ No newline at end of file
+        return {'duration': total_dur, 'json_path': json_path}
\ No newline at end of file
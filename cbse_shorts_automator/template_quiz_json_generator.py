@@ -3,28 +3,28 @@
 File: template_quiz_json_generator.py
 Purpose: Calculates timings and asset data, generates the final audio file, 
          and SAVES the resulting VisualScenario dictionary as scenario_data.json 
-         directly in the 'public' folder.
+         in the job workspace's 'public' folder.
 """
 
 import imagemagick_setup
 import os
 import math
-import concurrent.futures
-import json 
 import glob
 import random 
-from moviepy.editor import VideoFileClip, AudioFileClip, CompositeAudioClip
+from moviepy.editor import VideoFileClip
+from audio_mixer import AudioMixer, SAMPLE_RATE
 from voice_manager import VoiceManager 
 from sfx_manager import SFXManager
 from video_processor import VideoProcessor
 from usp_content_variations import USPContent 
 from visual_effects_quiz import res_scale, set_resolution
+from job_workspace import JobWorkspace
+from word_timings import shift_words
 
 # --- CONSTANTS ---
 WIDTH = 1080
 HEIGHT = 1920
 FPS = 24 
-AUDIO_SAMPLE_RATE = 44100 
 
 # --- (LayoutGaps and LayoutPositions classes omitted for brevity) ---
 
@@ -32,7 +32,20 @@ class QuizTemplate:
     def __init__(self, engine):
         self.engine = engine
     
-    def generate(self, video_path, script, config, output_path):
+    def generate(self, video_path, script, config, output_path, workspace=None):
+        """All phases back to back (the batch pipeline runs them as separate stages)."""
+        state = self.start(video_path, script, config, output_path, workspace)
+        self.synthesize(state)
+        self.prepare_video(state)
+        return self.export(state)
+
+    def start(self, video_path, script, config, output_path, workspace=None):
+        """
+        Sets up the job (resolution, voice, workspace, asset paths).
+
+        Returns:
+            dict: Job state handed to synthesize() / prepare_video() / export()
+        """
         print("📝 Generating VisualScenario JSON structure...")
     
         # ============================================================
@@ -47,39 +60,27 @@ class QuizTemplate:
         WIDTH = target_width
         HEIGHT = target_height
         
-        voice_mgr = self.engine.voice_manager
-        sfx_mgr = SFXManager()
-        
         voice_name = config.get('voice', 'NeeraNeural2')
-        selected_voice_key = voice_name if voice_name else voice_mgr.get_random_voice_name()
-        video_proc = VideoProcessor(temp_dir=self.engine.config['DIRS']['TEMP'])
-        
+        selected_voice_key = voice_name if voice_name else self.engine.voice_manager.get_random_voice_name()
         vid_id = os.path.basename(output_path).split('.')[0]
-        temp_dir = self.engine.config['DIRS']['TEMP']
-        audio_files = [] 
         
-        # Define the base directory for public assets and the corrected JSON path
-        BASE_PUBLIC_DIR = "visual_engine_v3/public"
-        FINAL_ASSETS_DIR = f"{BASE_PUBLIC_DIR}/assets"
+        # Job-private workspace: temp files + its own public/ folder for Remotion
+        if workspace is None:
+            workspace = JobWorkspace(vid_id, self.engine.ENGINE_DIRS['quiz'],
+                                     jobs_root=self.engine.config['DIRS'].get('JOBS', 'jobs'))
         
-        # CORRECTED JSON OUTPUT PATH: directly in public folder
-        JSON_OUTPUT_PATH = f"{BASE_PUBLIC_DIR}/scenario_data.json" 
-        
-        # Define asset file paths (relative to BASE_PUBLIC_DIR/assets)
-        FINAL_AUDIO_FILENAME = f"{vid_id}_final_audio.mp3"
-        FINAL_AUDIO_PATH = f"{FINAL_ASSETS_DIR}/{FINAL_AUDIO_FILENAME}"
+        return {
+            'video_path': video_path, 'script': script, 'config': config, 'output_path': output_path,
+            'workspace': workspace, 'vid_id': vid_id, 'voice_key': selected_voice_key,
+            'width': WIDTH, 'height': HEIGHT,
+            'audio_files': []
+        }
+
+    def synthesize(self, state):
+        """Voice tracks + timeline (state['clips'], state['timings'], state['total_dur'])."""
+        script, workspace, vid_id = state['script'], state['workspace'], state['vid_id']
+        voice_mgr = self.engine.voice_manager
 
-        SOURCE_VIDEO_PATH = f"{FINAL_ASSETS_DIR}/source_video.mp4"
-        
-        # Asset URLs (All relative to the public root)
-        FINAL_AUDIO_URL = f"/assets/{FINAL_AUDIO_FILENAME}"
-        SOURCE_VIDEO_URL = "/assets/source_video.mp4" 
-        CHANNEL_LOGO_URL = "/assets/logo.png"
-        THUMBNAIL_URL = "/assets/thumbnail.jpg"
-        FONT_URL = "/assets/font.woff"
-        ENV_MAP_URL = "/assets/environment.hdr"
-        CLOUD_MAP_URL = "/assets/cloud.png"
-        
         # 1. Sequential Audio Generation (Individual Voice Tracks)
         print("   🎙️  Synthesizing voiceover tracks...")
         audio_tasks = {
@@ -91,20 +92,16 @@ class QuizTemplate:
             'cta': script['cta_spoken']
         }
         
-        generated_audio_paths = {}
-        aud_clips = {}
+        generated_audio_paths = {k: workspace.temp_path(f"{vid_id}_{k}.mp3") for k in audio_tasks}
+        state['audio_files'].extend(generated_audio_paths.values())
         
-        def generate_single_audio(key, text):
-            path = f"{temp_dir}/{vid_id}_{key}.mp3"
-            voice_mgr.generate_audio_with_specific_voice(text, path, selected_voice_key, provider='google')
-            return key, path
-
-        with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-            futures = [executor.submit(generate_single_audio, k, t) for k, t in audio_tasks.items()]
-            for future in concurrent.futures.as_completed(futures):
-                k, path = future.result()
-                generated_audio_paths[k] = path
-                audio_files.append(path)    
+        # All segments in one batch (Edge segments share one event loop)
+        aud_clips = voice_mgr.generate_batch_with_specific_voice(
+            {k: (t, generated_audio_paths[k]) for k, t in audio_tasks.items()},
+            state['voice_key'], provider='google', usage=workspace.voice_usage
+        )
+        for k, result in aud_clips.items():
+            if isinstance(result, Exception): raise result
 
         # for k, t in audio_tasks.items():
         #     try:
@@ -118,68 +115,83 @@ class QuizTemplate:
         #             for f in audio_files:
         #                 if os.path.exists(f): os.remove(f)
         #         raise 
-        aud_hook = AudioFileClip(generated_audio_paths['hook'])
-        aud_q = AudioFileClip(generated_audio_paths['question'])
-        aud_a = AudioFileClip(generated_audio_paths['opt_a'])
-        aud_b = AudioFileClip(generated_audio_paths['opt_b'])
-        aud_c = AudioFileClip(generated_audio_paths['opt_c'])
-        aud_d = AudioFileClip(generated_audio_paths['opt_d'])
-        aud_think = AudioFileClip(generated_audio_paths['think'])
-        aud_expl = AudioFileClip(generated_audio_paths['explanation'])
-        aud_cta = AudioFileClip(generated_audio_paths['cta'])
    
         # 2. Timing Calculations
-        # aud_hook, aud_q, aud_a, aud_b, aud_c, aud_d, aud_expl, aud_cta = (
-        #     aud_clips['hook'], aud_clips['question'], aud_clips['opt_a'], aud_clips['opt_b'], 
-        #     aud_clips['opt_c'], aud_clips['opt_d'], aud_clips['explanation'], aud_clips['cta']
-        # )
-        
         THINK_TIME = 3.0 
         t_hook = 0
-        t_q = t_hook + aud_hook.duration
-        t_a = t_q + aud_q.duration
-        t_b = t_a + aud_a.duration
-        t_c = t_b + aud_b.duration
-        t_d = t_c + aud_c.duration
-        t_think = t_d + aud_d.duration
+        t_q = t_hook + aud_clips['hook'].duration
+        t_a = t_q + aud_clips['question'].duration
+        t_b = t_a + aud_clips['opt_a'].duration
+        t_c = t_b + aud_clips['opt_b'].duration
+        t_d = t_c + aud_clips['opt_c'].duration
+        t_think = t_d + aud_clips['opt_d'].duration
         t_ans = t_think + THINK_TIME
-        t_cta = t_ans + aud_expl.duration
-        t_outro = t_cta + max(aud_cta.duration,6)
+        t_cta = t_ans + aud_clips['explanation'].duration
+        t_outro = t_cta + max(aud_clips['cta'].duration,6)
         
         OUTRO_DURATION = 7.0
-        total_dur = t_outro + OUTRO_DURATION
+        state['clips'] = aud_clips
+        state['think_time'] = THINK_TIME
+        state['timings'] = {
+            'hook': t_hook, 'q': t_q, 'a': t_a, 'b': t_b, 'c': t_c, 'd': t_d,
+            'think': t_think, 'ans': t_ans, 'cta': t_cta, 'outro': t_outro
+        }
+        state['total_dur'] = t_outro + OUTRO_DURATION
+        return state
+
+    def prepare_video(self, state):
+        """Source video clip selection + encode into public/assets."""
+        total_dur = state['total_dur']
+        video_proc = VideoProcessor(temp_dir=state['workspace'].temp_dir)
+        SOURCE_VIDEO_PATH = state['workspace'].asset_path("source_video.mp4")
 
         print(f"   🧠 AI Watching video to find relevant clips ({int(total_dur)}s)...")
-        src_vid = video_proc.prepare_video_for_short(video_path, total_dur, script=script, width=WIDTH)
+        src_vid = video_proc.prepare_video_for_short(state['video_path'], total_dur, script=state['script'], width=state['width'])
+        # Picture only: Remotion plays the source muted, the sound is the master mix below
         src_vid.write_videofile(
             SOURCE_VIDEO_PATH,
-            codec='libx264',  # Standard codec for MP4 files # Standard audio codec
+            codec='libx264',  # Standard codec for MP4 files
+            audio=False,      # No lecture-audio decode / AAC encode / mux pass
             fps=30             # Set the desired frames per second (e.g., 24, 30, or original fps)
         )
+        return state
+
+    def export(self, state):
+        """Master audio + scenario_data.json."""
+        script, config, workspace, vid_id = state['script'], state['config'], state['workspace'], state['vid_id']
+        aud_clips, total_dur, THINK_TIME = state['clips'], state['total_dur'], state['think_time']
+        sfx_timings = state['timings']
+        t_hook, t_q, t_a, t_b, t_c, t_d = (sfx_timings[k] for k in ('hook', 'q', 'a', 'b', 'c', 'd'))
+        t_think, t_ans, t_cta, t_outro = (sfx_timings[k] for k in ('think', 'ans', 'cta', 'outro'))
+
+        # Define asset file paths (relative to the workspace public/assets)
+        FINAL_AUDIO_FILENAME = f"{vid_id}_final_audio{self.engine.master_audio_ext}"  # wav / m4a, see AUDIO.MASTER_FORMAT
+        FINAL_AUDIO_PATH = workspace.asset_path(FINAL_AUDIO_FILENAME)
+        
+        # Asset URLs (All relative to the public root)
+        FINAL_AUDIO_URL = f"/assets/{FINAL_AUDIO_FILENAME}"
+        SOURCE_VIDEO_URL = "/assets/source_video.mp4" 
+        CHANNEL_LOGO_URL = "/assets/logo.png"
+        THUMBNAIL_URL = "/assets/thumbnail.jpg"
+        FONT_URL = "/assets/font.woff"
+        ENV_MAP_URL = "/assets/environment.hdr"
+        CLOUD_MAP_URL = "/assets/cloud.png"
 
         # 3. Final Audio Generation
         print("   🔊 Compiling final audio track...")
-        sfx_timings = {
-            'q': t_q, 'a': t_a, 'b': t_b, 'c': t_c, 'd': t_d,
-            'think': t_think, 'ans': t_ans, 'cta': t_cta, 'outro': t_outro
-        }
-        sfx_clips = sfx_mgr.generate_quiz_sfx(sfx_timings)
-        
-        audio_list = [
-            aud_hook.set_start(t_hook), aud_q.set_start(t_q), aud_a.set_start(t_a),
-            aud_b.set_start(t_b), aud_c.set_start(t_c), aud_d.set_start(t_d),
-            aud_think.set_start(t_think), aud_expl.set_start(t_ans), aud_cta.set_start(t_cta)
-        ]
-        full_audio_stack = audio_list + sfx_clips
-        composite_audio = CompositeAudioClip(full_audio_stack)
-        final_audio = self.engine.add_background_music(composite_audio, total_dur)
-        
-        # FIX: Explicitly set the sampling frequency (fps)
-        final_audio.fps = AUDIO_SAMPLE_RATE 
+        # Voice, SFX and music are decoded once and mixed as arrays (audio_mixer.py)
+        mixer = AudioMixer(sample_rate=SAMPLE_RATE)
+        for key, start in [
+            ('hook', t_hook), ('question', t_q), ('opt_a', t_a),
+            ('opt_b', t_b), ('opt_c', t_c), ('opt_d', t_d),
+            ('think', t_think), ('explanation', t_ans), ('cta', t_cta)
+        ]:
+            mixer.add(aud_clips[key], start=start, bus='voice')
+        SFXManager().generate_quiz_sfx({k: v for k, v in sfx_timings.items() if k != 'hook'}, mixer=mixer)
+        self.engine.mix_background_music(mixer, total_dur, config.get('theme', 'energetic_yellow'))
         
         # Write the final audio
-        os.makedirs(os.path.dirname(FINAL_AUDIO_PATH), exist_ok=True)
-        final_audio.write_audiofile(FINAL_AUDIO_PATH, logger=None)
+        mixer.write(FINAL_AUDIO_PATH, duration=total_dur)
         print(f"   ✅ Final audio saved to {FINAL_AUDIO_PATH}")
         
         # 4. Dynamic Content Lookups
@@ -205,7 +217,7 @@ class QuizTemplate:
         scenario_data = {
             "meta": {
                 "version": config.get('version', '1.0.0'), 
-                "resolution": {"w": WIDTH, "h": HEIGHT},
+                "resolution": {"w": state['width'], "h": state['height']},
                 "seed": config.get('seed', random.randint(1000, 9999)),
                 "duration_seconds": round(total_dur, 2),
             },
@@ -221,7 +233,11 @@ class QuizTemplate:
             "timeline": {
                 "hook": {"start_time": t_hook, "text_content": hook_text},
                 "quiz": {
-                    "question": {"text": script['question_visual'], "start_time": t_q},
+                    "question": {
+                        "text": script['question_visual'], "start_time": t_q,
+                        # Spoken word timings: the typewriter follows the voice
+                        "words": shift_words(getattr(aud_clips['question'], 'words', None), t_q)
+                    },
                     "options": options_array,
                 },
                 "timer": {"start_time": t_think, "duration": THINK_TIME, "label_text": timer_label_text},
@@ -241,17 +257,14 @@ class QuizTemplate:
             "yt_overlay": {"progress_start": t_q, "progress_end": progress_end},
         }
 
-        # 6. WRITE JSON FILE TO TARGET PATH
-        # Ensure the 'public' directory exists
-        os.makedirs(os.path.dirname(JSON_OUTPUT_PATH), exist_ok=True)
-        with open(JSON_OUTPUT_PATH, 'w') as f:
-            json.dump(scenario_data, f, indent=4)
+        # 6. WRITE JSON FILE TO THE WORKSPACE PUBLIC FOLDER
+        json_path = workspace.write_scenario(scenario_data, indent=4)
         
-        print(f"   ✅ JSON Scenario successfully written to: {JSON_OUTPUT_PATH}")
+        print(f"   ✅ JSON Scenario successfully written to: {json_path}")
 
         # 7. Cleanup (Clean intermediate voice tracks)
         if self.engine.config.get('DELETE_TEMP_FILES', True):
-            for f in audio_files:
+            for f in state['audio_files']:
                 if os.path.exists(f): os.remove(f)
 
-        return {'duration': total_dur}
\ No newline at end of file
+        return {'duration': total_dur, 'json_path': json_path}
\ No newline at end of file
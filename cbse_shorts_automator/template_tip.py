@@ -8,7 +8,8 @@ UPDATED: Bigger Fonts, Higher Positioning, Better Readability.
 import imagemagick_setup
 import os
 import concurrent.futures
-from moviepy.editor import CompositeVideoClip, CompositeAudioClip, TextClip, AudioFileClip, vfx
+from moviepy.editor import CompositeVideoClip, TextClip, AudioFileClip, vfx
+from audio_mixer import AudioMixer, SAMPLE_RATE
 from voice_manager import VoiceManager
 from karaoke_manager import KaraokeManager
 from video_processor import VideoProcessor
@@ -199,23 +200,17 @@ class TipTemplate:
             'cta': t_cta,
             'outro': t_outro
         }
-        sfx_clips = sfx_mgr.generate_tip_sfx(sfx_timings)
-
-
-        audio_list = [
-            aud_hook.set_start(t_hook), 
-            aud_title.set_start(t_title), 
-            aud_content.set_start(t_content), 
-            aud_bonus.set_start(t_bonus), 
-            aud_cta.set_start(t_cta)
-        ]
-        
-        full_audio_stack = audio_list + sfx_clips # Combine Voice + SFX
-        final_audio = self.engine.add_background_music(CompositeAudioClip(full_audio_stack), total_dur)
-        final_raw = CompositeVideoClip(clips, size=(WIDTH, HEIGHT)).set_audio(final_audio)
+        # Voice + SFX + music mixed as arrays, muxed with the picture in one ffmpeg call
+        mixer = AudioMixer(sample_rate=SAMPLE_RATE)
+        for key, start in [('hook', t_hook), ('title', t_title), ('content', t_content),
+                           ('bonus', t_bonus), ('cta', t_cta)]:
+            mixer.add(generated_audio_paths[key], start=start, bus='voice')
+        sfx_mgr.generate_tip_sfx(sfx_timings, mixer=mixer)
+        self.engine.mix_background_music(mixer, total_dur, config.get('theme', 'fresh_green'))
+        final_raw = CompositeVideoClip(clips, size=(WIDTH, HEIGHT))
         
         try:
-            self.engine.render_with_effects(final_raw, script, output_path)
+            self.engine.render_with_effects(final_raw, script, output_path, mixer=mixer)
         finally:
             if self.engine.config.get('DELETE_TEMP_FILES', True):
                 import glob
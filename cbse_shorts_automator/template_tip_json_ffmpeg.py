@@ -7,108 +7,68 @@ that drives the Remotion Engine.
 """
 
 import os
-import json
 import random
-import subprocess
-import concurrent.futures
-from moviepy.editor import AudioFileClip, CompositeAudioClip, VideoFileClip
+from moviepy.editor import VideoFileClip
+from audio_mixer import AudioMixer, SAMPLE_RATE
 from voice_manager import VoiceManager
 from sfx_manager import SFXManager
 from video_scheduler import VideoScheduler 
+from job_workspace import JobWorkspace
+from video_cutter import cut_video, copy_keyframes, snap_schedule
 import re  #
 # Import the USP helper
 from usp_content_variations import USPContent
 
-PUBLIC_DIR = "./visual_engine_tip/public"
-
 class TipTemplate:
     def __init__(self, engine):
         self.engine = engine
         self.config = engine.config
         
 
-    def process_video_ffmpeg(self, video_path, schedule, output_path, temp_dir):
+    def generate(self, video_path, script, config, output_path, workspace=None):
         """
-        1. Cuts segments using FFmpeg.
-        2. Crops to 9:16 (1080x1920).
-        3. Stitches them into one file.
+        Generates the assets and the JSON payload (all phases back to back;
+        the batch pipeline runs them as separate stages).
+        output_path: Final video path (its basename names the job)
+        workspace: JobWorkspace receiving temp files, assets and scenario_data.json
         """
-        chunk_files = []
-        concat_list_path = os.path.join(temp_dir, "concat_list.txt")
-
-        print(f"   🎞️  Processing {len(schedule)} video segments with FFmpeg...")
-
-        # 1. EXTRACT & CROP CHUNKS
-        for i, item in enumerate(schedule):
-            chunk_name = f"chunk_{i}.mp4"
-            chunk_path = os.path.join(temp_dir, chunk_name)
-            
-            # --- CHANGED: NO FILTERS ---
-            # We removed the '-vf' argument entirely.
-            # This preserves the source resolution, aspect ratio, and framing exactly.
-            cmd = [
-                'ffmpeg', '-y',
-                '-ss', str(item['start']),
-                '-t', str(item['duration']),
-                '-i', video_path,
-                # Removed '-vf' scale/crop/pad filters
-                '-c:v', 'libx264', '-preset', 'ultrafast', '-crf', '23', # Re-encode for clean cuts
-                '-an', # Remove audio
-                chunk_path
-            ]
-            
-            subprocess.call(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-            chunk_files.append(chunk_path)
-
-        # 2. CREATE CONCAT LIST
-        with open(concat_list_path, 'w') as f:
-            for chunk in chunk_files:
-                f.write(f"file '{os.path.abspath(chunk)}'\n")
-
-        # 3. CONCATENATE
-        print(f"   🎞️  Stitching final video -> {os.path.basename(output_path)}")
-        concat_cmd = [
-            'ffmpeg', '-y',
-            '-f', 'concat',
-            '-safe', '0',
-            '-i', concat_list_path,
-            '-c', 'copy', 
-            output_path
-        ]
-        subprocess.call(concat_cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        state = self.start(video_path, script, config, output_path, workspace)
+        self.synthesize(state)
+        self.prepare_video(state)
+        return self.export(state)
 
-        # 4. CLEANUP CHUNKS
-        if os.path.exists(concat_list_path): os.remove(concat_list_path)
-        for chunk in chunk_files:
-            if os.path.exists(chunk): os.remove(chunk)
-
-    
-    def generate(self, video_path, script, config, output_path):
+    def start(self, video_path, script, config, output_path, workspace=None):
         """
-        Generates the assets and the JSON payload.
-        output_path: Path where the final JSON should be saved (e.g., .../scenario_data.json)
+        Sets up the job (IDs, workspace, voice).
+
+        Returns:
+            dict: Job state handed to synthesize() / prepare_video() / export()
         """
-        WIDTH=config.get('width',1080)
-        HEIGHT=config.get('height',1920)
         print("📝 Directing Tip Scenario (JSON Generation)...")
         
         # 1. Setup Directories & IDs
         # ---------------------------------------------------------------------
         vid_id = os.path.basename(output_path).split('.')[0]
-        temp_dir = self.engine.config['DIRS']['TEMP']
-        assets_dir = os.path.join(PUBLIC_DIR, "assets")
-        
-        # Ensure assets folder exists
-        os.makedirs(assets_dir, exist_ok=True)
+        if workspace is None:
+            workspace = JobWorkspace(vid_id, self.engine.ENGINE_DIRS['tip'],
+                                     jobs_root=self.engine.config['DIRS'].get('JOBS', 'jobs'))
 
         voice_name = config.get('voice', 'NeeraNeural2')
-        voice_mgr = self.engine.voice_manager
-        sfx_mgr = SFXManager()
         
         # Select Voice
-        selected_voice_key = voice_name if voice_name else voice_mgr.get_random_voice_name()
+        selected_voice_key = voice_name if voice_name else self.engine.voice_manager.get_random_voice_name()
         print(f"   🎤 Using voice: {selected_voice_key}")
 
+        return {
+            'video_path': video_path, 'script': script, 'config': config, 'output_path': output_path,
+            'workspace': workspace, 'vid_id': vid_id, 'voice_key': selected_voice_key,
+            'width': config.get('width', 1080), 'height': config.get('height', 1920)
+        }
+
+    def synthesize(self, state):
+        """Voice tracks + timeline (state['clips'], state['timings'], state['total_dur'])."""
+        script, workspace, vid_id = state['script'], state['workspace'], state['vid_id']
+
         # 2. Audio Generation (Parallel TTS)
         # ---------------------------------------------------------------------
         print("   🎙️  Synthesizing voiceover tracks...")
@@ -120,78 +80,38 @@ class TipTemplate:
             'cta': script['cta_spoken']
         }
         
-        generated_audio_paths = {}
-        audio_files_to_cleanup = []
-
-        def generate_single_audio(key, text):
-            path = f"{temp_dir}/{vid_id}_{key}.mp3"
-            voice_mgr.generate_audio_with_specific_voice(text, path, selected_voice_key, provider='google')
-            return key, path
-
-        with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-            futures = [executor.submit(generate_single_audio, k, t) for k, t in audio_tasks.items()]
-            for future in concurrent.futures.as_completed(futures):
-                k, path = future.result()
-                generated_audio_paths[k] = path
-                audio_files_to_cleanup.append(path)
+        generated_audio_paths = {k: workspace.temp_path(f"{vid_id}_{k}.mp3") for k in audio_tasks}
+        state['audio_files'] = list(generated_audio_paths.values())
 
-        # Load Audio Clips for Duration Calculation
-        aud_hook = AudioFileClip(generated_audio_paths['hook'])
-        aud_title = AudioFileClip(generated_audio_paths['title'])
-        aud_content = AudioFileClip(generated_audio_paths['content'])
-        aud_bonus = AudioFileClip(generated_audio_paths['bonus'])
-        aud_cta = AudioFileClip(generated_audio_paths['cta'])
+        # All segments in one batch (Edge segments share one event loop)
+        aud_clips = self.engine.voice_manager.generate_batch_with_specific_voice(
+            {k: (t, generated_audio_paths[k]) for k, t in audio_tasks.items()},
+            state['voice_key'], provider='google', usage=workspace.voice_usage
+        )
+        for k, result in aud_clips.items():
+            if isinstance(result, Exception): raise result
 
         # 3. Calculate Timings
         # ---------------------------------------------------------------------
         # We calculate precise start times for the timeline
         t_hook = 0.0
-        t_title = t_hook + aud_hook.duration + 0.5
-        t_content = t_title + aud_title.duration
-        t_bonus = t_content + aud_content.duration + 0.5
-        t_cta = t_bonus + aud_bonus.duration + 1
-        t_outro = t_cta + aud_cta.duration + 2
+        t_title = t_hook + aud_clips['hook'].duration + 0.5
+        t_content = t_title + aud_clips['title'].duration
+        t_bonus = t_content + aud_clips['content'].duration + 0.5
+        t_cta = t_bonus + aud_clips['bonus'].duration + 1
+        t_outro = t_cta + aud_clips['cta'].duration + 2
         
         OUTRO_DURATION = 4.0
-        total_dur = t_outro + OUTRO_DURATION
-
-        # 4. Audio Mixing (Voice + SFX + BGM)
-        # ---------------------------------------------------------------------
-        print("   🔊 Engineering Master Audio Mix...")
-        
-        # A. Voice Layer
-        voice_clips = [
-            aud_hook.set_start(t_hook),
-            aud_title.set_start(t_title),
-            aud_content.set_start(t_content),
-            aud_bonus.set_start(t_bonus),
-            aud_cta.set_start(t_cta)
-        ]
+        state['clips'] = aud_clips
+        state['outro_duration'] = OUTRO_DURATION
+        state['timings'] = {'hook': t_hook, 'title': t_title, 'content': t_content,
+                            'bonus': t_bonus, 'cta': t_cta, 'outro': t_outro}
+        state['total_dur'] = t_outro + OUTRO_DURATION
+        return state
 
-        # B. SFX Layer (Using SFXManager)
-        sfx_timings = {
-            'title': t_title,
-            'content': t_content,
-            'bonus': t_bonus,
-            'cta': t_cta,
-            'outro': t_outro
-        }
-        # Assuming sfx_mgr returns AudioFileClips positioned at correct times
-        sfx_clips = sfx_mgr.generate_tip_sfx(sfx_timings) 
-
-        # C. Background Music Layer
-        # Assuming engine has a BGM helper, if not, simple load:
-        # bgm = AudioFileClip("path/to/bgm.mp3").volumex(0.1).set_duration(total_dur)
-        # We'll use the composite first to get length, then add BGM via engine helper if available
-        composite_voice_sfx = CompositeAudioClip(voice_clips + sfx_clips)
-        
-        # Use engine helper to add BGM and duck volume under voice
-        final_audio = self.engine.add_background_music(composite_voice_sfx, total_dur)
-
-        # D. Export Master Audio Asset
-        master_audio_filename = "audio_track.mp3"
-        master_audio_path = os.path.join(assets_dir, master_audio_filename)
-        final_audio.write_audiofile(master_audio_path, fps=44100, verbose=False, logger=None)
+    def prepare_video(self, state):
+        """Keyword-scheduled cuts of the lecture stitched into public/assets."""
+        total_dur = state['total_dur']
 
         # 5. Video Asset Preparation
         # ---------------------------------------------------------------------
@@ -201,13 +121,60 @@ class TipTemplate:
 
         # --- 4. VIDEO PROCESSING (FFMPEG) ---
         print("   🧠 Scheduling Video Cuts...")
-        scheduler = VideoScheduler(temp_dir=temp_dir)
-        schedule = scheduler.schedule_clips(video_path, total_dur, script)
+        scheduler = VideoScheduler(temp_dir=state['workspace'].temp_dir)
+        schedule = scheduler.schedule_clips(state['video_path'], total_dur, state['script'])
         
-        final_video_filename = "source_vid.mp4"
-        final_video_path = os.path.join(assets_dir, final_video_filename)
+        final_video_path = state['workspace'].asset_path("source_vid.mp4")
         
-        self.process_video_ffmpeg(video_path, schedule, final_video_path, temp_dir)
+        # Starts on keyframes: the cut can be stream-copied instead of re-encoded
+        cut_cfg = self.engine.config.get('VIDEO_CUT', {})
+        keyframes = copy_keyframes(state['video_path'], cut_cfg.get('MODE', 'auto'))
+        if keyframes:
+            schedule = snap_schedule(schedule, keyframes, cut_cfg.get('SNAP_SECONDS', 4.0))
+        if not cut_video(state['video_path'], schedule, final_video_path,
+                         mode=cut_cfg.get('MODE', 'auto'),
+                         tolerance=cut_cfg.get('KEYFRAME_TOLERANCE', 0.5),
+                         workers=cut_cfg.get('WORKERS', 4)):
+            raise RuntimeError(f"Video cut failed: {os.path.basename(state['video_path'])}")
+        return state
+
+    def export(self, state):
+        """Master audio + scenario_data.json."""
+        script, config, workspace = state['script'], state['config'], state['workspace']
+        aud_clips, total_dur, OUTRO_DURATION = state['clips'], state['total_dur'], state['outro_duration']
+        WIDTH, HEIGHT = state['width'], state['height']
+        sfx_timings = {k: v for k, v in state['timings'].items() if k != 'hook'}
+        t_hook = state['timings']['hook']
+        t_title, t_content, t_bonus = sfx_timings['title'], sfx_timings['content'], sfx_timings['bonus']
+        t_cta, t_outro = sfx_timings['cta'], sfx_timings['outro']
+        aud_hook, aud_title, aud_content, aud_bonus, aud_cta = (
+            aud_clips[k] for k in ('hook', 'title', 'content', 'bonus', 'cta'))
+
+        # 4. Audio Mixing (Voice + SFX + BGM)
+        # ---------------------------------------------------------------------
+        print("   🔊 Engineering Master Audio Mix...")
+        
+        # Every source is decoded once and mixed as arrays (audio_mixer.py)
+        mixer = AudioMixer(sample_rate=SAMPLE_RATE)
+
+        # A. Voice Layer
+        mixer.add(aud_hook, start=t_hook, bus='voice')
+        mixer.add(aud_title, start=t_title, bus='voice')
+        mixer.add(aud_content, start=t_content, bus='voice')
+        mixer.add(aud_bonus, start=t_bonus, bus='voice')
+        mixer.add(aud_cta, start=t_cta, bus='voice')
+
+        # B. SFX Layer (Using SFXManager)
+        SFXManager().generate_tip_sfx(sfx_timings, mixer=mixer)
+
+        # C. Background Music Layer (leveled by the engine helper, ducked under the voice bus)
+        self.engine.mix_background_music(mixer, total_dur, config.get('theme', 'energetic_yellow'))
+
+        # D. Export Master Audio Asset
+        # Lossless / AAC master: Remotion encodes the only lossy generation
+        audio_track_name = f"audio_track{self.engine.master_audio_ext}"
+        master_audio_path = workspace.asset_path(audio_track_name)
+        mixer.write(master_audio_path, duration=total_dur)
 
         # 6. JSON Data Construction
         # ---------------------------------------------------------------------
@@ -240,7 +207,7 @@ class TipTemplate:
                 "video_src": f"/assets/source_vid.mp4", # [cite: 54]
                 "thumb_src": "/assets/thumbnail.jpg",    # [cite: 55] (Placeholder/Static)
                 "logo_src": "/assets/logo.png",# [cite: 56]
-                "audio_track": f"/assets/audio_track.mp3"# [cite: 57]
+                "audio_track": f"/assets/{audio_track_name}"# [cite: 57]
             },
             "timings": {
                 "hook": {
@@ -295,17 +262,15 @@ class TipTemplate:
         # 7. Write JSON Output
         # ---------------------------------------------------------------------
         # --- 8. WRITE JSON ---
-        json_path = os.path.join(PUBLIC_DIR, "scenario_data.json")
-        with open(json_path, 'w', encoding='utf-8') as f:
-            json.dump(scenario_data, f, indent=2, ensure_ascii=False)
+        json_path = workspace.write_scenario(scenario_data, indent=2, ensure_ascii=False)
 
-        print(f"✅ Scenario generated: {output_path}")
+        print(f"✅ Scenario generated: {json_path}")
 
         # 8. Cleanup Temp Files
         # ---------------------------------------------------------------------
         if self.engine.config.get('DELETE_TEMP_FILES', True):
-            for f in audio_files_to_cleanup:
+            for f in state['audio_files']:
                 try: os.remove(f)
                 except: pass
 
-        return {'duration': total_dur, 'json_path': output_path}
\ No newline at end of file
+        return {'duration': total_dur, 'json_path': json_path}
\ No newline at end of file
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+File: test_video_cutter.py
+Purpose: OFFLINE test of video_cutter.py on a synthetic H.264 source.
+Every output is decoded end to end (ffmpeg -xerror) so a broken join
+fails the test, and its frame count is checked against the schedule.
+Needs only ffmpeg (the keyframe list is known, so no ffprobe).
+"""
+
+import os
+import shutil
+import tempfile
+import subprocess
+
+from video_cutter import cut_video, cut_segments, cut_segments_copy, snap_schedule
+
+FPS = 24
+GOP_SECONDS = 2  # Fixed keyint: keyframes at 0, 2, 4, ...
+SOURCE_SECONDS = 40
+
+
+def make_source(path):
+    """testsrc2 encoded with a fixed GOP and no scene-cut keyframes."""
+    cmd = [
+        'ffmpeg', '-y', '-nostdin', '-v', 'error',
+        '-f', 'lavfi', '-i', f"testsrc2=size=320x240:rate={FPS}",
+        '-t', str(SOURCE_SECONDS),
+        '-c:v', 'libx264', '-preset', 'ultrafast', '-pix_fmt', 'yuv420p',
+        '-g', str(FPS * GOP_SECONDS), '-keyint_min', str(FPS * GOP_SECONDS), '-sc_threshold', '0',
+        path
+    ]
+    subprocess.run(cmd, check=True)
+    return {
+        'codec': 'h264', 'pix_fmt': 'yuv420p', 'width': 320, 'height': 240,
+        'keyframes': [float(t) for t in range(0, SOURCE_SECONDS, GOP_SECONDS)]
+    }
+
+
+def decoded_frames(path):
+    """Frames decoded from path, or -1 if any decode error occurs."""
+    if not os.path.exists(path): return -1
+    proc = subprocess.run(['ffmpeg', '-nostdin', '-v', 'error', '-xerror', '-i', path, '-f', 'framecrc', '-'],
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    if proc.returncode != 0 or proc.stderr.strip(): return -1
+    return sum(1 for line in proc.stdout.splitlines() if line and not line.startswith('#'))
+
+
+def check(label, ok):
+    print(f"   {'✅' if ok else '❌'} {label}")
+    return ok
+
+
+def run_tests():
+    work = tempfile.mkdtemp()
+    results = []
+    print("🚀 VIDEO CUTTER TEST (synthetic source)")
+
+    try:
+        src = os.path.join(work, "src.mp4")
+        info = make_source(src)
+
+        # Off-keyframe cuts, out of order, far apart
+        schedule = [{'start': 3.1, 'duration': 2.5}, {'start': 31.0, 'duration': 3.0}, {'start': 15.2, 'duration': 2.0}]
+        expected = int(round(sum(item['duration'] for item in schedule) * FPS))
+
+        # 1. Single-pass encode: one input per segment, one concat graph
+        out = os.path.join(work, "encode.mp4")
+        ok = cut_segments(src, schedule, out, debug=False)
+        frames = decoded_frames(out)
+        results.append(check(f"Encode: decodes cleanly, {frames}/{expected} frames", ok and frames == expected))
+
+        # 2. Encode with resize (scale-to-cover + crop)
+        out = os.path.join(work, "resized.mp4")
+        ok = cut_segments(src, schedule, out, size=(180, 320), debug=False)
+        results.append(check("Encode + resize decodes cleanly", ok and decoded_frames(out) == expected))
+
+        # 3. Copy refuses when a cut has no keyframe in tolerance (no mixed join)
+        out = os.path.join(work, "mixed.mp4")
+        mixed = [{'start': 4.0, 'duration': 2.0}, {'start': 9.0, 'duration': 2.0}]
+        ok = cut_segments_copy(src, mixed, out, tolerance=0.5, info=info, debug=False)
+        results.append(check("Copy declines off-keyframe schedule", not ok and not os.path.exists(out)))
+
+        # 4. Keyframe-aligned schedule is stream-copied and joins cleanly
+        out = os.path.join(work, "copy.mp4")
+        aligned = [{'start': 10.2, 'duration': 2.0}, {'start': 2.0, 'duration': 4.0}, {'start': 30.0, 'duration': 2.0}]
+        ok = cut_segments_copy(src, aligned, out, tolerance=0.5, info=info, debug=False)
+        frames = decoded_frames(out)
+        expected_copy = int(round(sum(item['duration'] for item in aligned) * FPS))
+        results.append(check(f"Copy: decodes cleanly, {frames}/{expected_copy} frames",
+                             ok and abs(frames - expected_copy) <= 2 * len(aligned)))
+
+        # 5. Scheduler times snapped onto keyframes make the same schedule copyable
+        snapped = snap_schedule(schedule, info['keyframes'], window=GOP_SECONDS)
+        on_keyframes = all(item['start'] in info['keyframes'] for item in snapped)
+        same_pacing = [item['duration'] for item in snapped] == [item['duration'] for item in schedule]
+        out = os.path.join(work, "snapped.mp4")
+        ok = cut_segments_copy(src, snapped, out, tolerance=0.5, info=info, debug=False)
+        frames = decoded_frames(out)
+        results.append(check(f"Snapped schedule stream-copied: {frames}/{expected} frames",
+                             on_keyframes and same_pacing and ok and abs(frames - expected) <= 2 * len(schedule)))
+
+        # 6. cut_video 'auto' (needs ffprobe for keyframes; encodes otherwise)
+        out = os.path.join(work, "auto.mp4")
+        ok = cut_video(src, schedule, out, mode='auto', debug=False)
+        results.append(check("cut_video auto decodes cleanly", ok and decoded_frames(out) == expected))
+
+        # 7. Missing source fails instead of raising
+        out = os.path.join(work, "missing.mp4")
+        results.append(check("Missing source returns False",
+                             cut_video(os.path.join(work, "nope.mp4"), schedule, out, mode='encode', debug=False) is False))
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+    print(f"\n{'✨ ALL PASSED' if all(results) else '❌ FAILURES'} ({sum(results)}/{len(results)})")
+    return all(results)
+
+
+if __name__ == "__main__":
+    run_tests()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+File: transcript_index.py
+Inverted keyword index over Whisper segments, used by VideoProcessor and
+VideoScheduler to find the slide that matches a script keyword.
+Built once per transcript: stemmed token -> sorted segment start times.
+Lookups are a binary search for the first hit after the cursor; words that
+Whisper misheard are caught by fuzzy matching against the vocabulary.
+"""
+
+import re
+import bisect
+import difflib
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Longest suffix first; (suffix, replacement). Light enough for lecture
+# vocabulary ("reactions" ~ "reaction", "oxidised" ~ "oxidise").
+SUFFIXES = [
+    ('ational', 'ate'), ('ization', 'ize'), ('isation', 'ise'),
+    ('fulness', 'ful'), ('ousness', 'ous'), ('iveness', 'ive'),
+    ('ations', 'ate'), ('ation', 'ate'), ('ments', ''), ('ment', ''),
+    ('ness', ''), ('ings', ''), ('ing', ''), ('ies', 'y'), ('ied', 'y'),
+    ('edly', ''), ('ed', ''), ('ly', ''), ('es', ''), ('s', ''),
+]
+MIN_STEM = 3
+
+# Score per match type (higher = more trustworthy)
+EXACT_SCORE = 1.0
+STEM_SCORE = 0.9
+FUZZY_WEIGHT = 0.8
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+
+def stem(word):
+    """Strips one common English suffix (keeps at least MIN_STEM chars)."""
+    for suffix, repl in SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= MIN_STEM:
+            return word[:-len(suffix)] + repl
+    return word
+
+
+class TranscriptIndex:
+    """
+    Usage:
+        index = TranscriptIndex(segments)
+        hits = index.candidates("photosynthesis", after=12.0)
+        start = index.next_start(12.0)   # Next segment boundary (any word)
+    """
+
+    def __init__(self, segments, fuzzy_cutoff=0.82, min_keyword_len=4):
+        """
+        Args:
+            segments: Whisper segments ({'start', 'text', ...})
+            fuzzy_cutoff: difflib ratio needed for a fuzzy match (0-1)
+            min_keyword_len: Shorter keywords are ignored (too ambiguous)
+        """
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self.min_keyword_len = min_keyword_len
+        self._words = {}      # surface word -> sorted starts
+        self._stems = {}      # stem -> sorted starts
+        self._fuzzy_memo = {}
+
+        self.starts = sorted(float(seg['start']) for seg in segments)
+        for seg in sorted(segments, key=lambda s: s['start']):
+            start = float(seg['start'])
+            for word in set(tokenize(seg.get('text', ''))):
+                self._words.setdefault(word, []).append(start)
+                self._stems.setdefault(stem(word), []).append(start)
+        self._vocab = list(self._stems)
+
+    def __len__(self):
+        return len(self.starts)
+
+    @staticmethod
+    def _next_after(postings, after):
+        i = bisect.bisect_left(postings, after)
+        return postings[i] if i < len(postings) else None
+
+    def _fuzzy_stems(self, key):
+        if key not in self._fuzzy_memo:
+            matches = difflib.get_close_matches(key, self._vocab, n=3, cutoff=self.fuzzy_cutoff)
+            self._fuzzy_memo[key] = [
+                (m, difflib.SequenceMatcher(None, key, m).ratio()) for m in matches if m != key
+            ]
+        return self._fuzzy_memo[key]
+
+    def candidates(self, keyword, after=0.0, limit=5):
+        """
+        Ranked segment starts at/after `after` that mention the keyword.
+
+        Returns:
+            list: [{'start', 'term', 'score'}, ...] best first (score, then earliest)
+        """
+        if not keyword: return []
+        hits = {}
+
+        def add(start, term, score):
+            if start is not None and score > hits.get(start, {}).get('score', 0):
+                hits[start] = {'start': start, 'term': term, 'score': score}
+
+        for word in tokenize(keyword):
+            if len(word) < self.min_keyword_len: continue
+            key = stem(word)
+            add(self._next_after(self._words.get(word, []), after), word, EXACT_SCORE)
+            add(self._next_after(self._stems.get(key, []), after), key, STEM_SCORE)
+            for term, ratio in self._fuzzy_stems(key):
+                add(self._next_after(self._stems[term], after), term, FUZZY_WEIGHT * ratio)
+
+        ranked = sorted(hits.values(), key=lambda h: (-h['score'], h['start']))
+        return ranked[:limit]
+
+    def find(self, keyword, after=0.0):
+        """Best candidate or None."""
+        ranked = self.candidates(keyword, after, limit=1)
+        return ranked[0] if ranked else None
+
+    def next_start(self, after):
+        """First segment start at/after `after` (the next slide/sentence change), or None."""
+        return self._next_after(self.starts, after)
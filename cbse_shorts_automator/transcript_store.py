@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+File: transcript_store.py
+Persistent Whisper transcript store shared by VideoProcessor and VideoScheduler.
+Transcripts are keyed by the source video's content hash + Whisper model name,
+so the same lecture is transcribed once, ever - whatever the temp filename
+of the row that downloaded it.
+"""
+
+import os
+import json
+import tempfile
+import threading
+
+from asset_cache import asset_sha256_for, file_sha256
+
+
+class TranscriptStore:
+    """
+    Layout:
+        <root>/<sha256>_<model>.json   -> list of Whisper segments
+    """
+
+    def __init__(self, root='cache/transcripts'):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._hash_memo = {}
+        self._lock = threading.Lock()
+
+    def content_hash(self, video_path):
+        """
+        SHA-256 of the video. Cached assets already know theirs; other files
+        are hashed once per (path, size, mtime).
+        """
+        sha = asset_sha256_for(video_path)
+        if sha: return sha
+
+        st = os.stat(video_path)
+        memo_key = (os.path.abspath(video_path), st.st_size, st.st_mtime)
+        with self._lock:
+            if memo_key in self._hash_memo: return self._hash_memo[memo_key]
+        sha = file_sha256(video_path)
+        with self._lock:
+            self._hash_memo[memo_key] = sha
+        return sha
+
+    def _path(self, sha, model_name):
+        return os.path.join(self.root, f"{sha}_{model_name}.json")
+
+    def get(self, video_path, model_name):
+        """Returns cached segments or None."""
+        path = self._path(self.content_hash(video_path), model_name)
+        if not os.path.exists(path): return None
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except (ValueError, OSError):
+            return None
+
+    def put(self, video_path, model_name, segments):
+        """Stores segments atomically (concurrent writers can't leave half a file)."""
+        path = self._path(self.content_hash(video_path), model_name)
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        with os.fdopen(fd, 'w') as f:
+            json.dump(segments, f)
+        os.replace(tmp, path)
+        return path
+
+
+_STORE = None
+_STORE_LOCK = threading.Lock()
+
+def get_transcript_store(root='cache/transcripts'):
+    """Process-wide store instance (shares the hash memo)."""
+    global _STORE
+    with _STORE_LOCK:
+        if _STORE is None:
+            _STORE = TranscriptStore(root)
+    return _STORE
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+File: tts_cache.py
+Persistent, content-addressed cache of synthesized voice clips.
+A clip is keyed by everything that changes the audio: cleaned text,
+provider, voice name, speaking rate and pitch. Fixed phrases ("Think fast!",
+option prefixes) and retried renders are served from disk - no network call
+and no quota charge.
+"""
+
+import os
+import json
+import shutil
+import hashlib
+
+from disk_cache import DiskCache
+
+CACHE_VERSION = 2  # Bump to invalidate every clip (2: Edge clips now use the keyed voice)
+AUDIO_FILE = "audio.mp3"
+WORDS_FILE = "words.json"  # Word timing table (see word_timings.py)
+
+
+def tts_cache_key(clean_text, provider, voice_config):
+    """
+    SHA-256 over the synthesis parameters.
+
+    Args:
+        clean_text: Text exactly as sent to the provider
+        provider: 'google' or 'edge'
+        voice_config: Entry from GOOGLE_VOICES / EDGE_VOICES
+    """
+    params = {
+        'v': CACHE_VERSION,
+        'text': clean_text,
+        'provider': provider,
+        'voice': voice_config.get('name'),
+        'rate': voice_config.get('speaking_rate', voice_config.get('rate')),
+        'pitch': voice_config.get('pitch'),
+    }
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class TTSCache:
+    """
+    Usage:
+        cache = TTSCache('cache/tts', max_bytes=500 * 1024**2)
+        if not cache.restore(key, "voice_hook.mp3"):
+            ... synthesize ...
+            cache.store_clip(key, "voice_hook.mp3", {'text': clean_text})
+    """
+
+    def __init__(self, root='cache/tts', max_bytes=None):
+        self.store = DiskCache(root, max_bytes=max_bytes)
+
+    def entry_dir(self, key):
+        """Committed entry directory for key, or None on a miss."""
+        entry = self.store.get(key)
+        if entry and os.path.exists(os.path.join(entry, AUDIO_FILE)):
+            return entry
+        return None
+
+    def restore(self, key, output_path, extra_files=None):
+        """
+        Copies the cached clip to output_path.
+
+        Args:
+            extra_files: Optional {name: dest} copied out of the entry when present
+                         (stale dest files are removed when the entry has none)
+
+        Returns:
+            bool: True on a hit
+        """
+        entry = self.entry_dir(key)
+        if not entry: return False
+        shutil.copyfile(os.path.join(entry, AUDIO_FILE), output_path)
+        for name, dest in (extra_files or {}).items():
+            src = os.path.join(entry, name)
+            if os.path.exists(src):
+                shutil.copyfile(src, dest)
+            elif os.path.exists(dest):
+                os.remove(dest)
+        return True
+
+    def store_clip(self, key, audio_path, meta=None, extra_files=None):
+        """
+        Adds a freshly synthesized clip (no-op if another worker already did).
+
+        Args:
+            extra_files: Optional {name: path} copied into the entry alongside the audio
+        """
+        staging = self.store.new_staging_dir()
+        try:
+            shutil.copyfile(audio_path, os.path.join(staging, AUDIO_FILE))
+            for name, path in (extra_files or {}).items():
+                shutil.copyfile(path, os.path.join(staging, name))
+        except OSError as e:
+            shutil.rmtree(staging, ignore_errors=True)
+            print(f"   ⚠️ TTS cache write skipped: {e}")
+            return None
+        return self.store.put(key, staging, meta)
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+File: tts_router.py
+Routes one synthesis job across TTS providers (primary first, then backups).
+- Circuit breaker per provider: after N consecutive failures the provider is
+  skipped for a cool-down, then one probe request decides if it is back
+- Latency histogram per provider (successful requests)
+- Hedging: if the primary hasn't answered within its own p95 latency, the
+  backup is started too and whichever succeeds first wins (characters the
+  losing attempt was billed for are counted per provider)
+"""
+
+import time
+import bisect
+import threading
+import concurrent.futures
+
+# Histogram bucket upper bounds in seconds (~25% apart, 50 ms .. ~2 min)
+LATENCY_BUCKETS = [round(0.05 * 1.25 ** i, 3) for i in range(36)]
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram (thread-safe, O(1) memory)."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = list(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # Last slot: above the top bucket
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+            self.count += 1
+
+    def percentile(self, p):
+        """
+        Upper bound of the bucket holding the p-th percentile.
+
+        Returns:
+            float or None: Seconds (None before any sample)
+        """
+        with self._lock:
+            if not self.count: return None
+            target = self.count * p / 100.0
+            seen = 0
+            for i, n in enumerate(self.counts):
+                seen += n
+                if seen >= target:
+                    return self.buckets[min(i, len(self.buckets) - 1)]
+        return self.buckets[-1]
+
+
+class CircuitBreaker:
+    """
+    closed    -> requests flow; `failure_threshold` failures in a row open it
+    open      -> requests are refused for `reset_timeout` seconds
+    half_open -> one probe request is let through; its outcome closes/reopens
+    """
+
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, failure_threshold=3, reset_timeout=60):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = 0.0
+        self._state = self.CLOSED
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self._state = self.HALF_OPEN
+            return self._state
+
+    def allow(self):
+        """True if a request may be sent now (claims the probe slot when half-open)."""
+        state = self.state
+        with self._lock:
+            if state == self.CLOSED: return True
+            if state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._state = self.CLOSED
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self._state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+class ProviderRouter:
+    """
+    Usage:
+        router = ProviderRouter()
+        provider, value = router.run([
+            ('google', lambda: synth_google(...)),   # primary
+            ('edge',   lambda: synth_edge(...)),     # backup / hedge
+        ], discard=cleanup)
+
+    Each attempt returns a value on success and raises on failure.
+    """
+
+    def __init__(self, hedge=True, hedge_percentile=95, min_samples=10,
+                 failure_threshold=3, reset_timeout=60, max_workers=16):
+        """
+        Args:
+            hedge: Start the backup when the primary exceeds its p95
+            hedge_percentile: Which latency percentile triggers the hedge
+            min_samples: Successful requests needed before the p95 is trusted
+            failure_threshold: Consecutive failures that open a provider's breaker
+            reset_timeout: Seconds an open breaker waits before a probe request
+            max_workers: Threads for in-flight attempts (shared by all jobs)
+        """
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.min_samples = min_samples
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers,
+                                                              thread_name_prefix="tts-route")
+        self.breakers = {}
+        self.histograms = {}
+        self.discarded_chars = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, provider):
+        with self._lock:
+            if provider not in self.breakers:
+                self.breakers[provider] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return self.breakers[provider]
+
+    def histogram(self, provider):
+        with self._lock:
+            if provider not in self.histograms:
+                self.histograms[provider] = LatencyHistogram()
+            return self.histograms[provider]
+
+    def record_discard(self, provider, chars):
+        """Counts characters synthesized (and billed) for a result nobody used."""
+        with self._lock:
+            self.discarded_chars[provider] = self.discarded_chars.get(provider, 0) + chars
+
+    def is_available(self, provider):
+        """False while the provider's breaker is open (no probe slot is claimed)."""
+        return self.breaker(provider).state != CircuitBreaker.OPEN
+
+    def hedge_delay(self, provider):
+        """Seconds to wait on `provider` before hedging, or None (no hedge yet)."""
+        hist = self.histogram(provider)
+        if not self.hedge or hist.count < self.min_samples: return None
+        return hist.percentile(self.hedge_percentile)
+
+    def _timed(self, provider, fn):
+        start = time.monotonic()
+        try:
+            value = fn()
+        except Exception:
+            self.breaker(provider).record_failure()
+            raise
+        self.breaker(provider).record_success()
+        self.histogram(provider).record(time.monotonic() - start)
+        return value
+
+    def run(self, attempts, discard=None):
+        """
+        Runs attempts in priority order with breakers and hedging.
+
+        Args:
+            attempts: [(provider, fn), ...] primary first
+            discard: Optional fn(provider, value) for successful results that lost
+                     the race (e.g., delete their files); may run on a worker thread
+
+        Returns:
+            tuple: (provider, value) of the first success
+
+        Raises:
+            Exception: The last failure if every attempt failed
+        """
+        queue = list(attempts)
+        running = {}  # future -> provider
+        started = []
+        last_error = None
+
+        def launch():
+            """Starts the next attempt whose breaker allows it; True if one started."""
+            while queue:
+                name, fn = queue.pop(0)
+                # Everything tripped: the last resort is tried anyway
+                if self.breaker(name).allow() or (not queue and not started):
+                    running[self.executor.submit(self._timed, name, fn)] = name
+                    started.append(name)
+                    return True
+            return False
+
+        launch()
+        while running:
+            # Hedge only while exactly the primary attempt is in flight
+            timeout = None
+            if queue and len(running) == 1:
+                timeout = self.hedge_delay(next(iter(running.values())))
+            done, _ = concurrent.futures.wait(running, timeout=timeout,
+                                              return_when=concurrent.futures.FIRST_COMPLETED)
+            if not done:
+                slow = next(iter(running.values()))
+                if launch():
+                    print(f"   ⏱️ {slow} slower than its p{self.hedge_percentile} ({timeout:.1f}s), "
+                          f"hedging with {started[-1]}")
+                continue
+
+            for future in done:
+                name = running.pop(future)
+                try:
+                    value = future.result()
+                except Exception as e:
+                    last_error = e
+                    continue
+                for loser, loser_name in running.items():
+                    if discard: loser.add_done_callback(self._discarder(loser_name, discard))
+                return name, value
+
+            if not running: launch()  # Sequential fallback after a failure
+
+        raise last_error or RuntimeError("No TTS provider available (all circuit breakers open)")
+
+    @staticmethod
+    def _discarder(name, discard):
+        def callback(future):
+            if not future.cancelled() and future.exception() is None:
+                discard(name, future.result())
+        return callback
+
+    def stats(self):
+        """{provider: {'state', 'samples', 'p50', 'p95', 'discarded_chars'}} for logging."""
+        return {
+            name: {
+                'state': self.breaker(name).state,
+                'samples': self.histogram(name).count,
+                'p50': self.histogram(name).percentile(50),
+                'p95': self.histogram(name).percentile(95),
+                'discarded_chars': self.discarded_chars.get(name, 0),
+            }
+            for name in sorted(set(self.breakers) | set(self.histograms) | set(self.discarded_chars))
+        }
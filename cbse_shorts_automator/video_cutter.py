@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+File: video_cutter.py
+Segment cutter shared by the Fact and Tip templates.
+- 'encode': all segments cut and stitched by ONE ffmpeg process
+  (one input-seeked input per segment, one concat filtergraph, one encode)
+- 'copy':   cut points snapped to nearby keyframes and stream-copied in
+  parallel; used only when EVERY cut has a keyframe in tolerance (copied
+  and re-encoded H.264 can't share one stream's SPS/PPS), else 'encode'.
+  Templates move scheduled starts onto keyframes first (snap_schedule)
+- 'auto':   'copy' when the source is H.264 and no resize is needed
+"""
+
+import os
+import json
+import bisect
+import shutil
+import tempfile
+import threading
+import subprocess
+import concurrent.futures
+
+DEFAULT_ENCODE_ARGS = ['-c:v', 'libx264', '-preset', 'ultrafast', '-crf', '23']
+COPYABLE_CODECS = {'h264'}
+SEEK_EPSILON = 0.001  # Input seek lands ON the keyframe, not the one before it
+
+_PROBE_MEMO = {}
+_PROBE_LOCK = threading.Lock()
+
+
+def build_filtergraph(schedule, size=None):
+    """
+    Builds the concat graph for a schedule where segment i is input i
+    (already seeked and trimmed by its own -ss/-t).
+
+    Args:
+        schedule: [{'start': float, 'duration': float}, ...] on the source timeline
+        size: Optional (width, height); output is scaled to cover it and center-cropped
+
+    Returns:
+        str: filter_complex description whose final pad is [vout]
+    """
+    n = len(schedule)
+    parts = [f"[{i}:v]setpts=PTS-STARTPTS[v{i}]" for i in range(n)]
+
+    tail = "[vcat]" if size else "[vout]"
+    parts.append("".join(f"[v{i}]" for i in range(n)) + f"concat=n={n}:v=1:a=0{tail}")
+
+    if size:
+        w, h = size
+        parts.append(f"[vcat]scale={w}:{h}:force_original_aspect_ratio=increase,crop={w}:{h},setsar=1[vout]")
+    return ";".join(parts)
+
+
+def cut_segments(video_path, schedule, output_path, size=None, encode_args=None, debug=True):
+    """
+    Cuts the scheduled segments out of video_path and stitches them into
+    output_path (video only) in one ffmpeg invocation.
+
+    Args:
+        video_path: Source lecture video
+        schedule: [{'start': float, 'duration': float}, ...] in playback order
+        output_path: Stitched .mp4
+        size: Optional (width, height) render target (scale-to-cover + crop)
+        encode_args: ffmpeg video codec args (default: libx264 ultrafast crf 23)
+
+    Returns:
+        bool: True if ffmpeg succeeded
+    """
+    schedule = [item for item in schedule if item['duration'] > 0]
+    if not schedule: return False
+
+    # One input per segment, each input-seeked to its own cut: the decoder
+    # only touches the scheduled footage, however far apart the cuts are.
+    inputs = []
+    for item in schedule:
+        inputs += ['-ss', f"{max(0.0, item['start']):.3f}", '-t', f"{item['duration']:.3f}", '-i', video_path]
+
+    cmd = [
+        'ffmpeg', '-y', '-nostdin', '-v', 'error',
+        *inputs,
+        '-filter_complex', build_filtergraph(schedule, size=size),
+        '-map', '[vout]',
+        '-vsync', 'passthrough',  # Keep source frame timing (graph would default to 25 fps)
+        *(encode_args or DEFAULT_ENCODE_ARGS),
+        '-an',
+        output_path
+    ]
+
+    if debug: print(f"   🎞️  Cutting {len(schedule)} segments in one ffmpeg pass -> {os.path.basename(output_path)}")
+    proc = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    if proc.returncode != 0:
+        print(f"   ❌ FFmpeg cut failed: {proc.stderr.decode(errors='ignore')[-300:]}")
+        return False
+    return True
+
+
+# ----------------------------------------------------------------------
+# Keyframe-aware stream-copy mode
+# ----------------------------------------------------------------------
+
+def probe_video(video_path):
+    """
+    Codec info + keyframe timestamps of the first video stream. Reads packets
+    only (no decode) and is memoized per (path, size, mtime).
+
+    Returns:
+        dict: {'codec', 'pix_fmt', 'width', 'height', 'keyframes': [sorted seconds]}
+              or None if the file or ffprobe is missing or ffprobe fails
+    """
+    try:
+        st = os.stat(video_path)
+    except OSError:
+        return None
+    memo_key = (os.path.abspath(video_path), st.st_size, st.st_mtime)
+    with _PROBE_LOCK:
+        if memo_key in _PROBE_MEMO: return _PROBE_MEMO[memo_key]
+
+    cmd = [
+        'ffprobe', '-v', 'error', '-select_streams', 'v:0',
+        '-show_entries', 'stream=codec_name,pix_fmt,width,height:packet=pts_time,flags',
+        '-of', 'json', video_path
+    ]
+    try:
+        proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    except OSError:
+        return None  # No ffprobe: callers fall back to encoding
+    if proc.returncode != 0: return None
+    try:
+        data = json.loads(proc.stdout)
+        stream = data['streams'][0]
+    except (ValueError, KeyError, IndexError):
+        return None
+
+    keyframes = sorted(
+        float(p['pts_time']) for p in data.get('packets', [])
+        if 'K' in p.get('flags', '') and p.get('pts_time') not in (None, 'N/A')
+    )
+    info = {
+        'codec': stream.get('codec_name'),
+        'pix_fmt': stream.get('pix_fmt'),
+        'width': stream.get('width'),
+        'height': stream.get('height'),
+        'keyframes': keyframes
+    }
+    with _PROBE_LOCK:
+        _PROBE_MEMO[memo_key] = info
+    return info
+
+
+def snap_to_keyframe(keyframes, t, tolerance):
+    """Nearest keyframe to t if within tolerance seconds, else None."""
+    i = bisect.bisect_left(keyframes, t)
+    near = [keyframes[j] for j in (i - 1, i) if 0 <= j < len(keyframes)]
+    if not near: return None
+    best = min(near, key=lambda k: abs(k - t))
+    return best if abs(best - t) <= tolerance else None
+
+
+def copy_keyframes(video_path, mode='auto', size=None):
+    """
+    Keyframes a schedule should be snapped to so cut_video() can stream-copy.
+
+    Returns:
+        list or None: Sorted keyframe seconds, or None when cut_video() will encode anyway
+    """
+    if mode == 'encode' or size: return None
+    info = probe_video(video_path)
+    if not info or info['codec'] not in COPYABLE_CODECS: return None
+    return info['keyframes'] or None
+
+
+def snap_schedule(schedule, keyframes, window=4.0):
+    """
+    Moves each segment's start onto a keyframe: the last one at or before it
+    (the scheduled moment stays inside the clip) if within `window` seconds
+    and not overlapping the previous segment, else the next one within
+    `window`, else the start is left alone. Durations are unchanged.
+
+    Returns:
+        list: New schedule ({'start', 'duration', ...} per segment)
+    """
+    if not keyframes: return [dict(item) for item in schedule]
+    snapped = []
+    prev_end = 0.0
+    for item in schedule:
+        t = item['start']
+        i = bisect.bisect_right(keyframes, t)
+        before = keyframes[i - 1] if i else None
+        after = keyframes[i] if i < len(keyframes) else None
+        if before is not None and t - before <= window and before >= prev_end - SEEK_EPSILON:
+            start = before
+        elif after is not None and after - t <= window:
+            start = after
+        else:
+            start = t
+        snapped.append(dict(item, start=start))
+        prev_end = start + item['duration']
+    return snapped
+
+
+def plan_copy_cuts(schedule, keyframes, tolerance):
+    """
+    Returns:
+        list: [{'start', 'duration', 'copy': bool}, ...] - copy segments start on a keyframe
+    """
+    plan = []
+    for item in schedule:
+        k = snap_to_keyframe(keyframes, item['start'], tolerance)
+        if k is not None:
+            plan.append({'start': k, 'duration': item['duration'], 'copy': True})
+        else:
+            plan.append({'start': item['start'], 'duration': item['duration'], 'copy': False})
+    return plan
+
+
+def _cut_piece(video_path, piece, piece_path):
+    """Stream-copies one keyframe-aligned segment (same SPS/PPS as the source)."""
+    cmd = [
+        'ffmpeg', '-y', '-nostdin', '-v', 'error',
+        '-ss', f"{piece['start'] + SEEK_EPSILON:.3f}", '-i', video_path,
+        '-t', f"{piece['duration']:.3f}", '-map', '0:v:0',
+        '-c:v', 'copy', '-avoid_negative_ts', 'make_zero',
+        '-an', piece_path
+    ]
+    proc = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.decode(errors='ignore')[-300:])
+    return piece_path
+
+
+def cut_segments_copy(video_path, schedule, output_path, tolerance=0.5, workers=4,
+                      info=None, debug=True):
+    """
+    Stream-copies every segment from the keyframe within `tolerance` of its
+    start (each in its own ffmpeg process, `workers` at a time), then joins
+    the pieces with the concat demuxer (no encode at all).
+
+    All-or-nothing: if any segment has no keyframe in tolerance this returns
+    False without cutting, and the caller encodes the whole schedule. A
+    re-encoded piece carries its own SPS/PPS, which can't be stream-joined
+    with the source's under one set of codec parameters.
+
+    Returns:
+        bool: True on success
+    """
+    schedule = [item for item in schedule if item['duration'] > 0]
+    if not schedule: return False
+    info = info or probe_video(video_path)
+    if not info or not info['keyframes']: return False
+
+    plan = plan_copy_cuts(schedule, info['keyframes'], tolerance)
+    n_copy = sum(piece['copy'] for piece in plan)
+    if n_copy < len(plan):
+        if debug: print(f"   🎞️  Keyframe cut: {len(plan) - n_copy}/{len(plan)} segments have no keyframe "
+                        f"within {tolerance}s, not stream-copying")
+        return False
+    if debug: print(f"   🎞️  Keyframe cut: {len(plan)} segments stream-copied -> {os.path.basename(output_path)}")
+
+    work_dir = tempfile.mkdtemp(prefix="cut_", dir=os.path.dirname(os.path.abspath(output_path)))
+    try:
+        piece_paths = [os.path.join(work_dir, f"piece_{i:03d}.mp4") for i in range(len(plan))]
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            futures = [pool.submit(_cut_piece, video_path, piece, path)
+                       for piece, path in zip(plan, piece_paths)]
+            for fut in futures: fut.result()
+
+        list_path = os.path.join(work_dir, "concat_list.txt")
+        with open(list_path, 'w') as f:
+            for path in piece_paths:
+                f.write(f"file '{os.path.abspath(path)}'\n")
+
+        cmd = [
+            'ffmpeg', '-y', '-nostdin', '-v', 'error',
+            '-f', 'concat', '-safe', '0', '-i', list_path,
+            '-c', 'copy', '-an', output_path
+        ]
+        proc = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        if proc.returncode != 0:
+            raise RuntimeError(proc.stderr.decode(errors='ignore')[-300:])
+        return True
+    except RuntimeError as e:
+        print(f"   ❌ Keyframe cut failed: {e}")
+        return False
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def cut_video(video_path, schedule, output_path, mode='auto', size=None, tolerance=0.5,
+              workers=4, encode_args=None, debug=True):
+    """
+    Entry point used by the templates (see VIDEO_CUT in generator_config.json).
+
+    Args:
+        mode: 'auto' | 'copy' | 'encode'
+        size: Optional (width, height); forces 'encode' (copying can't resize)
+        tolerance: Max seconds a cut may move to land on a keyframe
+        workers: Parallel stream-copy cuts in 'copy' mode
+
+    Returns:
+        bool: True on success
+    """
+    if mode != 'encode' and not size:
+        info = probe_video(video_path)
+        if info and info['codec'] in COPYABLE_CODECS and info['keyframes']:
+            if cut_segments_copy(video_path, schedule, output_path, tolerance, workers,
+                                 info, debug):
+                return True
+            if debug: print("   ↩️  Falling back to single-pass encode")
+        elif mode == 'copy' and debug:
+            print(f"   ⚠️ Source not stream-copyable ({info['codec'] if info else 'probe failed'}), encoding")
+    return cut_segments(video_path, schedule, output_path, size, encode_args, debug)
@@ -6,16 +6,13 @@ UPDATED: Restored 'Breathing Micro-Zoom' for dynamic visuals.
 """
 
 import os
-import json
 import random
-import whisper
-import warnings
 from moviepy.editor import VideoFileClip, concatenate_videoclips, vfx
 import numpy as np
-import gc
-
-# Suppress Whisper warnings
-warnings.filterwarnings("ignore")
+from transcript_store import get_transcript_store
+from transcript_index import TranscriptIndex
+from whisper_pool import get_whisper_pool
+from speech_transcriber import get_speech_transcriber
 
 class VideoProcessor:
     """
@@ -25,61 +22,50 @@ class VideoProcessor:
     def __init__(self, temp_dir="temp", debug=False):
         self.debug = debug
         self.temp_dir = temp_dir
-        self.model = None # Lazy load
-        self.current_cache_file = None # Track file to delete later
+        self.whisper = get_whisper_pool() # Shared per process; lazy loads once
         
         # Ensure temp folder exists
         os.makedirs(self.temp_dir, exist_ok=True)
 
-    def _load_model(self):
-        """Lazy loads the Whisper model."""
-        if self.model is None:
-            # Using 'tiny' for speed/RAM. 
-            if self.debug: print("⏳ Loading Whisper Model (tiny)...")
-            self.model = whisper.load_model("tiny")
-
     def get_transcript_map(self, video_path):
         """
-        Generates a transcript, saves to temp, returns segments.
+        Generates a transcript (or loads it from the persistent store), returns segments.
         """
         filename = os.path.basename(video_path)
-        cache_path = os.path.join(self.temp_dir, f"{filename}.json")
-        self.current_cache_file = cache_path 
+        store = get_transcript_store()
         
-        # 1. Check Cache
-        if os.path.exists(cache_path):
-            if self.debug: print(f"⚡ Using existing temp transcript: {cache_path}")
-            with open(cache_path, 'r') as f:
-                return json.load(f)
+        # 1. Check Store (keyed by video content hash + model, kept across runs)
+        model_name = self.whisper.model_name
+        segments = store.get(video_path, model_name)
+        if segments is not None:
+            if self.debug: print(f"⚡ Using stored transcript: {filename}")
+            return segments
 
         # 2. Transcribe
-        self._load_model()
         if self.debug: print(f"🎙️ Transcribing audio for indexing: {filename}")
         
-        result = self.model.transcribe(video_path)
+        # Audio-only, silence-trimmed, chunk-parallel path
+        result = get_speech_transcriber().transcribe(video_path)
         segments = result['segments']
         
-        # 3. Save to Temp
-        with open(cache_path, 'w') as f:
-            json.dump(segments, f)
+        # 3. Save to Store
+        store.put(video_path, model_name, segments)
             
         return segments
 
-    def find_best_timestamp(self, segments, keyword, last_end_time):
+    def find_best_timestamp(self, index, keyword, last_end_time):
         """
-        Scans transcript for keyword to find best scene.
+        Looks the keyword up in the transcript index to find best scene.
         """
-        # Strategy 1: Semantic Search (Forward only)
-        if keyword and len(keyword) > 3:
-            for seg in segments:
-                if seg['start'] >= last_end_time and keyword.lower() in seg['text'].lower():
-                    #if self.debug: print(f"   ✅ Found '{keyword}' at {seg['start']:.2f}s")
-                    print(f"   ✅ Found '{keyword}' at {seg['start']:.2f}s")
-                    return seg['start']
+        # Strategy 1: Semantic Search (Forward only, stemmed + fuzzy, ranked)
+        hit = index.find(keyword, after=last_end_time)
+        if hit:
+            print(f"   ✅ Found '{keyword}' at {hit['start']:.2f}s (via '{hit['term']}', score {hit['score']:.2f})")
+            return hit['start']
         
-        # Strategy 2: Linear Flow (Fallback)
-        # Jumps 1.5s forward to ensure visual change
-        return last_end_time + 40
+        # Strategy 2: Next sentence boundary (a fresh slide), else a blind jump
+        next_start = index.next_start(last_end_time)
+        return next_start if next_start is not None else last_end_time + 40
 
     def apply_micro_zoom(self, clip, index, duration):
         """
@@ -123,19 +109,11 @@ class VideoProcessor:
 
     def release_resources(self):
         """
-        CRITICAL: Cleans RAM and deletes Temp files.
+        Drops this processor's handle on the model. The shared pool keeps the
+        weights warm for the next video and unloads them itself when idle.
+        Transcripts stay in the persistent store.
         """
-        if self.model is not None:
-            if self.debug: print("🧹 Releasing Whisper AI from memory...")
-            del self.model
-            self.model = None
-            gc.collect()
-
-        if self.current_cache_file and os.path.exists(self.current_cache_file):
-            try:
-                os.remove(self.current_cache_file)
-                self.current_cache_file = None
-            except: pass
+        self.whisper = None
 
     def prepare_video_for_short(self, video_path, total_duration, script=None, width=1080, style='smart'):
         """
@@ -149,7 +127,8 @@ class VideoProcessor:
         if safe_duration < 10: safe_duration = vid_duration 
         
         # Get Intelligence
-        transcript = self.get_transcript_map(video_path)
+        if self.whisper is None: self.whisper = get_whisper_pool()
+        index = TranscriptIndex(self.get_transcript_map(video_path))
         keywords = self.extract_keywords_ordered(script) if script else []
         
         final_clips = []
@@ -172,7 +151,7 @@ class VideoProcessor:
             target_kw = keywords[clip_index] if clip_index < len(keywords) else None
             
             # 3. Find Start Time
-            start_t = self.find_best_timestamp(transcript, target_kw, current_time_marker)
+            start_t = self.find_best_timestamp(index, target_kw, current_time_marker)
             
             # 4. Safety Bounds Check
             if start_t + this_clip_len > safe_duration:
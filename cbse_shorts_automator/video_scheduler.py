@@ -5,62 +5,48 @@ Logic only. Analyzes audio/transcript to decide visual timings.
 """
 
 import os
-import json
 import random
-import whisper
-import warnings
-import gc
-
-# Suppress Whisper warnings
-warnings.filterwarnings("ignore")
+from transcript_store import get_transcript_store
+from transcript_index import TranscriptIndex
+from whisper_pool import get_whisper_pool
+from speech_transcriber import get_speech_transcriber
 
 class VideoScheduler:
     def __init__(self, temp_dir="temp", debug=True):
         self.debug = debug
         self.temp_dir = temp_dir
-        self.model = None
+        self.whisper = get_whisper_pool() # Shared per process; loads weights once
         os.makedirs(self.temp_dir, exist_ok=True)
 
-    def _load_model(self):
-        if self.model is None:
-            if self.debug: print("⏳ Loading Whisper Model (tiny)...")
-            self.model = whisper.load_model("tiny")
-
     def get_transcript(self, video_path):
-        """Generates or loads cached transcript."""
+        """Generates or loads cached transcript (keyed by video content hash + model)."""
         filename = os.path.basename(video_path)
-        cache_path = os.path.join(self.temp_dir, f"{filename}.json")
+        store = get_transcript_store()
+        model_name = self.whisper.model_name
         
-        if os.path.exists(cache_path):
+        segments = store.get(video_path, model_name)
+        if segments is not None:
             if self.debug: print(f"⚡ Using cached transcript: {filename}")
-            with open(cache_path, 'r') as f:
-                return json.load(f)
+            return segments
 
-        self._load_model()
         if self.debug: print(f"🎙️ Transcribing: {filename}")
-        result = self.model.transcribe(video_path)
-        
-        with open(cache_path, 'w') as f:
-            json.dump(result['segments'], f)
-        
-        # Cleanup
-        del self.model
-        self.model = None
-        gc.collect()
+        # Audio-only, silence-trimmed, chunk-parallel path
+        result = get_speech_transcriber().transcribe(video_path)
         
+        store.put(video_path, model_name, result['segments'])
         return result['segments']
 
-    def find_best_timestamp(self, segments, keyword, min_time):
-        """Scans transcript for keyword after min_time."""
-        # 1. Semantic Search
-        if keyword and len(keyword) > 3:
-            for seg in segments:
-                if seg['start'] >= min_time and keyword.lower() in seg['text'].lower():
-                    print(f"   ✅ Found slide for '{keyword}' at {seg['start']:.2f}s")
-                    return seg['start']
+    def find_best_timestamp(self, index, keyword, min_time):
+        """Looks keyword up in the transcript index after min_time."""
+        # 1. Semantic Search (stemmed + fuzzy, best ranked candidate)
+        hit = index.find(keyword, after=min_time)
+        if hit:
+            print(f"   ✅ Found slide for '{keyword}' at {hit['start']:.2f}s (via '{hit['term']}')")
+            return hit['start']
         
-        # 2. Fallback: Just move forward a bit
-        return min_time + 4.0 
+        # 2. Fallback: Next sentence boundary, else just move forward a bit
+        next_start = index.next_start(min_time)
+        return next_start if next_start is not None else min_time + 4.0
 
     def extract_keywords(self, script):
         """Extracts significant words from script to match slides."""
@@ -79,7 +65,7 @@ class VideoScheduler:
         """
         Returns a list of: {'start': float, 'duration': float}
         """
-        segments = self.get_transcript(video_path)
+        index = TranscriptIndex(self.get_transcript(video_path))
         keywords = self.extract_keywords(script)
         
         schedule = []
@@ -95,7 +81,7 @@ class VideoScheduler:
             
             # 2. Determine Start Time (Content Matching)
             keyword = keywords.pop(0) if keywords else None
-            start_time = self.find_best_timestamp(segments, keyword, current_cursor)
+            start_time = self.find_best_timestamp(index, keyword, current_cursor)
             
             schedule.append({
                 "start": start_time,
@@ -7,19 +7,35 @@ LOCAL_WORKSPACE="$PROJECT_PATH/visual_engine_fact"
 FILENAME_TXT="$PROJECT_PATH/vid_out_filename.txt"
 
 # INPUT VARIABLES
-RENDER_FRAMES="$1"  # First argument passed from Colab
+# Usage: render4.sh [JOB_DIR] [FRAMES]
+# JOB_DIR is a workspace created by ShortsEngine.generate_short() (jobs/<job_id>)
+if [ -n "$1" ] && [ -d "$1" ]; then
+    JOB_DIR="$(cd "$1" && pwd)"
+    RENDER_FRAMES="$2"
+else
+    JOB_DIR=""
+    RENDER_FRAMES="$1"  # First argument passed from Colab
+fi
 
 echo "------------------------------------------------"
 echo "🎬  STARTING RENDER JOB"
 echo "------------------------------------------------"
 
-# 1. Identify Output Filename
-if [ ! -f "$FILENAME_TXT" ]; then
-    echo "❌ Error: $FILENAME_TXT not found!"
-    exit 1
+# 1. Identify Output Filename (job manifest, else legacy vid_out_filename.txt)
+if [ -n "$JOB_DIR" ]; then
+    MANIFEST="$JOB_DIR/manifest.json"
+    if [ ! -f "$MANIFEST" ]; then
+        echo "❌ Error: $MANIFEST not found!"
+        exit 1
+    fi
+    TARGET_NAME=$(python3 -c "import json,sys; print(json.load(open(sys.argv[1]))['output_filename'])" "$MANIFEST")
+else
+    if [ ! -f "$FILENAME_TXT" ]; then
+        echo "❌ Error: $FILENAME_TXT not found!"
+        exit 1
+    fi
+    TARGET_NAME=$(cat "$FILENAME_TXT" | tr -d '[:space:]')
 fi
-
-TARGET_NAME=$(cat "$FILENAME_TXT" | tr -d '[:space:]')
 if [[ "$TARGET_NAME" != *".mp4" ]]; then
     TARGET_NAME="$TARGET_NAME.mp4"
 fi
@@ -31,6 +47,9 @@ fi
 # 3. Construct Command
 cd "$LOCAL_WORKSPACE"
 TEMP_OUT="output/out_video.mp4"
+if [ -n "$JOB_DIR" ]; then
+    TEMP_OUT="$JOB_DIR/out_video.mp4"
+fi
 
 #CMD="npx remotion render src/index.ts NCERT-Shorts-FACT $TEMP_OUT --gl=angle --log=info"
 #CMD="npx remotion render src/index.ts NCERT-Shorts-FACT $TEMP_OUT --gl=angle --log=verbose --enable-multiprocess-on-linux" 
@@ -38,6 +57,11 @@ CMD="npx remotion render src/index.ts NCERT-Shorts-FACT $TEMP_OUT --concurrency=
 #CMD="npx remotion render src/index.ts NCERT-Shorts-FACT $TEMP_OUT --concurrency=2 --enable-multiprocess-on-linux --log=verbose --chromium-options="--enable-unsafe-swiftshader" --timeout=120000" 
 #CMD="npx remotion render src/index.ts NCERT-Shorts-FACT $TEMP_OUT --gl=vulkan --log=verbose"
 
+# Render from the job's own public/ folder
+if [ -n "$JOB_DIR" ]; then
+    CMD="$CMD --public-dir=$JOB_DIR/public"
+fi
+
 # Add Partial Render flag if specified
 if [ ! -z "$RENDER_FRAMES" ]; then
     echo "✂️  Partial Render Detected: Frames [$RENDER_FRAMES]"
@@ -59,6 +83,10 @@ DURATION=$((END_TIME - START_TIME))
 FINAL_PATH="$OUTPUT_ROOT/$TARGET_NAME"
 echo "💾 Saving to Drive: $FINAL_PATH"
 cp "$TEMP_OUT" "$FINAL_PATH"
+# Rendered: the next batch's prune_workspaces() may delete the job folder
+if [ -n "$JOB_DIR" ]; then
+    touch "$JOB_DIR/.rendered"
+fi
 
 echo "------------------------------------------------"
 echo "✅ RENDER SUCCESS"
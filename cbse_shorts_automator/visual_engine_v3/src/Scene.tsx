@@ -282,6 +282,7 @@ const SceneContent: React.FC<SceneProps> = ({ scenario }) => {
                     maxWidth={SAFE_MAX_WIDTH} // Pass strict width
                     startTime={timeline.quiz.question.start_time}
                     finishTime={timeline.quiz.options[0].start_time}
+                    words={timeline.quiz.question.words}
                     position={[SAFE_OFFSET_X, questionY, 0]} // Apply Offset
                     //scale={isImploding ? implosionScale : 1}
                 />
@@ -36,6 +36,7 @@ interface TypewriterQuestionProps {
     startTime: number;
     finishTime: number;
     position: [number, number, number];
+    words?: Array<{ word: string; start: number; end: number }>; // Voice word timings
 }
 
 export const TypewriterQuestion: React.FC<TypewriterQuestionProps> = ({
@@ -44,7 +45,8 @@ export const TypewriterQuestion: React.FC<TypewriterQuestionProps> = ({
     viewportWidth,
     startTime,
     finishTime,
-    position
+    position,
+    words
 }) => {
     const frame = useCurrentFrame();
     const { fps } = useVideoConfig();
@@ -100,12 +102,32 @@ export const TypewriterQuestion: React.FC<TypewriterQuestionProps> = ({
         return { startFrame, endFrame: safeEndFrame };
     }, [startTime, finishTime, fps]);
 
-    const progress = interpolate(
-        frame,
-        [smartPacing.startFrame, smartPacing.endFrame],
-        [0, 1],
-        { extrapolateRight: 'clamp', extrapolateLeft: 'clamp' }
+    // --- 3. VOICE-SYNCED PACING ---
+    // With word timings, progress = share of spoken characters already said
+    // (the on-screen text may differ from the spoken one, so we map by ratio).
+    const spokenChars = useMemo(
+        () => (words ?? []).reduce((sum, w) => sum + w.word.length, 0),
+        [words]
     );
+
+    const voiceProgress = (time: number) => {
+        let said = 0;
+        for (const w of words ?? []) {
+            if (time >= w.end) said += w.word.length;
+            else if (time > w.start) said += w.word.length * (time - w.start) / Math.max(w.end - w.start, 0.001);
+            else break;
+        }
+        return Math.min(1, said / spokenChars);
+    };
+
+    const progress = spokenChars > 0
+        ? voiceProgress(frame / fps)
+        : interpolate(
+            frame,
+            [smartPacing.startFrame, smartPacing.endFrame],
+            [0, 1],
+            { extrapolateRight: 'clamp', extrapolateLeft: 'clamp' }
+        );
     
     const visibleLength = Math.floor(progress * text.length);
     const displayText = text.slice(0, visibleLength);
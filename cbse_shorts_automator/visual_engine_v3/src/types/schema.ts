@@ -15,7 +15,12 @@ export interface VisualScenario {
     timeline: {
         hook: { start_time: number; text_content: string };
         quiz: {
-            question: { text: string; start_time: number };
+            question: {
+                text: string;
+                start_time: number;
+                // Spoken word timings (seconds, video timeline) from the TTS provider
+                words?: Array<{ word: string; start: number; end: number }>;
+            };
             options: Array<{ id: string; text: string; start_time: number }>;
         };
         timer: { start_time: number; duration: number; label_text: string };
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+File: voice_clip.py
+Lightweight handle to a synthesized voice file, returned by VoiceManager.
+Timing code only needs .duration (read from the file header, see
+audio_probe.py), .words and .result (SynthesisResult); the MoviePy AudioFileClip - an ffmpeg reader
+process - is opened lazily, the first time audio is actually needed.
+
+Legacy callers that treat the result as an AudioFileClip keep working:
+any attribute VoiceClip doesn't define (set_start, volumex, fps, ...) is
+forwarded to the lazily opened clip.
+"""
+
+from moviepy.editor import AudioFileClip
+
+from audio_probe import probe_duration
+
+
+class VoiceClip:
+    """
+    Usage:
+        clip = VoiceClip("voice_hook.mp3", words=[...])
+        t_next = t_hook + clip.duration          # no decoding
+        mix.append(clip.set_start(t_hook))       # opens AudioFileClip here
+    """
+
+    def __init__(self, path, duration=None, words=None, result=None):
+        self.path = path
+        self.words = words
+        self.result = result
+        self._duration = duration
+        self._audio = None
+
+    @property
+    def duration(self):
+        if self._duration is None:
+            self._duration = probe_duration(self.path)
+        if self._duration is None:  # Unknown container: ask ffmpeg
+            self._duration = self.audio().duration
+        return self._duration
+
+    def audio(self):
+        """The MoviePy AudioFileClip for mixing (opened once, on first use)."""
+        if self._audio is None:
+            self._audio = AudioFileClip(self.path)
+        return self._audio
+
+    def close(self):
+        if self._audio is not None:
+            self._audio.close()
+            self._audio = None
+
+    def __getattr__(self, name):
+        # Only reached for attributes not defined above
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.audio(), name)
+
+    def __repr__(self):
+        return f"VoiceClip({self.path!r}, duration={self._duration})"
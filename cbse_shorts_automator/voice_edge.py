@@ -10,6 +10,18 @@ import edge_tts
 import os
 import re
 import time
+import random
+import datetime
+from email.utils import parsedate_to_datetime
+
+from word_timings import save_words
+
+TICKS_PER_SECOND = 10_000_000  # Edge reports offsets in 100 ns units
+DEFAULT_VOICE = "en-US-AndrewNeural"  # Only for a voice_config without a 'name'
+
+# Errors worth retrying (429 rate limits, connection issues)
+RETRYABLE_ERRORS = ["429", "Connection", "Handshake", "NoAudioReceived", "received"]
+RATE_LIMIT_ERRORS = ["429", "Too Many Requests"]  # Throttled: back off on the longer schedule
 
 class EdgeVoiceEngine:
     """
@@ -17,10 +29,59 @@ class EdgeVoiceEngine:
     Used as fallback when Google Cloud TTS quota is exhausted.
     """
     
-    def __init__(self):
-        """Initialize Edge TTS engine."""
+    def __init__(self, retry_base=0.25, retry_max=2.0, rate_limit_base=2.0, rate_limit_max=30.0):
+        """
+        Initialize Edge TTS engine.
+        
+        Args:
+            retry_base: Backoff ceiling (s) after the first transient error
+                        (connection drop, no audio); doubles per further attempt
+                        (0.25s, 0.5s, 1s, 2s, ...)
+            retry_max: Transient backoff ceiling never exceeds this (s)
+            rate_limit_base, rate_limit_max: Same for 429 responses, which need to
+                        outlast the throttle window (2s, 4s, 8s, 16s, 30s)
+                        unless the server sends Retry-After
+        """
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.rate_limit_base = rate_limit_base
+        self.rate_limit_max = rate_limit_max
         print("✅ Edge TTS engine initialized (fallback mode)")
     
+    @staticmethod
+    def _retry_after(error):
+        """Seconds from a Retry-After header anywhere in error's cause chain, or None."""
+        while error is not None:
+            value = (getattr(error, 'headers', None) or {}).get('Retry-After')
+            if value:
+                try:
+                    return max(0.0, float(value))
+                except ValueError:
+                    pass
+                try:
+                    when = parsedate_to_datetime(value)
+                    return max(0.0, (when - datetime.datetime.now(when.tzinfo)).total_seconds())
+                except (TypeError, ValueError):
+                    pass
+            error = error.__cause__ or error.__context__
+        return None
+    
+    def _retry_wait(self, attempt, error=None):
+        """
+        Seconds to wait before retry `attempt`: the server's Retry-After when it
+        sent one, else jittered exponential backoff (half the capped ceiling plus
+        a random share of the rest) - on the long schedule for 429s.
+        """
+        retry_after = self._retry_after(error)
+        if retry_after is not None: return retry_after
+        
+        if any(keyword in str(error) for keyword in RATE_LIMIT_ERRORS):
+            base, cap = self.rate_limit_base, self.rate_limit_max
+        else:
+            base, cap = self.retry_base, self.retry_max
+        ceiling = min(cap, base * (2 ** attempt))
+        return ceiling / 2 + random.uniform(0, ceiling / 2)
+    
     def clean_text(self, text):
         """
         Clean text for TTS (same logic as Google for consistency).
@@ -55,6 +116,33 @@ class EdgeVoiceEngine:
         
         return text
     
+    def _prepare_text(self, text):
+        """Cleans text, substituting a placeholder if nothing speakable is left."""
+        clean_text = self.clean_text(text)
+        
+        if not clean_text or len(clean_text) < 2:
+            print(f"⚠️ Warning: Text empty after cleaning. Original: '{text}'")
+            clean_text = "Check the description."  # Fallback
+        
+        return clean_text
+    
+    def _communicate(self, text, voice_config):
+        """One edge_tts.Communicate request (the simulator swaps this out)."""
+        # The voice the caller picked - the TTS cache key and the Sheet's
+        # voice column both name it, so it must be the one that speaks
+        voice = voice_config.get('name') or DEFAULT_VOICE
+        try:
+            return edge_tts.Communicate(
+                text,
+                voice,
+                #pitch=voice_config['pitch'],
+                #rate=voice_config['rate'],
+                boundary="WordBoundary"
+            )
+        except TypeError:
+            # edge-tts < 7 has no 'boundary' option (always sends WordBoundary)
+            return edge_tts.Communicate(text, voice)
+    
     async def _generate_audio_async(self, text, output_path, voice_config):
         """
         Async wrapper for Edge TTS synthesis.
@@ -64,31 +152,41 @@ class EdgeVoiceEngine:
             output_path: Where to save audio file
             voice_config: Voice configuration dict from voice_config.py
         
+        Returns:
+            list: Word timings (also written to the '.words.json' sidecar)
+        
         Raises:
             Exception: If synthesis fails
         """
+        words = []
         try:
-            communicate = edge_tts.Communicate(
-                text,
-                "en-US-AndrewNeural"#,
-                #pitch=voice_config['pitch'],
-                #rate=voice_config['rate']
-            )
+            communicate = self._communicate(text, voice_config)
             
-            await communicate.save(output_path)
+            # Stream instead of save(): audio + word timings in the same pass
+            with open(output_path, 'wb') as f:
+                async for chunk in communicate.stream():
+                    if chunk["type"] == "audio":
+                        f.write(chunk["data"])
+                    elif chunk["type"] == "WordBoundary":
+                        start = chunk["offset"] / TICKS_PER_SECOND
+                        end = (chunk["offset"] + chunk["duration"]) / TICKS_PER_SECOND
+                        words.append({'word': chunk["text"], 'start': round(start, 3), 'end': round(end, 3)})
 
         except Exception as e:
             #print(f"   ❌ {output_path}:ERROR: {e}")
             #print(f"{text}:{voice_config['name']}")
             #import traceback
             #traceback.print_exc()
-            raise Exception(f"{e}")
+            raise Exception(f"{e}") from e  # Keeps the response (Retry-After) reachable
 
         print(f"{output_path}:{os.path.getsize(output_path)}")
         
         # Verify file was created
         if not os.path.exists(output_path) or os.path.getsize(output_path) == 0:
             raise Exception("Generated audio file is 0 bytes")
+        
+        save_words(output_path, words)
+        return words
     
     def synthesize(self, text, output_path, voice_config, max_retries=5):
         """
@@ -103,13 +201,7 @@ class EdgeVoiceEngine:
         Returns:
             tuple: (success: bool, chars_used: int, error_msg: str or None)
         """
-        # Clean text
-        clean_text = self.clean_text(text)
-        
-        if not clean_text or len(clean_text) < 2:
-            print(f"⚠️ Warning: Text empty after cleaning. Original: '{text}'")
-            clean_text = "Check the description."  # Fallback
-        
+        clean_text = self._prepare_text(text)
         chars_used = len(clean_text)
         
         # Retry logic with exponential backoff
@@ -130,12 +222,10 @@ class EdgeVoiceEngine:
                 error_msg = str(e)
                 
                 # Check for retryable errors (429 rate limits, connection issues)
-                if any(keyword in error_msg for keyword in [
-                    "429", "Connection", "Handshake", "NoAudioReceived", "received"
-                ]):
-                    wait_time = 5 + (attempt * 3)  # 5s, 10s, 15s, 20s
+                if any(keyword in error_msg for keyword in RETRYABLE_ERRORS):
+                    wait_time = self._retry_wait(attempt, e)
                     print(f"   ⚠️ Edge TTS Retry ({attempt+1}/{max_retries}): "
-                          f"{error_msg[:50]}... Waiting {wait_time}s")
+                          f"{error_msg[:50]}... Waiting {wait_time:.2f}s")
                     time.sleep(wait_time)
                 else:
                     # Non-retryable error
@@ -144,6 +234,55 @@ class EdgeVoiceEngine:
         # All retries exhausted
         return False, chars_used, f"Edge TTS failed after {max_retries} retries"
     
+    def synthesize_batch(self, items, max_concurrency=4, max_retries=5):
+        """
+        Synthesizes all segments of one video concurrently on ONE event loop.
+        
+        Args:
+            items: [(key, text, output_path, voice_config), ...]
+            max_concurrency: Max simultaneous Edge connections
+            max_retries: Attempts per item
+        
+        Returns:
+            dict: {key: (success: bool, chars_used: int, error_msg: str or None)}
+        """
+        if not items: return {}
+        return asyncio.run(self._synthesize_batch_async(items, max_concurrency, max_retries))
+    
+    async def _synthesize_batch_async(self, items, max_concurrency, max_retries):
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(max_concurrency)
+        # Shared backoff: one 429 pauses every item, not just the one that hit it
+        backoff = {'resume_at': 0.0}
+        
+        async def run_one(key, text, output_path, voice_config):
+            clean_text = self._prepare_text(text)
+            chars_used = len(clean_text)
+            
+            for attempt in range(max_retries):
+                delay = backoff['resume_at'] - loop.time()
+                if delay > 0: await asyncio.sleep(delay)
+                
+                async with semaphore:
+                    try:
+                        await self._generate_audio_async(clean_text, output_path, voice_config)
+                        return key, (True, chars_used, None)
+                    except Exception as e:
+                        error, error_msg = e, str(e)
+                
+                if any(keyword in error_msg for keyword in RETRYABLE_ERRORS):
+                    wait_time = self._retry_wait(attempt, error)
+                    backoff['resume_at'] = max(backoff['resume_at'], loop.time() + wait_time)
+                    print(f"   ⚠️ Edge TTS Retry [{key}] ({attempt+1}/{max_retries}): "
+                          f"{error_msg[:50]}... Pausing batch {wait_time:.2f}s")
+                else:
+                    return key, (False, chars_used, f"Edge TTS Error: {error_msg}")
+            
+            return key, (False, chars_used, f"Edge TTS failed after {max_retries} retries")
+        
+        results = await asyncio.gather(*(run_one(*item) for item in items))
+        return dict(results)
+    
     def test_connection(self):
         """
         Test if Edge TTS service is accessible.
@@ -7,10 +7,19 @@ Handles Neural2 voices for high-quality, natural Indian English output.
 
 import os
 import re
+import io
+import wave
+import html
+import subprocess
+import concurrent.futures
 from google.cloud import texttospeech
 from google.oauth2 import service_account
 from pathlib import Path
 
+from word_timings import save_words, words_from_marks
+
+MAX_SSML_BYTES = 5000  # Google rejects longer SynthesisInput (UTF-8 bytes, markup included)
+
 class GoogleVoiceEngine:
     """
     Google Cloud TTS engine with multi-account support and quota management.
@@ -26,6 +35,7 @@ class GoogleVoiceEngine:
         self.config_dir = config_dir
         self.accounts = self._discover_accounts()
         self.clients = {}  # Cache of initialized clients
+        self.beta_clients = {}  # v1beta1 clients (SSML mark timepoints)
         
         if not self.accounts:
             raise FileNotFoundError(
@@ -79,6 +89,28 @@ class GoogleVoiceEngine:
         
         return client
     
+    def _get_beta_client(self, account_name):
+        """
+        v1beta1 client for the account (only v1beta1 returns SSML mark timepoints).
+        
+        Returns:
+            texttospeech_v1beta1.TextToSpeechClient
+        """
+        if account_name in self.beta_clients:
+            return self.beta_clients[account_name]
+        
+        if account_name not in self.accounts:
+            raise ValueError(f"Account '{account_name}' not found")
+        
+        from google.cloud import texttospeech_v1beta1
+        credentials = service_account.Credentials.from_service_account_file(
+            self.accounts[account_name]
+        )
+        client = texttospeech_v1beta1.TextToSpeechClient(credentials=credentials)
+        self.beta_clients[account_name] = client
+        
+        return client
+    
     def clean_text(self, text):
         """
         Clean text for TTS (same logic as Edge TTS for consistency).
@@ -123,7 +155,7 @@ class GoogleVoiceEngine:
         
         return text
     
-    def synthesize(self, text, output_path, voice_config, account_name):
+    def synthesize(self, text, output_path, voice_config, account_name, word_timings=True):
         """
         Synthesize speech using Google Cloud TTS.
         
@@ -132,6 +164,9 @@ class GoogleVoiceEngine:
             output_path: Where to save MP3 file
             voice_config: Voice configuration dict from voice_config.py
             account_name: Which account to use (e.g., 'account1')
+            word_timings: Request per-word mark timepoints (v1beta1 SSML) and
+                          write the '.words.json' sidecar, as far as the marked
+                          document fits MAX_SSML_BYTES (else plain text, no sidecar)
         
         Returns:
             tuple: (success: bool, chars_used: int, error_msg: str or None)
@@ -146,6 +181,12 @@ class GoogleVoiceEngine:
             
             chars_used = len(clean_text)
             
+            if word_timings:
+                ssml, marked_chars, tokens = self.build_marked_ssml([text])
+                if len(ssml.encode('utf-8')) <= MAX_SSML_BYTES:
+                    return self._synthesize_with_word_marks(ssml, marked_chars, tokens, output_path,
+                                                            voice_config, account_name)
+            
             # Get client for this account
             client = self._get_client(account_name)
             
@@ -191,6 +232,209 @@ class GoogleVoiceEngine:
             
             return False, 0, f"Google TTS Error: {error_msg}"
     
+    def _synthesize_with_word_marks(self, ssml, chars_used, tokens, output_path, voice_config, account_name):
+        """
+        Single-segment synthesis of a build_marked_ssml() document (MP3 + word
+        timings). Quota errors propagate to synthesize()'s handler.
+        """
+        from google.cloud import texttospeech_v1beta1 as tts_beta
+        
+        client = self._get_beta_client(account_name)
+        
+        response = client.synthesize_speech(
+            request={
+                'input': tts_beta.SynthesisInput(ssml=ssml),
+                'voice': tts_beta.VoiceSelectionParams(
+                    language_code=voice_config['language_code'],
+                    name=voice_config['name']
+                ),
+                'audio_config': tts_beta.AudioConfig(
+                    audio_encoding=tts_beta.AudioEncoding.MP3,
+                    speaking_rate=voice_config.get('speaking_rate', 1.0),
+                    pitch=voice_config.get('pitch', 0.0)
+                ),
+                'enable_time_pointing': [tts_beta.SynthesizeSpeechRequest.TimepointType.SSML_MARK]
+            }
+        )
+        
+        with open(output_path, 'wb') as out:
+            out.write(response.audio_content)
+        
+        if not os.path.exists(output_path) or os.path.getsize(output_path) == 0:
+            return False, chars_used, "Generated audio file is empty"
+        
+        timepoints = {tp.mark_name: tp.time_seconds for tp in response.timepoints}
+        clip_end = timepoints.get('end', max(timepoints.values(), default=0.0))
+        save_words(output_path, self.words_for_segment(0, tokens[0], timepoints, 0.0, clip_end))
+        
+        return True, chars_used, None
+    
+    def build_marked_ssml(self, texts, word_marks=None):
+        """
+        One SSML document for several segments: a <mark> before each segment,
+        one before every word (word timings) and an 'end' mark after the last.
+        
+        Args:
+            texts: List of raw segment texts
+            word_marks: True/False forces per-word marks on/off; None keeps them
+                        only while the document fits MAX_SSML_BYTES (segments
+                        without word marks get estimated timings downstream)
+        
+        Returns:
+            tuple: (ssml: str, billed_chars: int, tokens: [[word, ...] per segment])
+        """
+        tokens = []
+        for text in texts:
+            clean_text = self.clean_text(text)
+            if not clean_text or len(clean_text) < 2:
+                print(f"⚠️ Warning: Text empty after cleaning. Original: '{text}'")
+                clean_text = "Check the description."  # Fallback
+            tokens.append(clean_text.split())
+        
+        def render(with_words):
+            parts = []
+            for i, words in enumerate(tokens):
+                if with_words:
+                    body = " ".join(f'<mark name="s{i}w{j}"/>{html.escape(w, quote=False)}' for j, w in enumerate(words))
+                else:
+                    body = html.escape(" ".join(words), quote=False)
+                parts.append(f'<mark name="seg{i}"/>{body}')
+            return "<speak>" + " ".join(parts) + '<mark name="end"/></speak>'
+        
+        ssml = render(word_marks is not False)
+        if word_marks is None and len(ssml.encode('utf-8')) > MAX_SSML_BYTES:
+            ssml = render(False)
+        
+        # <mark> tags are not billed; everything else in the document is
+        billed_chars = len(re.sub(r'<mark name="[^"]*"/>', '', ssml))
+        return ssml, billed_chars, tokens
+    
+    @staticmethod
+    def words_for_segment(index, tokens, timepoints, seg_start, seg_end):
+        """
+        Word table of segment `index`, relative to seg_start (None if marks are missing).
+        """
+        names = [f"s{index}w{j}" for j in range(len(tokens))]
+        if not all(n in timepoints for n in names): return None
+        starts = [timepoints[n] - seg_start for n in names]
+        return words_from_marks(tokens, starts, seg_end - seg_start)
+    
+    @staticmethod
+    def split_at_marks(pcm, sample_rate, timepoints, count):
+        """
+        Cuts one mono 16-bit PCM track into `count` segments at the mark offsets.
+        
+        Args:
+            pcm: Raw PCM bytes
+            timepoints: {mark_name: seconds} ('seg0'..'segN-1', optional 'end')
+        
+        Returns:
+            list: [(pcm_bytes, start_seconds), ...] one per segment
+        """
+        total = len(pcm) // 2
+        bounds = []
+        for i in range(count):
+            if f"seg{i}" not in timepoints:
+                raise ValueError(f"Missing timepoint for mark seg{i}")
+            bounds.append(int(round(timepoints[f"seg{i}"] * sample_rate)))
+        bounds[0] = 0  # Keep any leading breath with the first segment
+        bounds.append(total)  # Last segment runs to the end of the track
+        
+        return [
+            (pcm[bounds[i] * 2:max(bounds[i], bounds[i + 1]) * 2], bounds[i] / sample_rate)
+            for i in range(count)
+        ]
+    
+    @staticmethod
+    def write_pcm(pcm, sample_rate, output_path):
+        """Writes a PCM segment as WAV, or as MP3 through ffmpeg for any other extension."""
+        if output_path.lower().endswith('.wav'):
+            with wave.open(output_path, 'wb') as w:
+                w.setnchannels(1)
+                w.setsampwidth(2)
+                w.setframerate(sample_rate)
+                w.writeframes(pcm)
+            return
+        cmd = [
+            'ffmpeg', '-y', '-nostdin', '-v', 'error',
+            '-f', 's16le', '-ar', str(sample_rate), '-ac', '1', '-i', '-',
+            '-c:a', 'libmp3lame', '-q:a', '2', output_path
+        ]
+        subprocess.run(cmd, input=pcm, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, check=True)
+    
+    def synthesize_marked(self, segments, voice_config, account_name, sample_rate=24000):
+        """
+        Synthesizes several segments in ONE request (continuous prosody) and
+        splits the track at SSML mark timepoints.
+        
+        Args:
+            segments: [(key, text, output_path), ...] in speaking order
+            voice_config: Voice configuration dict from voice_config.py
+            account_name: Which account to use
+            sample_rate: LINEAR16 sample rate requested from the API
+        
+        Returns:
+            tuple: (success: bool, chars_used: int, error_msg: str or None, offsets: {key: seconds})
+                   error_msg starts with SSML_TOO_LONG (nothing sent) when even the
+                   segment-marks-only document exceeds MAX_SSML_BYTES
+        """
+        try:
+            from google.cloud import texttospeech_v1beta1 as tts_beta
+            
+            ssml, chars_used, tokens = self.build_marked_ssml([text for _, text, _ in segments])
+            ssml_bytes = len(ssml.encode('utf-8'))
+            if ssml_bytes > MAX_SSML_BYTES:
+                return False, 0, f"SSML_TOO_LONG: {ssml_bytes} bytes > {MAX_SSML_BYTES}", {}
+            client = self._get_beta_client(account_name)
+            
+            response = client.synthesize_speech(
+                request={
+                    'input': tts_beta.SynthesisInput(ssml=ssml),
+                    'voice': tts_beta.VoiceSelectionParams(
+                        language_code=voice_config['language_code'],
+                        name=voice_config['name']
+                    ),
+                    'audio_config': tts_beta.AudioConfig(
+                        audio_encoding=tts_beta.AudioEncoding.LINEAR16,
+                        sample_rate_hertz=sample_rate,
+                        speaking_rate=voice_config.get('speaking_rate', 1.0),
+                        pitch=voice_config.get('pitch', 0.0)
+                    ),
+                    'enable_time_pointing': [tts_beta.SynthesizeSpeechRequest.TimepointType.SSML_MARK]
+                }
+            )
+            
+            # LINEAR16 comes back as a WAV file
+            with wave.open(io.BytesIO(response.audio_content), 'rb') as w:
+                sample_rate = w.getframerate()
+                pcm = w.readframes(w.getnframes())
+            
+            timepoints = {tp.mark_name: tp.time_seconds for tp in response.timepoints}
+            pieces = self.split_at_marks(pcm, sample_rate, timepoints, len(segments))
+            
+            # One ffmpeg MP3 encode per segment: run them side by side, not back to back
+            with concurrent.futures.ThreadPoolExecutor(max_workers=min(len(pieces), os.cpu_count() or 1)) as pool:
+                writes = [pool.submit(self.write_pcm, piece, sample_rate, output_path)
+                          for (_, _, output_path), (piece, _) in zip(segments, pieces)]
+                for fut in writes: fut.result()
+            
+            offsets = {}
+            for i, ((key, _, output_path), (piece, start)) in enumerate(zip(segments, pieces)):
+                offsets[key] = start
+                seg_end = start + len(piece) / 2 / sample_rate
+                save_words(output_path, self.words_for_segment(i, tokens[i], timepoints, start, seg_end))
+            
+            return True, chars_used, None, offsets
+        
+        except Exception as e:
+            error_msg = str(e)
+            
+            # Check for quota errors
+            if "429" in error_msg or "quota" in error_msg.lower() or "RESOURCE_EXHAUSTED" in error_msg:
+                return False, 0, f"QUOTA_EXCEEDED: {error_msg}", {}
+            
+            return False, 0, f"Google TTS Error: {error_msg}", {}
+    
     def get_available_accounts(self):
         """
         Get list of available account names.
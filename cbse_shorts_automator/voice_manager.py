@@ -8,24 +8,36 @@ INTERFACE: Maintains 100% backward compatibility with existing codebase.
 """
 
 import os
+import time
+import threading
 import random
-from moviepy.editor import AudioFileClip
+import concurrent.futures
 
 # Import our modular voice engines
 from voice_config import GOOGLE_VOICES, EDGE_VOICES, get_random_google_voice, get_random_edge_voice
 from voice_google import GoogleVoiceEngine
 from voice_edge import EdgeVoiceEngine
 from voice_usage_tracker import VoiceUsageTracker
+from tts_cache import TTSCache, tts_cache_key, WORDS_FILE
+from word_timings import words_path_for, load_words, save_words, estimate_words
+from voice_clip import VoiceClip
+from synthesis_result import SynthesisResult
+from tts_router import ProviderRouter
 
 class VoiceManager:
     """
     Unified voice manager with intelligent provider selection.
     
     BACKWARD COMPATIBLE: Existing code continues to work unchanged.
-    New feature: self.last_used_system for logging to Google Sheets.
+    Every returned clip carries clip.result (SynthesisResult); pass usage=
+    (a VoiceJobUsage) to collect a job's results. last_used_system /
+    char_count still report the most recent call of ANY job.
     """
     
-    def __init__(self, voice_name=None, config_dir='config', data_dir='data'):
+    def __init__(self, voice_name=None, config_dir='config', data_dir='data',
+                 cache_dir='cache/tts', cache_max_bytes=None, google_single_request=False,
+                 account_strategy='round_robin', router=None, google_engine=None, edge_engine=None,
+                 google_batch_timeout=60):
         """
         Initialize voice manager with auto-detection of available providers.
         
@@ -33,17 +45,35 @@ class VoiceManager:
             voice_name: Optional specific voice (for backward compatibility)
             config_dir: Where to find google_tts_account*.json files
             data_dir: Where to store usage tracking data
+            cache_dir: Synthesized clip cache (None disables it)
+            cache_max_bytes: Size cap for the clip cache (None = unbounded)
+            google_single_request: Batch mode sends all Google segments of a video
+                                   as one SSML request and splits at <mark> timepoints
+            account_strategy: How batch mode spreads videos over Google accounts
+                              ('round_robin' or 'weighted', see VoiceUsageTracker.reserve_quota)
+            router: ProviderRouter (circuit breakers + hedging); default settings if None
+            google_engine, edge_engine: Pre-built engines (e.g., from voice_simulator)
+                                        instead of the real services
+            google_batch_timeout: Seconds a video's per-segment Google synthesis may
+                                  take before the whole video is re-voiced on Edge
         """
         self.config_dir = config_dir
         self.data_dir = data_dir
         
+        # Clip cache: repeated phrases and retried renders skip the network + quota
+        self.tts_cache = TTSCache(cache_dir, max_bytes=cache_max_bytes) if cache_dir else None
+        self.google_single_request = google_single_request
+        self.account_strategy = account_strategy
+        self.router = router or ProviderRouter()
+        self.google_batch_timeout = google_batch_timeout
+        
         # Initialize engines
-        self.google_engine = None
-        self.edge_engine = EdgeVoiceEngine()
+        self.google_engine = google_engine
+        self.edge_engine = edge_engine or EdgeVoiceEngine()
         
         # Try to initialize Google TTS (may not be available)
         try:
-            self.google_engine = GoogleVoiceEngine(config_dir)
+            self.google_engine = self.google_engine or GoogleVoiceEngine(config_dir)
             self.google_accounts = self.google_engine.get_available_accounts()
         except FileNotFoundError:
             print("⚠️ No Google Cloud TTS accounts found. Using Edge TTS only.")
@@ -59,7 +89,7 @@ class VoiceManager:
         # Voice selection (for backward compatibility)
         self.voice_name = voice_name
         
-        # Logging attributes (NEW - for Google Sheets logging)
+        # Most recent call of any job (legacy; per-job callers use clip.result / usage)
         self.last_used_system = None  # e.g., "Google-account1-NeeraNeural2" or "Edge-PrabhatNeural"
         self.char_count = 0
     
@@ -133,6 +163,52 @@ class VoiceManager:
         print(f"   🟢 Using Edge TTS (Voice: {voice_key})")
         return 'edge', None, voice_config, voice_key
     
+    def _tts_cache_key(self, text, provider, voice_config):
+        """Cache key from the text exactly as the provider would receive it."""
+        engine = self.google_engine if provider == 'google' and self.google_engine else self.edge_engine
+        return tts_cache_key(engine.clean_text(text), provider, voice_config)
+    
+    def _restore_from_cache(self, text, output_path, provider, voice_config):
+        """
+        Copies a previously synthesized clip to output_path.
+        
+        Returns:
+            bool: True on a cache hit (no synthesis, no quota charge needed)
+        """
+        if not self.tts_cache: return False
+        if self.tts_cache.restore(self._tts_cache_key(text, provider, voice_config), output_path,
+                                  extra_files={WORDS_FILE: words_path_for(output_path)}):
+            print(f"   ♻️ TTS cache hit ({provider}, {voice_config.get('name')}): {os.path.basename(output_path)}")
+            return True
+        return False
+    
+    def _save_to_cache(self, text, output_path, provider, voice_config):
+        """Stores a freshly synthesized clip for later runs."""
+        if not self.tts_cache: return
+        words_path = words_path_for(output_path)
+        self.tts_cache.store_clip(
+            self._tts_cache_key(text, provider, voice_config), output_path,
+            meta={'provider': provider, 'voice': voice_config.get('name')},
+            extra_files={WORDS_FILE: words_path} if os.path.exists(words_path) else None
+        )
+    
+    def _open_clip(self, text, output_path, result, usage=None):
+        """
+        VoiceClip (header-probed duration, no decoding) with its word timing
+        table as clip.words (provider timings; estimated from text if the
+        provider gave none) and its SynthesisResult as clip.result.
+        """
+        clip = VoiceClip(output_path, result=result)
+        words = load_words(output_path)
+        if words is None:
+            words = estimate_words(self.clean_text(text), clip.duration)
+        clip.words = words
+        
+        if usage is not None: usage.add(result)
+        self.last_used_system = result.label
+        self.char_count = result.chars
+        return clip
+    
     def _synthesize_with_provider(self, text, output_path, provider, account, voice_config):
         """
         Synthesize audio using the selected provider.
@@ -156,7 +232,7 @@ class VoiceManager:
                 text, output_path, voice_config
             )
     
-    def generate_audio_sync(self, text, output_path, override_voice=None):
+    def generate_audio_sync(self, text, output_path, override_voice=None, usage=None):
         """
         Generate audio synchronously (BACKWARD COMPATIBLE interface).
         
@@ -164,16 +240,24 @@ class VoiceManager:
             text: Text to synthesize
             output_path: Where to save MP3
             override_voice: Optional voice override (for compatibility)
+            usage: Optional VoiceJobUsage collecting this job's results
         
         Returns:
-            AudioFileClip: MoviePy audio clip object
+            VoiceClip: Clip descriptor (AudioFileClip-compatible, opened lazily)
         
         Raises:
             Exception: If synthesis fails completely
         """
+        started = time.monotonic()
+        
         # Step 1: Select provider and voice
         provider, account, voice_config, voice_key = self._select_provider_and_voice(text)
         
+        # Step 1b: Serve from the clip cache (no network, no quota charge)
+        if self._restore_from_cache(text, output_path, provider, voice_config):
+            result = SynthesisResult(provider, voice_key, cache_hit=True, latency=time.monotonic() - started)
+            return self._open_clip(text, output_path, result, usage)
+        
         # Step 2: Attempt synthesis
         success, chars_used, error_msg = self._synthesize_with_provider(
             text, output_path, provider, account, voice_config
@@ -197,6 +281,7 @@ class VoiceManager:
         
         # Step 4: Log usage
         if success:
+            self._save_to_cache(text, output_path, provider, voice_config)
             account_label = account if account else 'edge'
             self.tracker.log_usage(
                 account_name=account_label,
@@ -204,21 +289,225 @@ class VoiceManager:
                 chars_used=chars_used,
                 voice_used=voice_key
             )
-            
-            # Set logging attributes for Google Sheets
-            if provider == 'google':
-                self.last_used_system = f"Google-{account}-{voice_key}"
-            else:
-                self.last_used_system = f"Edge-{voice_key}"
-            
-            self.char_count = chars_used
         
         # Step 5: Verify and return
         if success and os.path.exists(output_path):
-            return AudioFileClip(output_path)
+            result = SynthesisResult(provider, voice_key, chars_used, account,
+                                     latency=time.monotonic() - started)
+            return self._open_clip(text, output_path, result, usage)
         else:
             raise Exception(f"TTS synthesis failed: {error_msg}")
-    def generate_audio_with_specific_voice(self, text, output_path, voice_key, provider='google'):
+    def _resolve_voice(self, voice_key, provider):
+        """
+        Finds the voice configuration, switching provider if the key belongs to the other one.
+        
+        Returns:
+            tuple: (provider: str, voice_config: dict)
+        """
+        if provider == 'google' and voice_key in GOOGLE_VOICES:
+            return 'google', GOOGLE_VOICES[voice_key]
+        if provider == 'edge' and voice_key in EDGE_VOICES:
+            return 'edge', EDGE_VOICES[voice_key]
+        # Fallback: try to find voice in either provider
+        if voice_key in GOOGLE_VOICES:
+            return 'google', GOOGLE_VOICES[voice_key]
+        if voice_key in EDGE_VOICES:
+            return 'edge', EDGE_VOICES[voice_key]
+        raise ValueError(f"Voice '{voice_key}' not found in Google or Edge voices")
+    
+    def _edge_voice_for(self, voice_key, voice_config):
+        """
+        Edge voice to use for voice_key (Google voices map to an Edge voice).
+        
+        Returns:
+            tuple: (edge_voice_key: str, voice_config: dict)
+        """
+        if voice_key in GOOGLE_VOICES:
+            # Try to find similar Edge voice (same gender)
+            edge_voice_key = get_random_edge_voice()  # Fallback to random
+            return edge_voice_key, EDGE_VOICES[edge_voice_key]
+        return voice_key, voice_config
+    
+    @staticmethod
+    def _staging_path(output_path, provider):
+        """Per-provider file for an attempt ('hook.mp3' -> 'hook.google.mp3'), so hedged attempts never collide."""
+        base, ext = os.path.splitext(output_path)
+        return f"{base}.{provider}{ext}"
+    
+    def _google_attempt(self, text, output_path, voice_key, voice_config, reservation=None):
+        """
+        Router attempt: Google synthesis into a staging file.
+        
+        Returns:
+            function: () -> outcome dict, raises on failure
+        """
+        def attempt():
+            if reservation:
+                account = reservation['account']
+            else:
+                account = self.tracker.find_available_account(
+                    self._estimate_chars_needed(text), self.google_accounts
+                )
+            if not account:
+                raise RuntimeError("No Google account with sufficient quota")
+            
+            staging = self._staging_path(output_path, 'google')
+            success, chars_used, error_msg = self._synthesize_with_provider(
+                text, staging, 'google', account, voice_config
+            )
+            if not success: raise RuntimeError(f"Google TTS: {error_msg}")
+            
+            # Billed even if the hedge wins the race (see ProviderRouter.record_discard)
+            self.tracker.log_usage(account, 'google', chars_used, voice_key,
+                                   reservation_id=reservation and reservation['id'])
+            return {'path': staging, 'voice_config': voice_config,
+                    'result': SynthesisResult('google', voice_key, chars_used, account)}
+        return attempt
+    
+    def _edge_attempt(self, text, output_path, edge_voice_key, edge_config):
+        """
+        Router attempt: Edge clip (cache first) into a staging file.
+        
+        Returns:
+            function: () -> outcome dict, raises on failure
+        """
+        def attempt():
+            staging = self._staging_path(output_path, 'edge')
+            if self._restore_from_cache(text, staging, 'edge', edge_config):
+                return {'path': staging, 'voice_config': edge_config,
+                        'result': SynthesisResult('edge', edge_voice_key, cache_hit=True)}
+            
+            success, chars_used, error_msg = self._synthesize_with_provider(
+                text, staging, 'edge', None, edge_config
+            )
+            if not success: raise RuntimeError(error_msg)
+            
+            self.tracker.log_usage('edge', 'edge', chars_used, edge_voice_key)
+            return {'path': staging, 'voice_config': edge_config,
+                    'result': SynthesisResult('edge', edge_voice_key, chars_used)}
+        return attempt
+    
+    def _discard_attempt(self, provider, outcome):
+        """Deletes the files of an attempt that lost a hedged race (its characters were still billed)."""
+        self.router.record_discard(provider, outcome['result'].chars)
+        for path in (outcome['path'], words_path_for(outcome['path'])):
+            if os.path.exists(path): os.remove(path)
+    
+    @staticmethod
+    def _promote(staging, output_path):
+        """Moves a staged clip (and its word timings) to output_path."""
+        os.replace(staging, output_path)
+        staged_words = words_path_for(staging)
+        if os.path.exists(staged_words):
+            os.replace(staged_words, words_path_for(output_path))
+        else:
+            save_words(output_path, None)
+    
+    def _route_segment(self, text, output_path, voice_key, voice_config, provider, usage=None):
+        """
+        One stand-alone segment through the provider router: Google (if
+        requested and its breaker is closed) with Edge as fallback - or as a
+        hedge when Google is slower than its p95. Batches don't come here:
+        they pick one provider per video (generate_batch_with_specific_voice).
+        
+        Args:
+            usage: Optional VoiceJobUsage collecting this job's results
+        
+        Returns:
+            VoiceClip
+        
+        Raises:
+            Exception: If every provider failed
+        """
+        started = time.monotonic()
+        
+        # Serve Google clips from the cache before touching any account quota
+        if provider == 'google' and self._restore_from_cache(text, output_path, 'google', voice_config):
+            result = SynthesisResult('google', voice_key, cache_hit=True, latency=time.monotonic() - started)
+            return self._open_clip(text, output_path, result, usage)
+        
+        attempts = []
+        if provider == 'google' and self.google_engine and self.google_accounts:
+            attempts.append(('google', self._google_attempt(text, output_path, voice_key, voice_config)))
+        edge_voice_key, edge_config = self._edge_voice_for(voice_key, voice_config)
+        attempts.append(('edge', self._edge_attempt(text, output_path, edge_voice_key, edge_config)))
+        
+        winner, outcome = self.router.run(attempts, discard=self._discard_attempt)
+        if provider == 'google' and winner == 'edge':
+            print(f" Voice used for {output_path}: {edge_voice_key}")
+        
+        self._promote(outcome['path'], output_path)
+        self._save_to_cache(text, output_path, winner, outcome['voice_config'])
+        result = outcome['result']
+        result.latency = time.monotonic() - started  # Including any hedge/fallback
+        return self._open_clip(text, output_path, result, usage)
+    
+    def _try_google_marked(self, pending, voice_key, voice_config, reservation, usage=None):
+        """
+        All pending segments in ONE Google request (SSML marks), split per segment.
+        
+        Args:
+            pending: {key: (text, output_path)} in speaking order
+            reservation: Quota reservation covering the whole request
+            usage: Optional VoiceJobUsage collecting this job's results
+        
+        Returns:
+            dict or None: {key: VoiceClip}, None means "fall back to per-segment"
+        """
+        segments = [(key, text, path) for key, (text, path) in pending.items()]
+        available_account = reservation['account']
+        
+        print(f"   🔵 Google TTS single request: {len(segments)} segments (Account: {available_account}, Voice: {voice_key})")
+        started = time.monotonic()
+        success, chars_used, error_msg, _ = self.google_engine.synthesize_marked(
+            segments, voice_config, available_account
+        )
+        if not success:
+            # An oversized script never reached Google: not a provider failure
+            if not error_msg.startswith("SSML_TOO_LONG"): self.router.breaker('google').record_failure()
+            print(f"   ⚠️ Single-request synthesis failed ({error_msg}). Synthesizing per segment.")
+            return None
+        self.router.breaker('google').record_success()
+        
+        latency = time.monotonic() - started
+        self.tracker.log_usage(available_account, 'google', chars_used, voice_key,
+                               reservation_id=reservation['id'])
+        
+        # One bill for the request: shared out by segment length
+        lengths = [len(self.google_engine.clean_text(text)) or 1 for _, text, _ in segments]
+        shares = [chars_used * n // sum(lengths) for n in lengths]
+        shares[-1] += chars_used - sum(shares)
+        
+        clips = {}
+        for (key, text, path), chars in zip(segments, shares):
+            self._save_to_cache(text, path, 'google', voice_config)
+            result = SynthesisResult('google', voice_key, chars, available_account, latency=latency)
+            clips[key] = self._open_clip(text, path, result, usage)
+        return clips
+    
+    def _reserve_google(self, pending):
+        """
+        Reserves quota for every pending segment of a video on one account, so
+        the voice cannot switch provider mid-video when parallel jobs drain it.
+        
+        Returns:
+            dict or None: Reservation (see VoiceUsageTracker.reserve_quota)
+        """
+        if not self.google_accounts: return None
+        texts = [text for text, _ in pending.values()]
+        chars_needed = sum(self._estimate_chars_needed(text) for text in texts)
+        if self.google_single_request:
+            _, marked_chars, _ = self.google_engine.build_marked_ssml(texts)
+            chars_needed = max(chars_needed, marked_chars)
+        
+        reservation = self.tracker.reserve_quota(chars_needed, self.google_accounts, self.account_strategy)
+        if reservation:
+            print(f"   🔒 Reserved {chars_needed:,} chars on {reservation['account']} for {len(texts)} segments")
+        else:
+            print(f"   ⚠️ No Google account can take the whole video ({chars_needed:,} chars). Using Edge TTS.")
+        return reservation
+    
+    def generate_audio_with_specific_voice(self, text, output_path, voice_key, provider='google', usage=None):
         """
         Generate audio using a specific voice (no randomization).
         Used when a video needs consistent voice across all segments.
@@ -228,102 +517,188 @@ class VoiceManager:
             output_path: Where to save MP3
             voice_key: Specific voice to use (e.g., 'NeeraNeural2' from Google or 'NeerjaNeural' from Edge)
             provider: 'google' or 'edge' (default: 'google', falls back to 'edge' if quota exhausted)
+            usage: Optional VoiceJobUsage collecting this job's results
         
         Returns:
-            AudioFileClip: MoviePy audio clip object
+            VoiceClip: Clip descriptor (AudioFileClip-compatible, opened lazily)
         """
-
-        
-        #print(f"1.{provider}")
         # Step 1: Get voice configuration
-        if provider == 'google' and voice_key in GOOGLE_VOICES:
-            voice_config = GOOGLE_VOICES[voice_key]
-        elif provider == 'edge' and voice_key in EDGE_VOICES:
-            voice_config = EDGE_VOICES[voice_key]
-        else:
-            # Fallback: try to find voice in either provider
-            if voice_key in GOOGLE_VOICES:
-                voice_config = GOOGLE_VOICES[voice_key]
-                provider = 'google'
-            elif voice_key in EDGE_VOICES:
-                voice_config = EDGE_VOICES[voice_key]
-                provider = 'edge'
-            else:
-                raise ValueError(f"Voice '{voice_key}' not found in Google or Edge voices")
+        provider, voice_config = self._resolve_voice(voice_key, provider)
+        
+        # Step 2: Google (cache, then synthesis) with Edge as fallback/hedge
+        try:
+            return self._route_segment(text, output_path, voice_key, voice_config, provider, usage=usage)
+        except Exception as e:
+            # Step 3: Complete failure
+            raise Exception(f"Failed to synthesize audio with voice '{voice_key},{provider}': {e}")
 
+    def _google_staged(self, text, output_path, voice_key, voice_config, reservation):
+        """
+        One segment of a reserved Google batch: Google only - no hedge (the
+        reservation is billed whoever wins) and no per-segment Edge fallback
+        (the batch falls back as a whole).
         
-        #print(f"2.{provider}")
+        Returns:
+            dict: Attempt outcome; the clip is still in its staging file
+        """
+        started = time.monotonic()
+        _, outcome = self.router.run([
+            ('google', self._google_attempt(text, output_path, voice_key, voice_config, reservation))
+        ])
+        outcome['result'].latency = time.monotonic() - started
+        return outcome
+    
+    def _google_batch(self, tasks, voice_key, voice_config, max_concurrency):
+        """
+        Every segment of one video on Google with one voice, or nothing.
         
-        # Step 2: Estimate characters and check quota
-        chars_needed = self._estimate_chars_needed(text)
+        Returns:
+            dict or None: {key: VoiceClip} (not yet added to any usage), or None
+                          if the video has to go to Edge as a whole (no quota,
+                          breaker open, a segment failed or the batch timed out)
+        """
+        clips = {}
+        pending = {}
         
-        # Step 3: Try Google first if requested
-        if provider == 'google' and self.google_engine and self.google_accounts:
-            available_account = self.tracker.find_available_account(
-                chars_needed,
-                self.google_accounts
-            )
-
-            print(f"3.{available_account}")
-            
-            if available_account:
-                success, chars_used, error_msg = self._synthesize_with_provider(
-                    text, output_path, 'google', available_account, voice_config
-                )
-                
-                if success:
-                    self.tracker.log_usage(available_account, 'google', chars_used, voice_key)
-                    self.last_used_system = f"Google-{available_account}-{voice_key}"
-                    self.char_count = chars_used
-                    return AudioFileClip(output_path)
-                elif "QUOTA_EXCEEDED" in str(error_msg):
-                    print(f"   ⚠️ Google quota exhausted. Falling back to Edge TTS.")
-                    provider = 'edge'
-            else:
-                print(f"   ⚠️ No Google account with sufficient quota. Using Edge TTS.")
-                provider = 'edge'
-
-        provider = 'edge'
-        # Step 4: Use Edge TTS (fallback or requested)
-        if provider == 'edge':
-            print(f" provider: {provider}")
-            # Map to equivalent Edge voice if we were trying Google
-            if voice_key in GOOGLE_VOICES:
-                # Try to find similar Edge voice (same gender)
-                edge_voice_key = get_random_edge_voice()  # Fallback to random
-                voice_config = EDGE_VOICES[edge_voice_key]
-                print(f" Voice used for {output_path}: {edge_voice_key}")
-                
+        # Cache hits cost nothing and need no account
+        for key, (text, path) in tasks.items():
+            started = time.monotonic()
+            if self._restore_from_cache(text, path, 'google', voice_config):
+                result = SynthesisResult('google', voice_key, cache_hit=True, latency=time.monotonic() - started)
+                clips[key] = self._open_clip(text, path, result)
             else:
-                edge_voice_key = voice_key
+                pending[key] = (text, path)
+        if not pending: return clips
+        
+        if not self.router.is_available('google'):
+            print("   ⚠️ Google TTS circuit open. Using Edge TTS.")
+            return None
+        
+        # Reserve the rest of the video on one account, then synthesize - as one
+        # SSML document (google_single_request) or segment by segment
+        reservation = self._reserve_google(pending)
+        if not reservation: return None
+        try:
+            if self.google_single_request:
+                marked = self._try_google_marked(pending, voice_key, voice_config, reservation)
+                if marked:
+                    clips.update(marked)
+                    return clips
             
-            success, chars_used, error_msg = self._synthesize_with_provider(
-                text, output_path, 'edge', None, voice_config
-            )
-
-            print(f" 0.edge: {success}:{output_path}")
-            try:
-                if success:
-                
-                    print(f" 1.edge: {success}:{output_path}")
-                    self.tracker.log_usage('edge', 'edge', chars_used, edge_voice_key)
-                    #print(f" 2.edge: {success}:{output_path}")
-                    self.last_used_system = f"Edge-{edge_voice_key}"
-                    #print(f" 3.edge: {success}:{output_path}")
-                    self.char_count = chars_used
-                    #print(f" 4.edge: {success}:{output_path}")
-                    generated_aud_file=AudioFileClip(output_path);
-                    print(f" 5.edge: {success}:{output_path}")
-                    return generated_aud_file
-
+            executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_concurrency)
+            futures = {
+                executor.submit(self._google_staged, text, path, voice_key, voice_config, reservation): key
+                for key, (text, path) in pending.items()
+            }
+            done, not_done = concurrent.futures.wait(futures, timeout=self.google_batch_timeout,
+                                                     return_when=concurrent.futures.FIRST_EXCEPTION)
+            # Segments still queued never reach Google once the video has gone to Edge
+            executor.shutdown(wait=False, cancel_futures=True)
             
-            except Exception as e:
-                print(f"   ❌ ERROR: {e}")
-                import traceback
-                traceback.print_exc()
+            failed = [futures[f] for f in done if f.exception() is not None]
+            if failed or not_done:
+                reason = f"failed for {', '.join(failed)}" if failed else f"timed out after {self.google_batch_timeout}s"
+                print(f"   ⚠️ Google TTS {reason}. Voicing the whole video with Edge TTS.")
+                for future in futures:
+                    future.add_done_callback(self._discard_staged)
+                # Segments already talking to Google are still billed against the
+                # reservation: keep it until they finish
+                self._commit_when_done(reservation, not_done)
+                reservation = None
+                return None
+            
+            for future, key in futures.items():
+                text, path = pending[key]
+                outcome = future.result()
+                self._promote(outcome['path'], path)
+                self._save_to_cache(text, path, 'google', voice_config)
+                clips[key] = self._open_clip(text, path, outcome['result'])
+            return clips
+        finally:
+            if reservation: self.tracker.commit_reservation(reservation['id'])
+    
+    def _commit_when_done(self, reservation, futures):
+        """Commits reservation once every future in futures is done (or cancelled)."""
+        remaining = {'n': len(futures)}
+        lock = threading.Lock()
+        
+        def on_done(_):
+            with lock:
+                remaining['n'] -= 1
+                last = remaining['n'] == 0
+            if last: self.tracker.commit_reservation(reservation['id'])
+        
+        if not futures:
+            self.tracker.commit_reservation(reservation['id'])
+        for future in futures:
+            future.add_done_callback(on_done)
+    
+    def _discard_staged(self, future):
+        """Done-callback: drops the staged clip of an abandoned Google batch segment."""
+        if not future.cancelled() and future.exception() is None:
+            self._discard_attempt('google', future.result())
+    
+    def generate_batch_with_specific_voice(self, tasks, voice_key, provider='google', max_concurrency=4, usage=None):
+        """
+        Generate all voice segments of one video with one voice.
+        The provider is decided per video, never per segment: Google takes the
+        whole video (quota reserved on one account up front, the unused part
+        released at the end; one SSML request with google_single_request,
+        else segment by segment on a small thread pool) - and if any Google
+        segment fails or the batch times out, the WHOLE video is re-voiced on
+        Edge with one voice, synthesized concurrently on ONE event loop.
+        
+        Args:
+            tasks: {key: (text, output_path)} e.g. {'hook': ("Did you know...", "hook.mp3")}
+            voice_key: Specific voice to use
+            provider: 'google' or 'edge' (falls back to 'edge' for the whole video)
+            max_concurrency: Max simultaneous Google requests / Edge connections
+            usage: Optional VoiceJobUsage collecting this job's results
+        
+        Returns:
+            dict: {key: VoiceClip or Exception} - one result per segment
+        """
+        provider, voice_config = self._resolve_voice(voice_key, provider)
+        
+        # Step 1: Google for the whole video (cache hits included), or not at all
+        if provider == 'google' and self.google_engine:
+            clips = self._google_batch(tasks, voice_key, voice_config, max_concurrency)
+            if clips is not None:
+                if usage is not None:
+                    for clip in clips.values(): usage.add(clip.result)
+                return clips
+        
+        # Step 2: The whole video on Edge - one voice for every segment
+        edge_voice_key, edge_config = self._edge_voice_for(voice_key, voice_config)
+        results = {}
+        batch = []
+        for key, (text, path) in tasks.items():
+            started = time.monotonic()
+            if self._restore_from_cache(text, path, 'edge', edge_config):
+                result = SynthesisResult('edge', edge_voice_key, cache_hit=True, latency=time.monotonic() - started)
+                results[key] = self._open_clip(text, path, result, usage)
+            else:
+                batch.append((key, text, path, edge_config))
+        
+        if batch: print(f"   🟢 Edge TTS batch: {len(batch)} segments (Voice: {edge_voice_key})")
+        started = time.monotonic()
+        outcomes = self.edge_engine.synthesize_batch(batch, max_concurrency=max_concurrency)
+        latency = time.monotonic() - started  # The batch is awaited as a whole
+        
+        edge_breaker = self.router.breaker('edge')
+        for key, text, path, _ in batch:
+            success, chars_used, error_msg = outcomes[key]
+            if success:
+                edge_breaker.record_success()
+                self._save_to_cache(text, path, 'edge', edge_config)
+                self.tracker.log_usage('edge', 'edge', chars_used, edge_voice_key)
+                result = SynthesisResult('edge', edge_voice_key, chars_used, latency=latency)
+                results[key] = self._open_clip(text, path, result, usage)
+            else:
+                edge_breaker.record_failure()
+                results[key] = Exception(f"Failed to synthesize '{key}' with voice '{edge_voice_key}': {error_msg}")
         
-        # Step 5: Complete failure
-        raise Exception(f"Failed to synthesize audio with voice '{voice_key},{provider}'")
+        return results
 
     def get_usage_summary(self):
         """
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+File: voice_simulator.py
+Offline stand-in for Google Cloud TTS and Edge TTS.
+The simulated engines subclass the real ones and only replace the network
+call (Google client / edge_tts.Communicate), so retries, SSML marks,
+splitting, word timings, caching, quota reservations and routing all run
+the production code paths.
+
+SimulatedTTSService models one provider:
+- deterministic audio: silent MP3/WAV whose length follows the text
+  (CHARS_PER_SECOND), with matching word timings / mark timepoints
+- latency = base + per-char cost + seeded jitter (scaled by time_scale)
+- 429 bursts: the last `burst_length` of every `burst_every` requests
+- quota exhaustion: per-account character budget (Google)
+"""
+
+import io
+import re
+import html
+import time
+import wave
+import random
+import asyncio
+import threading
+from types import SimpleNamespace
+
+from voice_google import GoogleVoiceEngine
+from voice_edge import EdgeVoiceEngine, TICKS_PER_SECOND
+
+CHARS_PER_SECOND = 15.0  # Simulated speaking rate
+SAMPLE_RATE = 24000
+
+# MPEG-2 Layer III, 32 kbps, 24 kHz, mono: 96-byte frames of 576 samples.
+# Zeroed side info decodes as digital silence.
+MP3_FRAME = bytes([0xFF, 0xF3, 0x44, 0xC4]) + bytes(92)
+MP3_FRAME_SECONDS = 576 / SAMPLE_RATE
+
+MARK_RE = re.compile(r'<mark name="([^"]*)"/>')
+
+
+class SimulatedThrottle(Exception):
+    """429 from the simulated service (message matches what the engines retry on)."""
+
+
+def silent_mp3(duration):
+    """MP3 bytes of `duration` seconds of silence."""
+    return MP3_FRAME * max(1, int(round(duration / MP3_FRAME_SECONDS)))
+
+
+def silent_wav(duration, sample_rate=SAMPLE_RATE):
+    """Mono 16-bit WAV bytes of `duration` seconds of silence."""
+    buf = io.BytesIO()
+    with wave.open(buf, 'wb') as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(sample_rate)
+        w.writeframes(bytes(2 * int(duration * sample_rate)))
+    return buf.getvalue()
+
+
+def word_timeline(text):
+    """
+    Returns:
+        tuple: ([(word, start, end), ...], total_seconds) at CHARS_PER_SECOND
+    """
+    words, t = [], 0.0
+    for word in text.split():
+        length = len(word) / CHARS_PER_SECOND
+        words.append((word, t, t + length))
+        t += length + 1 / CHARS_PER_SECOND  # The space
+    return words, t
+
+
+def ssml_timeline(ssml):
+    """
+    Mark timepoints of an SSML document (<speak>, <mark/> and text only).
+
+    Returns:
+        tuple: ({mark_name: seconds}, total_seconds, spoken_chars)
+    """
+    body = re.sub(r'</?speak>', '', ssml)
+    marks, t, chars = {}, 0.0, 0
+    parts = MARK_RE.split(body)  # [text, name, text, name, ...]
+    for i, part in enumerate(parts):
+        if i % 2:
+            marks[part] = round(t, 3)
+        else:
+            spoken = html.unescape(re.sub(r'<[^>]+>', '', part))
+            chars += len(spoken)
+            t += len(spoken) / CHARS_PER_SECOND
+    return marks, t, chars
+
+
+class SimulatedTTSService:
+    """
+    Usage:
+        google = SimulatedTTSService('google', latency=0.3, burst_every=20, burst_length=3,
+                                     quota_chars=50_000)
+        engine = SimulatedGoogleVoiceEngine(google, accounts=2)
+    """
+
+    def __init__(self, name='sim', latency=0.2, per_char=0.001, jitter=0.05,
+                 burst_every=0, burst_length=0, quota_chars=None, time_scale=1.0, seed=1234):
+        """
+        Args:
+            name: Label for stats
+            latency: Base seconds per request
+            per_char: Extra seconds per character
+            jitter: Max extra seconds (uniform, seeded)
+            burst_every, burst_length: 429 pattern (0 = never throttle)
+            quota_chars: Characters per account before quota errors (None = unlimited)
+            time_scale: Multiplier on every delay (e.g., 0.1 for fast CI runs)
+            seed: Jitter seed (same seed + same request order = same delays)
+        """
+        self.name = name
+        self.latency = latency
+        self.per_char = per_char
+        self.jitter = jitter
+        self.burst_every = burst_every
+        self.burst_length = burst_length
+        self.quota_chars = quota_chars
+        self.time_scale = time_scale
+        self.rng = random.Random(seed)
+        self.used = {}  # account -> chars
+        self.requests = 0
+        self.throttled = 0
+        self.quota_rejections = 0
+        self.chars = 0
+        self._lock = threading.Lock()
+
+    def request(self, chars, account=None):
+        """
+        Admits one request.
+
+        Returns:
+            float: Seconds the response takes (caller sleeps it)
+
+        Raises:
+            SimulatedThrottle: 429 burst or exhausted quota
+        """
+        with self._lock:
+            self.requests += 1
+            if self.burst_every and (self.requests - 1) % self.burst_every >= self.burst_every - self.burst_length:
+                self.throttled += 1
+                raise SimulatedThrottle("429, message='Too Many Requests' (simulated)")
+            if self.quota_chars is not None:
+                if self.used.get(account, 0) + chars > self.quota_chars:
+                    self.quota_rejections += 1
+                    raise SimulatedThrottle("429 RESOURCE_EXHAUSTED: quota exceeded (simulated)")
+                self.used[account] = self.used.get(account, 0) + chars
+            self.chars += chars
+            delay = self.latency + self.per_char * chars + self.rng.uniform(0, self.jitter)
+        return delay * self.time_scale
+
+    def stats(self):
+        with self._lock:
+            return {'requests': self.requests, 'throttled': self.throttled,
+                    'quota_rejections': self.quota_rejections, 'chars': self.chars}
+
+
+# ----------------------------------------------------------------------
+# Google
+# ----------------------------------------------------------------------
+
+class SimulatedGoogleClient:
+    """Answers synthesize_speech() like texttospeech / texttospeech_v1beta1 clients."""
+
+    def __init__(self, service, account):
+        self.service = service
+        self.account = account
+
+    def synthesize_speech(self, request=None, input=None, voice=None, audio_config=None):
+        if request is not None:
+            input, audio_config = request['input'], request['audio_config']
+
+        ssml = getattr(input, 'ssml', '') or ''
+        if ssml:
+            marks, duration, chars = ssml_timeline(ssml)
+        else:
+            text = getattr(input, 'text', '') or ''
+            _, duration = word_timeline(text)
+            marks, chars = {}, len(text)
+
+        time.sleep(self.service.request(chars, self.account))
+
+        sample_rate = getattr(audio_config, 'sample_rate_hertz', 0)
+        if sample_rate:  # LINEAR16 request (single-request batch mode)
+            audio = silent_wav(duration, sample_rate)
+        else:
+            audio = silent_mp3(duration)
+        return SimpleNamespace(
+            audio_content=audio,
+            timepoints=[SimpleNamespace(mark_name=name, time_seconds=t) for name, t in marks.items()]
+        )
+
+
+class SimulatedGoogleVoiceEngine(GoogleVoiceEngine):
+    """GoogleVoiceEngine with `accounts` simulated accounts and no credentials."""
+
+    def __init__(self, service=None, accounts=2):
+        self.service = service or SimulatedTTSService('google')
+        self.account_count = accounts
+        super().__init__(config_dir=None)
+
+    def _discover_accounts(self):
+        return {f"account{i + 1}": "<simulated>" for i in range(self.account_count)}
+
+    def _get_client(self, account_name):
+        return SimulatedGoogleClient(self.service, account_name)
+
+    _get_beta_client = _get_client
+
+
+# ----------------------------------------------------------------------
+# Edge
+# ----------------------------------------------------------------------
+
+class SimulatedCommunicate:
+    """Stands in for edge_tts.Communicate: audio chunks + WordBoundary events."""
+
+    def __init__(self, service, text):
+        self.service = service
+        self.text = text
+
+    async def stream(self):
+        delay = self.service.request(len(self.text))
+        await asyncio.sleep(delay)
+
+        words, duration = word_timeline(self.text)
+        for word, start, end in words:
+            yield {
+                "type": "WordBoundary",
+                "offset": int(start * TICKS_PER_SECOND),
+                "duration": int((end - start) * TICKS_PER_SECOND),
+                "text": word
+            }
+        audio = silent_mp3(duration)
+        for i in range(0, len(audio), 4096):
+            yield {"type": "audio", "data": audio[i:i + 4096]}
+
+
+class SimulatedEdgeVoiceEngine(EdgeVoiceEngine):
+    """EdgeVoiceEngine talking to a SimulatedTTSService (retry waits scaled down)."""
+
+    def __init__(self, service=None, retry_base=0.025, retry_max=0.2, rate_limit_base=0.2, rate_limit_max=3.0):
+        self.service = service or SimulatedTTSService('edge')
+        super().__init__(retry_base=retry_base, retry_max=retry_max,
+                         rate_limit_base=rate_limit_base, rate_limit_max=rate_limit_max)
+
+    def _communicate(self, text, voice_config):
+        return SimulatedCommunicate(self.service, text)
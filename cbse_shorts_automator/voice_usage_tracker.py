@@ -3,13 +3,34 @@
 File: voice_usage_tracker.py
 Persistent quota tracking for Google Cloud TTS across multiple accounts.
 Handles usage monitoring, account rotation, and fallback decisions.
+
+Storage (safe for concurrent threads AND worker processes):
+- voice_usage_log.jsonl    append-only, one line per synthesized clip
+- voice_quota_state.json   per-account quota + running totals, replaced atomically
+Both are only touched under an exclusive file lock.
+
+Reservations: a job reserves its whole video's characters on ONE account
+up front (reserve_quota), charges usage against it (log_usage) and releases
+whatever it did not use (commit_reservation). Reserved characters count as
+taken for every other job, so parallel videos never overrun an account
+mid-video.
 """
 
 import os
 import json
+import uuid
+import random
 import datetime
+import tempfile
+import threading
+from contextlib import contextmanager
 from pathlib import Path
 
+try:
+    import fcntl  # POSIX only; on other platforms we fall back to the thread lock
+except ImportError:
+    fcntl = None
+
 # ============================================================================
 # QUOTA LIMITS (Monthly per Google Cloud Project)
 # ============================================================================
@@ -25,6 +46,10 @@ GOOGLE_QUOTA_LIMITS = {
 DEFAULT_VOICE_TYPE = 'neural2'
 MONTHLY_QUOTA = GOOGLE_QUOTA_LIMITS[DEFAULT_VOICE_TYPE]
 
+# Reservations older than this belong to a crashed job and are dropped
+RESERVATION_TTL_SECONDS = 2 * 60 * 60
+ACCOUNT_STRATEGIES = ('round_robin', 'weighted')
+
 class VoiceUsageTracker:
     """
     Tracks TTS usage across multiple Google Cloud accounts and Edge TTS.
@@ -35,46 +60,138 @@ class VoiceUsageTracker:
         self.data_dir = data_dir
         os.makedirs(data_dir, exist_ok=True)
         
-        self.usage_file = os.path.join(data_dir, 'voice_usage_history.json')
+        self.log_file = os.path.join(data_dir, 'voice_usage_log.jsonl')
         self.quota_file = os.path.join(data_dir, 'voice_quota_state.json')
+        self.legacy_usage_file = os.path.join(data_dir, 'voice_usage_history.json')
+        self.lock_file = os.path.join(data_dir, '.voice_usage.lock')
+        self._thread_lock = threading.RLock()
+        self._lock_depth = 0
         
-        self.usage_history = self._load_usage_history()
-        self.quota_state = self._load_quota_state()
+        with self._locked():
+            self._migrate_legacy_history()
+            self.quota_state = self._load_quota_state()
+            self._save_quota_state()
     
-    def _load_usage_history(self):
-        """Load cumulative usage log (append-only)."""
-        if os.path.exists(self.usage_file):
-            try:
-                with open(self.usage_file, 'r') as f:
-                    return json.load(f)
-            except:
-                return []
-        return []
+    # ------------------------------------------------------------------
+    # Locking & persistence
+    # ------------------------------------------------------------------
+    
+    @contextmanager
+    def _locked(self):
+        """
+        Exclusive access to log + state (threads + other processes).
+        Re-entrant: only the outermost level takes the file lock (a second
+        flock on a new descriptor would block on ourselves).
+        """
+        with self._thread_lock:
+            if self._lock_depth:
+                self._lock_depth += 1
+                try:
+                    yield
+                finally:
+                    self._lock_depth -= 1
+                return
+            with open(self.lock_file, 'a') as lock:
+                if fcntl: fcntl.flock(lock, fcntl.LOCK_EX)
+                self._lock_depth = 1
+                try:
+                    yield
+                finally:
+                    self._lock_depth = 0
+                    if fcntl: fcntl.flock(lock, fcntl.LOCK_UN)
     
-    def _save_usage_history(self):
-        """Save usage history to disk."""
-        with open(self.usage_file, 'w') as f:
-            json.dump(self.usage_history, f, indent=2)
+    def _log_size(self):
+        return os.path.getsize(self.log_file) if os.path.exists(self.log_file) else 0
     
     def _load_quota_state(self):
-        """Load current quota state per account."""
+        """
+        Load current quota state per account (call with the lock held).
+        Resets monthly quotas and replays any log lines the totals missed.
+        """
+        state = None
         if os.path.exists(self.quota_file):
             try:
                 with open(self.quota_file, 'r') as f:
                     state = json.load(f)
-                    # Reset if month changed
-                    if self._should_reset_quota(state.get('last_reset')):
-                        return self._initialize_quota_state()
-                    return state
-            except:
-                return self._initialize_quota_state()
-        return self._initialize_quota_state()
+            except (ValueError, OSError):
+                state = None
+        if state is None:
+            state = self._initialize_quota_state()
+            state['totals']['log_bytes'] = 0  # Unknown: rebuild totals from the log
+        
+        state.setdefault('accounts', {})
+        state.setdefault('reservations', {})
+        state.setdefault('rr_cursor', 0)
+        if 'totals' not in state:
+            state['totals'] = self._initialize_quota_state()['totals']
+            state['totals']['log_bytes'] = 0
+        
+        # Reset if month changed (registered accounts stay registered)
+        if self._should_reset_quota(state.get('last_reset')):
+            state['last_reset'] = datetime.datetime.now().strftime('%Y-%m')
+            for acc in state['accounts'].values():
+                acc['used_chars'] = 0
+                acc['available'] = acc['quota_limit']
+        
+        self._catch_up_totals(state)
+        self._expire_reservations(state)
+        return state
+    
+    def _catch_up_totals(self, state):
+        """Folds log lines written after the last state save into the totals."""
+        totals = state['totals']
+        size = self._log_size()
+        if totals['log_bytes'] > size:  # Log was truncated/replaced: rebuild
+            for key in ('edge_chars', 'google_chars', 'cost_usd', 'entries'): totals[key] = 0
+            totals['log_bytes'] = 0
+        if totals['log_bytes'] == size: return
+        
+        with open(self.log_file, 'rb') as f:
+            f.seek(totals['log_bytes'])
+            for line in f:
+                if not line.endswith(b'\n'): break  # Half-written tail (crashed writer)
+                totals['log_bytes'] += len(line)
+                try:
+                    self._add_to_totals(totals, json.loads(line))
+                except ValueError:
+                    continue
+    
+    @staticmethod
+    def _expire_reservations(state):
+        """Drops reservations a crashed job never committed."""
+        now = datetime.datetime.now().timestamp()
+        for res_id, res in list(state['reservations'].items()):
+            if now - res.get('created', now) > RESERVATION_TTL_SECONDS:
+                del state['reservations'][res_id]
+    
+    @staticmethod
+    def _reserved_chars(state, account_name):
+        return sum(res['remaining'] for res in state['reservations'].values()
+                   if res['account'] == account_name)
+    
+    def _free_chars(self, state, account_name):
+        """Quota left on an account once other jobs' reservations are taken out."""
+        acc = state['accounts'][account_name]
+        return acc['available'] - self._reserved_chars(state, account_name)
+    
+    @staticmethod
+    def _add_to_totals(totals, entry):
+        totals['entries'] += 1
+        if entry.get('provider') == 'edge':
+            totals['edge_chars'] += entry.get('chars', 0)
+        elif entry.get('provider') == 'google':
+            totals['google_chars'] += entry.get('chars', 0)
+            totals['cost_usd'] += entry.get('cost_usd', 0)
     
     def _initialize_quota_state(self):
         """Initialize fresh quota state."""
         return {
             'last_reset': datetime.datetime.now().strftime('%Y-%m'),
-            'accounts': {}
+            'accounts': {},
+            'reservations': {},
+            'rr_cursor': 0,
+            'totals': {'edge_chars': 0, 'google_chars': 0, 'cost_usd': 0.0,
+                       'entries': 0, 'log_bytes': self._log_size()}
         }
     
     def _should_reset_quota(self, last_reset_month):
@@ -85,34 +202,65 @@ class VoiceUsageTracker:
         return current_month != last_reset_month
     
     def _save_quota_state(self):
-        """Save quota state to disk."""
-        with open(self.quota_file, 'w') as f:
+        """Save quota state atomically (call with the lock held)."""
+        fd, tmp = tempfile.mkstemp(dir=self.data_dir, prefix='.voice_quota-', suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
             json.dump(self.quota_state, f, indent=2)
+        os.replace(tmp, self.quota_file)
+    
+    def _refresh(self):
+        """Re-reads state other processes may have changed (call with the lock held)."""
+        self.quota_state = self._load_quota_state()
+        return self.quota_state
+    
+    def _migrate_legacy_history(self):
+        """One-time move of voice_usage_history.json into the JSONL log (lock held)."""
+        if not os.path.exists(self.legacy_usage_file): return
+        try:
+            with open(self.legacy_usage_file, 'r') as f:
+                history = json.load(f)
+        except (ValueError, OSError):
+            history = []
+        
+        with open(self.log_file, 'a') as f:
+            for entry in history:
+                f.write(json.dumps(entry) + "\n")
+        os.replace(self.legacy_usage_file, self.legacy_usage_file + '.migrated')
+        print(f"📦 Migrated {len(history)} voice usage entries to {os.path.basename(self.log_file)}")
+    
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
     
     def register_account(self, account_name):
         """Register a new Google Cloud account for tracking."""
-        if account_name not in self.quota_state['accounts']:
-            self.quota_state['accounts'][account_name] = {
-                'used_chars': 0,
-                'quota_limit': MONTHLY_QUOTA,
-                'available': MONTHLY_QUOTA
-            }
-            self._save_quota_state()
+        with self._locked():
+            state = self._refresh()
+            if account_name not in state['accounts']:
+                state['accounts'][account_name] = {
+                    'used_chars': 0,
+                    'quota_limit': MONTHLY_QUOTA,
+                    'available': MONTHLY_QUOTA
+                }
+                self._save_quota_state()
     
     def get_account_status(self, account_name):
         """
         Get current quota status for an account.
         
         Returns:
-            dict: {'used': int, 'available': int, 'limit': int, 'percent_used': float}
+            dict: {'used': int, 'available': int, 'reserved': int, 'limit': int, 'percent_used': float}
+                  ('available' already excludes characters reserved by running jobs)
         """
-        if account_name not in self.quota_state['accounts']:
-            self.register_account(account_name)
-        
-        acc = self.quota_state['accounts'][account_name]
+        with self._locked():
+            if account_name not in self._refresh()['accounts']:
+                self.register_account(account_name)
+            acc = self.quota_state['accounts'][account_name]
+            reserved = self._reserved_chars(self.quota_state, account_name)
         return {
             'used': acc['used_chars'],
-            'available': acc['available'],
+            'available': acc['available'] - reserved,
+            'reserved': reserved,
             'limit': acc['quota_limit'],
             'percent_used': (acc['used_chars'] / acc['quota_limit']) * 100
         }
@@ -128,15 +276,78 @@ class VoiceUsageTracker:
         Returns:
             str or None: Account name with sufficient quota, or None if all exhausted
         """
-        for acc_name in account_names:
-            status = self.get_account_status(acc_name)
-            if status['available'] >= required_chars:
-                return acc_name
+        with self._locked():
+            for acc_name in account_names:
+                status = self.get_account_status(acc_name)
+                if status['available'] >= required_chars:
+                    return acc_name
         return None
     
-    def log_usage(self, account_name, provider, chars_used, voice_used, video_id=None):
+    def reserve_quota(self, required_chars, account_names, strategy='round_robin', video_id=None):
         """
-        Log TTS usage for tracking.
+        Atomically reserves a whole video's characters on one account.
+        
+        Args:
+            required_chars: Estimated characters for every segment of the video
+            account_names: Candidate accounts
+            strategy: 'round_robin' (rotate between jobs) or 'weighted'
+                      (random, proportional to each account's free quota)
+            video_id: Optional label stored with the reservation
+        
+        Returns:
+            dict or None: {'id', 'account', 'chars'}, or None if no account has room
+        """
+        if strategy not in ACCOUNT_STRATEGIES:
+            raise ValueError(f"Unknown account strategy '{strategy}' (use one of {ACCOUNT_STRATEGIES})")
+        
+        with self._locked():
+            state = self._refresh()
+            for acc_name in account_names:
+                if acc_name not in state['accounts']:
+                    self.register_account(acc_name)
+                    state = self.quota_state
+            
+            free = {name: self._free_chars(state, name) for name in account_names}
+            eligible = [name for name in account_names if free[name] >= required_chars]
+            if not eligible: return None
+            
+            if strategy == 'weighted':
+                account = random.choices(eligible, weights=[free[name] for name in eligible])[0]
+            else:
+                cursor = state['rr_cursor'] % len(account_names)
+                ordered = account_names[cursor:] + account_names[:cursor]
+                account = next(name for name in ordered if name in eligible)
+                state['rr_cursor'] = account_names.index(account) + 1
+            
+            res_id = uuid.uuid4().hex
+            state['reservations'][res_id] = {
+                'account': account,
+                'chars': required_chars,
+                'remaining': required_chars,
+                'video_id': video_id,
+                'created': datetime.datetime.now().timestamp()
+            }
+            self._save_quota_state()
+        return {'id': res_id, 'account': account, 'chars': required_chars}
+    
+    def commit_reservation(self, reservation_id):
+        """
+        Ends a reservation: usage already charged via log_usage stays, the
+        unused remainder goes back to the account.
+        
+        Returns:
+            int: Characters released (0 if the reservation was unknown/expired)
+        """
+        with self._locked():
+            state = self._refresh()
+            res = state['reservations'].pop(reservation_id, None)
+            if res is None: return 0
+            self._save_quota_state()
+        return res['remaining']
+    
+    def log_usage(self, account_name, provider, chars_used, voice_used, video_id=None, reservation_id=None):
+        """
+        Log TTS usage for tracking: one appended line + one atomic state update.
         
         Args:
             account_name: Account identifier (e.g., 'google_account1', 'edge')
@@ -144,18 +355,8 @@ class VoiceUsageTracker:
             chars_used: Number of characters synthesized
             voice_used: Voice name used
             video_id: Optional video identifier
+            reservation_id: Reservation (from reserve_quota) these chars were drawn from
         """
-        # Update quota state (only for Google)
-        if provider == 'google':
-            if account_name not in self.quota_state['accounts']:
-                self.register_account(account_name)
-            
-            acc = self.quota_state['accounts'][account_name]
-            acc['used_chars'] += chars_used
-            acc['available'] = acc['quota_limit'] - acc['used_chars']
-            self._save_quota_state()
-        
-        # Append to usage history
         log_entry = {
             'timestamp': datetime.datetime.now().isoformat(),
             'account': account_name,
@@ -165,8 +366,32 @@ class VoiceUsageTracker:
             'video_id': video_id,
             'cost_usd': self._estimate_cost(provider, chars_used) if provider == 'google' else 0
         }
-        self.usage_history.append(log_entry)
-        self._save_usage_history()
+        line = (json.dumps(log_entry) + "\n").encode('utf-8')
+        
+        with self._locked():
+            state = self._refresh()
+            
+            # Update quota state (only for Google)
+            if provider == 'google':
+                acc = state['accounts'].setdefault(account_name, {
+                    'used_chars': 0, 'quota_limit': MONTHLY_QUOTA, 'available': MONTHLY_QUOTA
+                })
+                acc['used_chars'] += chars_used
+                acc['available'] = acc['quota_limit'] - acc['used_chars']
+                res = state['reservations'].get(reservation_id)
+                if res:
+                    res['remaining'] = max(0, res['remaining'] - chars_used)
+            
+            # Append to usage log (single write, O_APPEND)
+            fd = os.open(self.log_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, line)
+            finally:
+                os.close(fd)
+            
+            self._add_to_totals(state['totals'], log_entry)
+            state['totals']['log_bytes'] += len(line)
+            self._save_quota_state()
     
     def _estimate_cost(self, provider, chars_used):
         """
@@ -188,19 +413,24 @@ class VoiceUsageTracker:
     
     def get_summary(self):
         """
-        Get usage summary across all accounts.
+        Get usage summary across all accounts (from running totals, no log scan).
         
         Returns:
             dict: Summary statistics
         """
+        with self._locked():
+            state = self._refresh()
+            accounts = {name: dict(acc) for name, acc in state['accounts'].items()}
+            totals = dict(state['totals'])
+        
         summary = {
             'total_google_chars': 0,
-            'total_edge_chars': 0,
-            'total_cost_usd': 0,
+            'total_edge_chars': totals['edge_chars'],
+            'total_cost_usd': totals['cost_usd'],
             'accounts': []
         }
         
-        for acc_name, acc_data in self.quota_state['accounts'].items():
+        for acc_name, acc_data in accounts.items():
             summary['total_google_chars'] += acc_data['used_chars']
             summary['accounts'].append({
                 'name': acc_name,
@@ -209,13 +439,6 @@ class VoiceUsageTracker:
                 'percent_used': (acc_data['used_chars'] / acc_data['quota_limit']) * 100
             })
         
-        # Calculate Edge usage from history
-        for entry in self.usage_history:
-            if entry['provider'] == 'edge':
-                summary['total_edge_chars'] += entry['chars']
-            if entry['provider'] == 'google':
-                summary['total_cost_usd'] += entry.get('cost_usd', 0)
-        
         return summary
     
     def print_summary(self):
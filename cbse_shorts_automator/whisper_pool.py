@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+File: whisper_pool.py
+Process-wide Whisper model service shared by VideoProcessor and VideoScheduler.
+Weights are loaded once per worker process, access is serialised (the model
+is not thread-safe) and the model is unloaded after an idle timeout to give
+the RAM back between batches.
+"""
+
+import gc
+import threading
+import time
+import warnings
+
+# Suppress Whisper warnings
+warnings.filterwarnings("ignore")
+
+DEFAULT_MODEL = "tiny"
+DEFAULT_IDLE_TIMEOUT = 300  # seconds
+
+
+class WhisperModelPool:
+    """
+    Usage:
+        pool = get_whisper_pool()
+        result = pool.transcribe("lecture.mp4")
+    """
+
+    def __init__(self, model_name=DEFAULT_MODEL, idle_timeout=DEFAULT_IDLE_TIMEOUT, debug=True):
+        """
+        Args:
+            model_name: Whisper size ('tiny', 'base', 'small', ...)
+            idle_timeout: Unload after this many idle seconds (None/0 = keep forever)
+            debug: Print load/unload messages
+        """
+        self.model_name = model_name
+        self.idle_timeout = idle_timeout
+        self.debug = debug
+        self._model = None
+        self._lock = threading.RLock()
+        self._last_used = 0.0
+        self._timer = None
+        self.load_count = 0
+
+    def _load(self):
+        if self._model is None:
+            import whisper  # Heavy import (torch) only when actually needed
+            if self.debug: print(f"⏳ Loading Whisper Model ({self.model_name})...")
+            self._model = whisper.load_model(self.model_name)
+            self.load_count += 1
+        return self._model
+
+    def transcribe(self, audio, **kwargs):
+        """
+        Thread-safe wrapper around model.transcribe().
+
+        Args:
+            audio: File path or 16 kHz mono float32 numpy array
+            **kwargs: Passed through to Whisper (e.g., language='en')
+
+        Returns:
+            dict: Whisper result ('text', 'segments', ...)
+        """
+        with self._lock:
+            model = self._load()
+            try:
+                return model.transcribe(audio, **kwargs)
+            finally:
+                self._last_used = time.time()
+                self._schedule_unload()
+
+    def _schedule_unload(self):
+        if not self.idle_timeout: return
+        if self._timer: self._timer.cancel()
+        self._timer = threading.Timer(self.idle_timeout, self._unload_if_idle)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _unload_if_idle(self):
+        with self._lock:
+            if self._model is not None and time.time() - self._last_used >= self.idle_timeout:
+                self.unload()
+
+    def unload(self):
+        """Drops the weights and returns the memory."""
+        with self._lock:
+            if self._model is None: return
+            if self.debug: print("🧹 Releasing Whisper AI from memory...")
+            self._model = None
+            gc.collect()
+            try:
+                import torch
+                if torch.cuda.is_available(): torch.cuda.empty_cache()
+            except ImportError:
+                pass
+
+
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+def configure_whisper_pool(model_name=None, idle_timeout=None):
+    """
+    Sets model size / idle timeout for this process (e.g., from the WHISPER
+    config block). Changing the model drops any weights already loaded.
+    """
+    pool = get_whisper_pool()
+    with pool._lock:
+        if model_name and model_name != pool.model_name:
+            pool.unload()
+            pool.model_name = model_name
+        if idle_timeout is not None:
+            pool.idle_timeout = idle_timeout
+    return pool
+
+def get_whisper_pool():
+    """The one WhisperModelPool of this process."""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = WhisperModelPool()
+    return _POOL
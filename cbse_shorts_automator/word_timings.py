@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+File: word_timings.py
+Word-level timing tables for synthesized voice clips.
+Providers report them (Edge WordBoundary events, Google SSML mark
+timepoints); they travel with the audio as a '<clip>.words.json' sidecar
+(and inside the TTS cache entry), so captions and the typewriter can follow
+the voice without any analysis pass.
+
+Table format: [{'word': str, 'start': float, 'end': float}, ...] in seconds
+from the start of the clip.
+"""
+
+import os
+import json
+
+WORDS_SUFFIX = ".words.json"
+
+
+def words_path_for(audio_path):
+    """Sidecar path of an audio file ('hook.mp3' -> 'hook.words.json')."""
+    return os.path.splitext(audio_path)[0] + WORDS_SUFFIX
+
+
+def save_words(audio_path, words):
+    """Writes the sidecar (an empty table removes any stale one)."""
+    path = words_path_for(audio_path)
+    if not words:
+        if os.path.exists(path): os.remove(path)
+        return None
+    with open(path, 'w') as f:
+        json.dump(words, f)
+    return path
+
+
+def load_words(audio_path):
+    """Reads the sidecar, or returns None if the provider gave no timings."""
+    path = words_path_for(audio_path)
+    if not os.path.exists(path): return None
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (ValueError, OSError):
+        return None
+
+
+def words_from_marks(tokens, mark_times, clip_end):
+    """
+    Builds a table from per-word mark timepoints.
+
+    Args:
+        tokens: Words in speaking order
+        mark_times: Start time of each word (same order, clip-relative)
+        clip_end: Clip duration (end of the last word)
+    """
+    words = []
+    for i, (token, start) in enumerate(zip(tokens, mark_times)):
+        end = mark_times[i + 1] if i + 1 < len(mark_times) else clip_end
+        words.append({'word': token, 'start': round(start, 3), 'end': round(max(start, end), 3)})
+    return words
+
+
+def estimate_words(text, duration):
+    """
+    Last resort for clips without provider timings (e.g., cached before
+    timings existed): spreads the duration over words by character count.
+    """
+    tokens = text.split()
+    total_chars = sum(len(t) for t in tokens) or 1
+    words, cursor = [], 0.0
+    for token in tokens:
+        length = duration * len(token) / total_chars
+        words.append({'word': token, 'start': round(cursor, 3), 'end': round(cursor + length, 3)})
+        cursor += length
+    return words
+
+
+def shift_words(words, offset):
+    """Moves a clip-relative table onto the video timeline."""
+    return [{'word': w['word'], 'start': round(w['start'] + offset, 3), 'end': round(w['end'] + offset, 3)}
+            for w in words or []]
+
+
+def group_words(words, max_words=4):
+    """
+    Caption chunks straight from the table: breaks on punctuation or length.
+
+    Returns:
+        list: [{'text', 'start', 'end', 'duration'}, ...]
+    """
+    chunks, current = [], []
+
+    def flush():
+        start, end = current[0]['start'], current[-1]['end']
+        chunks.append({
+            'text': " ".join(w['word'] for w in current),
+            'start': start, 'end': end, 'duration': end - start
+        })
+
+    for w in words:
+        current.append(w)
+        if len(current) >= max_words or w['word'].endswith(('.', '!', '?', ',', ':')):
+            flush()
+            current = []
+    if current: flush()
+    return chunks